@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+긴급 알림 경로 부하 테스트 (POST /api/simulate-emergency -> /ws/emergency 전파)
+
+API 서버를 별도 프로세스로 띄우고 대시보드 WebSocket N개를 연결한 뒤, 긴급 버튼 POST를
+초당 M회 일정한 간격으로 보냅니다. POST를 보낸 시각부터 각 대시보드가 알림 프레임을 받은
+시각까지를 전달 지연으로 측정해 백분위수(p50/p90/p99), 처리량, 서버 메모리 사용량을
+JSON으로 출력합니다. --max-p99-ms 등을 지정하면 기준을 넘을 때 종료 코드 1을 돌려주므로
+배포 전 검사에 사용할 수 있습니다.
+
+- 알림은 정류장을 돌아가며 보내고, 성공한 POST만 응답에 담긴 알림 시각으로 대시보드
+  수신과 짝을 맞춥니다. 반복 누름 병합이 켜져 있으면 누름마다 알림이 오지 않으므로 서버는
+  병합을 끄고 띄웁니다(--url로 병합이 켜진 서버에 보내면 병합된 누름은 기대 수에서 뺌).
+- 부하를 주는 쪽도 파이썬 프로세스 하나이므로, 대시보드 수 x 초당 알림 수가 아주 크면
+  측정 도구가 먼저 병목이 될 수 있습니다. 결과의 client_cpu_seconds를 함께 확인하세요.
+- 연결 수가 많으면 열 수 있는 파일 수 제한(ulimit -n)을 늘려야 합니다.
+
+실행: backend 디렉터리에서
+    python -m app.benchmark_emergency --dashboards 200 --rate 50 --duration 20 --output result.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+
+from app.frames import JSON_PROTOCOL, MSGPACK_PROTOCOL, decode_binary
+
+# 서버가 뜰 때까지 기다리는 최대 시간(초)
+SERVER_START_TIMEOUT = 20.0
+# 부하를 멈춘 뒤 남은 알림이 도착하기를 기다리는 최대 시간(초)
+DRAIN_TIMEOUT = 10.0
+# 서버 메모리 측정 간격(초)
+MEMORY_SAMPLE_INTERVAL = 0.5
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """정렬된 목록의 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """밀리초 단위 지연 요약"""
+    values = sorted(values)
+    result = {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else None,
+    }
+    return {
+        key: round(value, 3) if isinstance(value, float) else value
+        for key, value in result.items()
+    }
+
+
+def read_memory(pid: int) -> Optional[Dict[str, float]]:
+    """프로세스의 현재/최대 상주 메모리(MB). /proc이 없는 환경이면 None"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    try:
+        return {
+            "rss_mb": int(fields["VmRSS"].split()[0]) / 1024,
+            "peak_rss_mb": int(fields["VmHWM"].split()[0]) / 1024,
+        }
+    except (KeyError, ValueError):
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerProcess:
+    """벤치마크 전용 설정(임시 DB, 병합 끔)으로 띄운 API 서버"""
+
+    def __init__(self, port: int, workers: int = 1):
+        self.port = port
+        self.workers = workers
+        self.process: Optional[subprocess.Popen] = None
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="busstop-bench-")
+
+    def start(self):
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(self._tmpdir.name, 'bench.db')}",
+            "EMERGENCY_COALESCE_WINDOW": "0",
+            # 같은 정류장에 연달아 보내는 부하이므로 요청 빈도 제한은 끔
+            "EMERGENCY_RATE_LIMIT": "0",
+            "MESSAGE_BUS": "unix" if self.workers > 1 else "local",
+            "MESSAGE_BUS_PATH": os.path.join(self._tmpdir.name, "bus.sock"),
+        }
+        command = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(self.port),
+            "--log-level", "warning", "--workers", str(self.workers),
+        ]
+        # 서버의 요청별 로그 출력은 측정에 영향을 주지 않도록 버림
+        self.process = subprocess.Popen(
+            command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    async def wait_ready(self, client: httpx.AsyncClient):
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"API 서버가 종료되었습니다 (종료 코드 {self.process.returncode})")
+            try:
+                response = await client.get("/api/health")
+                if response.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+        raise RuntimeError("API 서버가 제한 시간 안에 시작되지 않았습니다.")
+
+    def memory(self) -> Optional[Dict[str, float]]:
+        """서버 프로세스(워커가 여럿이면 모든 하위 프로세스 합계)의 메모리"""
+        pids = [self.process.pid, *_child_pids(self.process.pid)]
+        samples = [sample for sample in map(read_memory, pids) if sample]
+        if not samples:
+            return None
+        return {
+            "rss_mb": sum(sample["rss_mb"] for sample in samples),
+            "peak_rss_mb": sum(sample["peak_rss_mb"] for sample in samples),
+        }
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._tmpdir.cleanup()
+
+
+def _child_pids(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", encoding="ascii") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+class Dashboard:
+    """알림을 받는 대시보드 WebSocket 하나"""
+
+    def __init__(self, url: str, encoding: str = "json"):
+        self.url = url
+        self.encoding = encoding
+        # (정류장 ID, 알림 시각) -> 처음 받은 시각
+        self.received: Dict[Tuple[int, str], float] = {}
+        self.frames = 0
+        self.closed_by_server = False
+        self._ws = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        protocol = MSGPACK_PROTOCOL if self.encoding == "msgpack" else JSON_PROTOCOL
+        self._ws = await websockets.connect(self.url, max_queue=None, subprotocols=[protocol])
+        self._task = asyncio.create_task(self._receive())
+
+    async def _receive(self):
+        try:
+            async for message in self._ws:
+                now = time.perf_counter()
+                self.frames += 1
+                data = decode_binary(message) if isinstance(message, bytes) else json.loads(message)
+                if data.get("type") == "emergency_batch":
+                    alerts = data["alerts"]
+                elif "busStopId" in data and "type" not in data:
+                    alerts = [data]
+                else:
+                    # 장치 접속 상태 등 다른 프레임
+                    continue
+                for alert in alerts:
+                    self.received.setdefault((alert["busStopId"], alert["timestamp"]), now)
+        except websockets.ConnectionClosed:
+            self.closed_by_server = True
+
+    def count(self) -> int:
+        return len(self.received)
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def connect_dashboards(
+    url: str, count: int, encoding: str = "json", parallel: int = 50
+) -> List[Dashboard]:
+    dashboards = [Dashboard(url, encoding) for _ in range(count)]
+    limiter = asyncio.Semaphore(parallel)
+
+    async def connect(dashboard):
+        async with limiter:
+            await dashboard.connect()
+
+    await asyncio.gather(*(connect(dashboard) for dashboard in dashboards))
+    return dashboards
+
+
+async def fire_emergencies(
+    client: httpx.AsyncClient,
+    stop_ids: List[int],
+    rate: float,
+    duration: float,
+    max_in_flight: int,
+) -> Dict[str, Any]:
+    """
+    초당 rate회 일정한 간격으로 POST를 보냅니다 (응답을 기다리지 않는 개방형 부하).
+
+    반환값의 sent는 성공한 POST의 {(정류장 ID, 서버가 돌려준 알림 시각): POST 시각}입니다.
+    수신과는 이 키로 짝지으므로 실패한 POST나 서버의 처리 순서에 영향을 받지 않습니다.
+    병합된 누름(coalesced)은 따로 알림이 오지 않으므로 sent에 넣지 않습니다.
+    """
+    sent: Dict[Tuple[int, str], float] = {}
+    post_latencies: List[float] = []
+    attempted = 0
+    failures = 0
+    coalesced = 0
+    behind = 0
+    in_flight = set()
+    limiter = asyncio.Semaphore(max_in_flight)
+
+    async def post(stop_id):
+        nonlocal attempted, failures, coalesced
+        async with limiter:
+            attempted += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"/api/simulate-emergency/{stop_id}")
+                body = response.json() if response.status_code == 200 else {}
+            except (httpx.HTTPError, ValueError):
+                body = {}
+            post_latencies.append((time.perf_counter() - started) * 1000)
+            if "timestamp" not in body:
+                failures += 1
+            elif body.get("coalesced"):
+                coalesced += 1
+            else:
+                sent[(stop_id, body["timestamp"])] = started
+
+    total = int(rate * duration)
+    start = time.perf_counter()
+    for i in range(total):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif delay < -0.05:
+            behind += 1
+        task = asyncio.create_task(post(stop_ids[i % len(stop_ids)]))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+    return {
+        "sent": sent,
+        "attempted": attempted,
+        "elapsed": time.perf_counter() - start,
+        "post_latencies": post_latencies,
+        "failures": failures,
+        "coalesced": coalesced,
+        "behind_schedule": behind,
+    }
+
+
+def match_deliveries(sent: Dict[Tuple[int, str], float], dashboards: List[Dashboard]):
+    """
+    POST와 대시보드 수신을 (정류장 ID, 알림 시각)으로 짝지어 (전달 지연 목록, 알림별 전체 전파
+    완료 지연 목록)을 밀리초 단위로 반환합니다.
+    """
+    latencies = []
+    complete = []
+    for key, sent_at in sent.items():
+        latest = None
+        for dashboard in dashboards:
+            received_at = dashboard.received.get(key)
+            if received_at is None:
+                latest = None
+                break
+            latency = (received_at - sent_at) * 1000
+            latencies.append(latency)
+            latest = latency if latest is None else max(latest, latency)
+        if latest is not None:
+            complete.append(latest)
+    return latencies, complete
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = args.port or free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = ServerProcess(port, args.workers)
+        server.start()
+
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/emergency"
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    memory_samples = []
+    sampler = None
+    dashboards: List[Dashboard] = []
+
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30.0, limits=limits) as client:
+            if server:
+                await server.wait_ready(client)
+
+            stop_ids = args.stops or [stop["id"] for stop in (await client.get("/api/bus-stops")).json()]
+            print(f"대시보드 {args.dashboards}개 연결 중...", file=sys.stderr)
+            dashboards = await connect_dashboards(ws_url, args.dashboards, args.encoding)
+
+            memory_before = server.memory() if server else None
+
+            async def sample_memory():
+                while True:
+                    sample = server.memory()
+                    if sample:
+                        memory_samples.append(sample["rss_mb"])
+                    await asyncio.sleep(MEMORY_SAMPLE_INTERVAL)
+
+            if server:
+                sampler = asyncio.create_task(sample_memory())
+
+            print(
+                f"초당 {args.rate}회, {args.duration}초 동안 긴급 알림 전송 중...", file=sys.stderr
+            )
+            cpu_before = time.process_time()
+            fired = await fire_emergencies(
+                client, stop_ids, args.rate, args.duration, args.max_in_flight
+            )
+
+            # 남은 알림이 모든 대시보드에 도착할 때까지 대기 (실패한 POST의 알림은 오지 않음)
+            # 따로 알림이 오지 않는 병합된 누름은 기대 수에서 뺌
+            attempted = fired["attempted"] - fired["coalesced"]
+            accepted = len(fired["sent"])
+            deadline = time.perf_counter() + DRAIN_TIMEOUT
+            while time.perf_counter() < deadline:
+                if all(d.count() >= accepted or d.closed_by_server for d in dashboards):
+                    break
+                await asyncio.sleep(0.05)
+            cpu_seconds = time.process_time() - cpu_before
+            memory_after = server.memory() if server else None
+    finally:
+        if sampler:
+            sampler.cancel()
+        for dashboard in dashboards:
+            await dashboard.close()
+        if server:
+            server.stop()
+
+    latencies, complete = match_deliveries(fired["sent"], dashboards)
+    received = sum(dashboard.count() for dashboard in dashboards)
+    first_sent = min(fired["sent"].values(), default=0)
+    last_received = max(
+        (received_at for d in dashboards for received_at in d.received.values()), default=first_sent
+    )
+    delivery_window = max(last_received - first_sent, 1e-9)
+
+    return {
+        "benchmark": "emergency_fanout",
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "dashboards": args.dashboards,
+            "encoding": args.encoding,
+            "rate": args.rate,
+            "duration": args.duration,
+            "workers": args.workers if server else None,
+            "stops": len(stop_ids),
+            "url": base_url,
+        },
+        "posts": {
+            "sent": fired["attempted"],
+            "failed": fired["failures"],
+            "coalesced": fired["coalesced"],
+            "behind_schedule": fired["behind_schedule"],
+            "per_second": round(fired["attempted"] / fired["elapsed"], 3),
+            "latency_ms": summarize(fired["post_latencies"]),
+        },
+        # 전달률은 보낸 POST 전체 기준 - 거절되거나 실패한 POST도 전달되지 않은 것으로 셈
+        "delivery": {
+            "expected": attempted * len(dashboards),
+            "received": received,
+            "ratio": round(received / (attempted * len(dashboards)), 6) if attempted and dashboards else None,
+            "per_second": round(received / delivery_window, 3),
+            "latency_ms": summarize(latencies),
+            # 알림 하나가 모든 대시보드에 도착하기까지 걸린 시간
+            "fanout_complete_ms": summarize(complete),
+        },
+        "dashboards": {
+            "connected": len(dashboards),
+            "closed_by_server": sum(1 for d in dashboards if d.closed_by_server),
+            "frames": sum(d.frames for d in dashboards),
+        },
+        "server_memory_mb": {
+            "before": round(memory_before["rss_mb"], 1) if memory_before else None,
+            "peak": round(max(memory_samples), 1) if memory_samples else None,
+            "after": round(memory_after["rss_mb"], 1) if memory_after else None,
+        },
+        "client_cpu_seconds": round(cpu_seconds, 3),
+    }
+
+
+def check_thresholds(result: Dict[str, Any], args) -> List[str]:
+    """기준을 넘은 항목의 설명 목록"""
+    failures = []
+    p99 = result["delivery"]["latency_ms"]["p99"]
+    if args.max_p99_ms is not None and (p99 is None or p99 > args.max_p99_ms):
+        failures.append(f"전달 지연 p99 {p99}ms > {args.max_p99_ms}ms")
+    ratio = result["delivery"]["ratio"]
+    if args.min_delivery_ratio is not None and (ratio is None or ratio < args.min_delivery_ratio):
+        failures.append(f"전달률 {ratio} < {args.min_delivery_ratio}")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="긴급 알림 수집/WebSocket 전파 부하 테스트")
+    parser.add_argument("--dashboards", type=int, default=100, help="연결할 대시보드 WebSocket 수")
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json", help="대시보드 프레임 인코딩")
+    parser.add_argument("--rate", type=float, default=20.0, help="초당 긴급 알림 POST 수")
+    parser.add_argument("--duration", type=float, default=10.0, help="부하를 주는 시간(초)")
+    parser.add_argument("--workers", type=int, default=1, help="API 서버 워커 수 (2 이상이면 unix 메시지 버스 사용)")
+    parser.add_argument("--port", type=int, default=None, help="API 서버 포트 (기본: 빈 포트)")
+    parser.add_argument("--url", default=None, help="서버를 띄우지 않고 이미 실행 중인 서버에 부하 (메모리 측정 안 함)")
+    parser.add_argument("--stops", type=lambda value: [int(v) for v in value.split(",")], default=None, help="알림을 보낼 정류장 ID 목록 (쉼표 구분, 기본: 전체)")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="동시에 진행 중인 POST 최대 수")
+    parser.add_argument("--output", default="-", help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="전달 지연 p99 기준(ms) - 넘으면 종료 코드 1")
+    parser.add_argument("--min-delivery-ratio", type=float, default=None, help="최소 전달률 (0~1) - 못 미치면 종료 코드 1")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_benchmark(args))
+    failures = check_thresholds(result, args)
+    result["passed"] = not failures
+    result["failures"] = failures
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+    delivery = result["delivery"]
+    print(
+        f"전달 지연 p50 {delivery['latency_ms']['p50']}ms, p99 {delivery['latency_ms']['p99']}ms, "
+        f"초당 {delivery['per_second']}건 전달, 전달률 {delivery['ratio']}",
+        file=sys.stderr,
+    )
+    for failure in failures:
+        print(f"기준 초과: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
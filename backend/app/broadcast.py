@@ -0,0 +1,226 @@
+"""
+WebSocket 브로드캐스트 관리
+
+연결마다 송신 대기열과 전용 송신 태스크를 두어, 느리거나 끊어진 클라이언트가
+다른 클라이언트의 긴급 알림 전달을 지연시키지 않도록 합니다.
+
+메시지는 Frame으로 받아 연결이 고른 인코딩(JSON 텍스트/MessagePack 바이너리)으로
+보냅니다. 인코딩별 바이트는 프레임마다 한 번만 만들어져 모든 연결이 공유합니다.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from app.config import WS_SEND_QUEUE_SIZE, WS_SEND_TIMEOUT
+from app.frames import MSGPACK_PROTOCOL, Frame, select_subprotocol
+from app.metrics import WS_SEND_QUEUE_DEPTH
+
+log = logging.getLogger(__name__)
+
+# 대기열이 넘친 클라이언트를 끊을 때 사용하는 종료 코드 (1013: Try Again Later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class _Fanout:
+    """
+    브로드캐스트 한 번의 전달 추적 - 모든 연결에서 전송이 끝나거나(실패, 연결 종료 포함)
+    버려지면 callback을 한 번 호출합니다.
+    """
+
+    __slots__ = ("remaining", "callback")
+
+    def __init__(self, remaining: int, callback: Callable[[], None]):
+        self.remaining = remaining
+        self.callback = callback
+
+    def done(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.callback()
+
+
+class _Connection:
+    """WebSocket 하나와 그 송신 대기열/송신 태스크"""
+
+    __slots__ = ("websocket", "queue", "task", "binary")
+
+    def __init__(self, websocket: WebSocket, max_queue_size: int, binary: bool = False):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.task: Optional[asyncio.Task] = None
+        # MessagePack 바이너리 프레임을 받는 연결인지 여부
+        self.binary = binary
+
+    def send(self, frame: Frame) -> Awaitable[None]:
+        if self.binary:
+            return self.websocket.send_bytes(frame.binary())
+        return self.websocket.send_text(frame.text())
+
+
+# WebSocket 연결을 관리하기 위한 클래스
+class ConnectionManager:
+    def __init__(
+        self,
+        max_queue_size: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT,
+    ):
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.active_connections: Dict[WebSocket, _Connection] = {}
+        # 대기열 초과나 송신 실패로 끊은 연결 수
+        self.dropped_connections = 0
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        replay: Optional[Callable[[], Awaitable[List[Frame]]]] = None,
+    ):
+        """
+        연결을 등록하고 송신 태스크를 시작합니다.
+
+        클라이언트가 제시한 하위 프로토콜 중 지원하는 것을 골라 프레임 인코딩을 정합니다.
+
+        replay가 주어지면 연결을 먼저 등록해 새 메시지가 대기열에 쌓이게 한 뒤, replay()가
+        돌려준 놓친 메시지를 보내고 나서 송신 태스크를 시작합니다. 그래서 재전송과 실시간
+        메시지 사이에 빠지는 메시지나 순서 뒤바뀜이 없습니다. 재전송을 준비하는 동안 대기열에
+        쌓인 프레임 중 재전송한 가장 큰 순번 이하만 담은 프레임은 이미 보냈으므로 버립니다.
+        """
+        subprotocol = select_subprotocol(websocket.scope.get("subprotocols", ()))
+        await websocket.accept(subprotocol=subprotocol)
+        connection = _Connection(
+            websocket, self.max_queue_size, binary=subprotocol == MSGPACK_PROTOCOL
+        )
+        self.active_connections[websocket] = connection
+        if replay:
+            replayed = None
+            try:
+                for frame in await replay():
+                    await asyncio.wait_for(connection.send(frame), timeout=self.send_timeout)
+                    if frame.seq is not None:
+                        replayed = max(frame.seq, replayed or 0)
+            except Exception as e:
+                log.warning("놓친 메시지 재전송 실패로 연결 종료", extra={"error": str(e)})
+                self._drop(connection)
+                return
+            if replayed is not None and self.active_connections.get(websocket) is connection:
+                _skip_replayed(connection, replayed)
+        if self.active_connections.get(websocket) is connection:
+            connection.task = asyncio.create_task(self._sender(connection))
+
+    def disconnect(self, websocket: WebSocket):
+        """연결을 목록에서 제거합니다. 이미 제거된 연결이면 아무 일도 하지 않습니다."""
+        connection = self.active_connections.pop(websocket, None)
+        if connection is None:
+            return
+        if connection.task and connection.task is not _current_task():
+            connection.task.cancel()
+        # 보내지 못하고 남은 메시지도 전달 추적에서는 끝난 것으로 처리
+        while not connection.queue.empty():
+            _, fanout = connection.queue.get_nowait()
+            if fanout:
+                fanout.done()
+
+    async def broadcast(self, frame: Frame, on_sent: Optional[Callable[[], None]] = None):
+        """
+        모든 연결의 송신 대기열에 메시지를 넣습니다.
+
+        실제 전송은 연결별 송신 태스크가 동시에 수행하므로, 이 함수는 연결 수에
+        비례하는 대기열 삽입 비용만 들고 어떤 소켓의 전송도 기다리지 않습니다.
+        on_sent가 주어지면 모든 연결로의 전송이 끝났을 때 한 번 호출합니다.
+        """
+        await self.send([(frame, list(self.active_connections))], on_sent)
+
+    async def send(
+        self,
+        deliveries: Iterable[Tuple[Frame, Iterable[WebSocket]]],
+        on_sent: Optional[Callable[[], None]] = None,
+    ):
+        """
+        (프레임, 받을 WebSocket 목록) 묶음마다 해당 연결의 송신 대기열에 프레임을 넣습니다.
+
+        이미 끊어진 연결은 건너뜁니다. on_sent는 broadcast()와 같이 모든 묶음의 전송이
+        끝났을 때 한 번 호출됩니다.
+        """
+        targets = []
+        for frame, websockets in deliveries:
+            for websocket in websockets:
+                connection = self.active_connections.get(websocket)
+                if connection is not None:
+                    targets.append((connection, frame))
+
+        fanout = None
+        if on_sent:
+            if not targets:
+                on_sent()
+                return
+            fanout = _Fanout(len(targets), on_sent)
+        for connection, frame in targets:
+            WS_SEND_QUEUE_DEPTH.observe(connection.queue.qsize())
+            try:
+                connection.queue.put_nowait((frame, fanout))
+            except asyncio.QueueFull:
+                log.warning(
+                    "송신 대기열 초과로 느린 클라이언트 연결 종료",
+                    extra={"queued": connection.queue.qsize()},
+                )
+                if fanout:
+                    fanout.done()
+                self._drop(connection)
+
+    async def close(self):
+        """서버 종료 시 모든 송신 태스크를 정리합니다."""
+        for websocket in list(self.active_connections):
+            self.disconnect(websocket)
+
+    async def _sender(self, connection: _Connection):
+        try:
+            while True:
+                frame, fanout = await connection.queue.get()
+                try:
+                    await asyncio.wait_for(connection.send(frame), timeout=self.send_timeout)
+                finally:
+                    if fanout:
+                        fanout.done()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("WebSocket 전송 실패로 연결 종료", extra={"error": str(e)})
+            self._drop(connection)
+
+    def _drop(self, connection: _Connection):
+        if self.active_connections.get(connection.websocket) is not connection:
+            return
+        self.dropped_connections += 1
+        self.disconnect(connection.websocket)
+        asyncio.create_task(_close_quietly(connection.websocket))
+
+
+def _skip_replayed(connection: _Connection, replayed: int):
+    """재전송에 이미 담긴 순번의 프레임을 송신 대기열에서 뺍니다."""
+    queued = []
+    while not connection.queue.empty():
+        queued.append(connection.queue.get_nowait())
+    for frame, fanout in queued:
+        if frame.seq is not None and frame.seq <= replayed:
+            if fanout:
+                fanout.done()
+            continue
+        connection.queue.put_nowait((frame, fanout))
+
+
+async def _close_quietly(websocket: WebSocket):
+    try:
+        await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+    except Exception:
+        # 이미 끊어진 소켓이면 닫기도 실패할 수 있음
+        pass
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
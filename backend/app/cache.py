@@ -0,0 +1,140 @@
+"""
+미리 직렬화/압축해 둔 JSON 응답 캐시
+
+데이터 버전이 바뀔 때만 JSON을 다시 만들고 gzip(가능하면 brotli) 바이트를 메모리에
+보관합니다. 요청마다 남는 일은 ETag 비교와 바이트 전송뿐입니다.
+
+직렬화와 압축은 데이터가 클수록 오래 걸리므로, 데이터를 바꾼 쪽이 prepare()를 실행기
+스레드에서 호출해 미리 만들어 둡니다. preparing() 블록 안에서 데이터를 바꾸고 prepare()를
+호출하면 그동안 들어온 요청은 이전 응답을 받습니다.
+"""
+
+import gzip
+import hashlib
+import json
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli는 선택 의존성
+    brotli = None
+
+# 선호 순서대로 나열한 지원 인코딩
+_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def _encode_json(content: Any) -> bytes:
+    # Starlette JSONResponse와 동일한 직렬화 옵션
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _accepted_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    for encoding in _ENCODINGS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+class _Entry:
+    __slots__ = ("version", "etag", "bodies")
+
+    def __init__(self, version: Any, body: bytes):
+        self.version = version
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies: Dict[Optional[str], bytes] = {None: body}
+        self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli:
+            self.bodies["br"] = brotli.compress(body, quality=11)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # 인코딩마다 바이트가 다르므로 강한 ETag도 인코딩별로 구분
+        return f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+
+    def matches(self, if_none_match: str, encoding: Optional[str]) -> bool:
+        """If-None-Match에 이번 응답 인코딩의 ETag가 있는지 확인합니다."""
+        etag = self.etag_for(encoding)
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            # If-None-Match는 약한 비교(RFC 9110) - 프록시가 W/를 붙여도 같은 ETag로 봄
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == etag:
+                return True
+        return False
+
+
+class PrecompressedJSONCache:
+    """
+    build()가 돌려주는 JSON 데이터를 version()이 바뀔 때만 다시 직렬화하는 캐시
+    """
+
+    def __init__(self, build: Callable[[], Any], version: Callable[[], Any]):
+        self._build = build
+        self._version = version
+        self._entry: Optional[_Entry] = None
+        self._preparing = False
+
+    def _current(self) -> _Entry:
+        version = self._version()
+        entry = self._entry
+        if entry is None or entry.version != version:
+            if entry is not None and self._preparing:
+                # 다른 스레드에서 새 응답을 만드는 중 - 이벤트 루프를 막지 않도록 이전 응답 사용
+                return entry
+            entry = _Entry(version, _encode_json(self._build()))
+            self._entry = entry
+        return entry
+
+    @contextmanager
+    def preparing(self):
+        """이 블록 동안(데이터 교체부터 prepare()까지) 들어온 요청은 이전 응답을 받습니다."""
+        self._preparing = True
+        try:
+            yield
+        finally:
+            self._preparing = False
+
+    def prepare(self):
+        """현재 버전의 응답을 미리 만듭니다 (실행기 스레드에서 호출)."""
+        entry = self._entry
+        version = self._version()
+        if entry is None or entry.version != version:
+            self._entry = _Entry(version, _encode_json(self._build()))
+
+    def invalidate(self):
+        self._entry = None
+
+    def response(self, request: Request) -> Response:
+        entry = self._current()
+        encoding = _accepted_encoding(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": entry.etag_for(encoding),
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and entry.matches(if_none_match, encoding):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=entry.bodies[encoding],
+            media_type="application/json",
+            headers=headers,
+        )
+
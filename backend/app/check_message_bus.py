@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+워커 간 메시지 버스(UnixSocketBus) 점검
+
+임시 소켓 경로에 버스 인스턴스(워커 역할) 여러 개를 띄워 다음을 확인합니다.
+인스턴스마다 잠금 파일과 소켓을 따로 열므로 별도 프로세스의 워커와 같은 경로를 탑니다.
+
+1. 허브 + 팔로워 두 워커가 서로 발행한 메시지를 모두 같은 순서로 받는지
+2. 허브 워커를 닫으면 팔로워가 허브를 이어받고, 새 워커가 붙어 계속 주고받는지
+3. 메시지를 읽지 않는 워커는 송신 버퍼 한도를 넘으면 끊기고, 다른 워커는 계속 받는지
+4. 허브와 연결되지 않은 동안 보관하는 메시지가 한도를 넘지 않는지
+
+실패한 항목이 있으면 종료 코드 1을 돌려줍니다.
+
+실행: backend 디렉터리에서
+    python -m app.check_message_bus
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.pubsub import UnixSocketBus
+
+
+class Worker:
+    """받은 메시지를 기록하는 버스 인스턴스"""
+
+    def __init__(self, name: str, path: str, counter: itertools.count, **options):
+        self.name = name
+        self.bus = UnixSocketBus(path, **options)
+        self.received: List[Tuple[int, Any]] = []
+        self._counter = counter
+
+    def _sequence(self, channel: str, data: Any) -> Any:
+        # 허브에서만 호출됨 - 허브가 바뀌어도 번호가 이어지도록 카운터를 공유
+        return {"seq": next(self._counter), "data": data}
+
+    async def _deliver(self, channel: str, data: Any):
+        self.received.append((data["seq"], data["data"]))
+
+    async def start(self):
+        await self.bus.start(self._sequence, self._deliver)
+
+    def seqs(self) -> List[int]:
+        return [seq for seq, _ in self.received]
+
+
+async def wait_until(condition: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def exchange(workers: List[Worker], count: int, timeout: float) -> Optional[str]:
+    """워커마다 count개씩 발행하고 모두 받을 때까지 기다립니다. 문제가 있으면 설명을 반환"""
+    before = [len(worker.received) for worker in workers]
+    for i in range(count):
+        for worker in workers:
+            await worker.bus.publish("check", f"{worker.name}-{i}")
+    expected = count * len(workers)
+    done = await wait_until(
+        lambda: all(len(w.received) - b >= expected for w, b in zip(workers, before)), timeout
+    )
+    if not done:
+        got = {w.name: len(w.received) - b for w, b in zip(workers, before)}
+        return f"{expected}개 중 받은 수 {got}"
+    orders = [worker.seqs()[b:] for worker, b in zip(workers, before)]
+    if any(order != orders[0] for order in orders):
+        return "워커마다 받은 순서가 다름"
+    if orders[0] != sorted(orders[0]):
+        return "순번이 증가하는 순서가 아님"
+    return None
+
+
+async def check_exchange(path: str, counter, args) -> Optional[str]:
+    hub = Worker("a", path, counter)
+    follower = Worker("b", path, counter)
+    await hub.start()
+    await follower.start()
+    try:
+        if not hub.bus.is_hub or follower.bus.is_hub:
+            return "첫 워커가 허브가 되지 않음"
+        return await exchange([hub, follower], args.messages, args.timeout)
+    finally:
+        await follower.bus.close()
+        await hub.bus.close()
+
+
+async def check_takeover(path: str, counter, args) -> Optional[str]:
+    hub = Worker("a", path, counter)
+    follower = Worker("b", path, counter)
+    await hub.start()
+    await follower.start()
+    newcomer = None
+    try:
+        problem = await exchange([hub, follower], args.messages, args.timeout)
+        if problem:
+            return f"이어받기 전: {problem}"
+        await hub.bus.close()
+        if not await wait_until(lambda: follower.bus.is_hub, args.timeout):
+            return "허브를 닫은 뒤 팔로워가 허브를 이어받지 않음"
+        newcomer = Worker("c", path, counter)
+        await newcomer.start()
+        problem = await exchange([follower, newcomer], args.messages, args.timeout)
+        if problem:
+            return f"이어받은 뒤: {problem}"
+        return None
+    finally:
+        if newcomer:
+            await newcomer.bus.close()
+        await follower.bus.close()
+        await hub.bus.close()
+
+
+async def check_slow_follower(path: str, counter, args) -> Optional[str]:
+    limit = 256 * 1024
+    hub = Worker("a", path, counter, buffer_limit=limit)
+    follower = Worker("b", path, counter)
+    await hub.start()
+    await follower.start()
+    # 연결만 하고 읽지 않는 워커
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        await wait_until(lambda: len(hub.bus._clients) == 2, args.timeout)
+        payload = "x" * 1024
+        sent = 0
+        # 커널 소켓 버퍼가 찬 뒤 허브 쪽 버퍼가 한도를 넘을 때까지 발행
+        while not hub.bus.dropped_clients and sent < 100000:
+            await hub.bus.publish("check", payload)
+            sent += 1
+            # 정상 워커가 따라 읽을 틈을 줌
+            await asyncio.sleep(0)
+        if hub.bus.dropped_clients != 1 or len(hub.bus._clients) != 1:
+            return f"끊긴 워커 수 {hub.bus.dropped_clients}, 남은 워커 수 {len(hub.bus._clients)}"
+        if not await wait_until(lambda: len(follower.received) >= sent, args.timeout):
+            return f"정상 워커가 {sent}개 중 {len(follower.received)}개만 받음"
+        # 허브가 끊었으면 이미 받아 둔 데이터 뒤에 EOF(또는 연결 재설정)가 옴
+        try:
+            while await asyncio.wait_for(reader.read(1 << 20), args.timeout):
+                pass
+        except ConnectionError:
+            pass
+        except asyncio.TimeoutError:
+            return "끊긴 워커 연결이 닫히지 않음"
+        return None
+    finally:
+        writer.close()
+        await follower.bus.close()
+        await hub.bus.close()
+
+
+async def check_outbox(path: str, counter, args) -> Optional[str]:
+    # 시작하지 않은 버스는 허브와 연결되지 않은 상태
+    bus = UnixSocketBus(path, outbox_size=10)
+    for i in range(25):
+        await bus.publish("check", i)
+    if len(bus._outbox) != 10 or bus.dropped_messages != 15:
+        return f"보관 {len(bus._outbox)}개, 버림 {bus.dropped_messages}개 (기대: 10, 15)"
+    return None
+
+
+CHECKS = [
+    ("두 워커 메시지 교환", check_exchange),
+    ("허브 이어받기", check_takeover),
+    ("느린 워커 끊기", check_slow_follower),
+    ("보관 메시지 한도", check_outbox),
+]
+
+
+async def run_checks(args) -> List[Tuple[str, Optional[str]]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="busstop-bus-") as tmp:
+        counter = itertools.count(1)
+        for i, (name, check) in enumerate(CHECKS):
+            path = os.path.join(tmp, f"bus-{i}.sock")
+            try:
+                problem = await check(path, counter, args)
+            except Exception as e:
+                problem = f"{type(e).__name__}: {e}"
+            results.append((name, problem))
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="워커 간 메시지 버스(UnixSocketBus) 점검")
+    parser.add_argument("--messages", type=int, default=200, help="워커마다 발행할 메시지 수")
+    parser.add_argument("--timeout", type=float, default=5.0, help="각 단계를 기다리는 최대 시간(초)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_checks(args))
+    failed = False
+    for name, problem in results:
+        if problem:
+            failed = True
+            print(f"실패: {name} - {problem}")
+        else:
+            print(f"통과: {name}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
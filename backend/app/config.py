@@ -0,0 +1,74 @@
+"""
+백엔드 설정값 (환경 변수로 재정의 가능)
+"""
+
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+
+# WebSocket 연결별 송신 대기열 최대 길이 - 초과하면 느린 클라이언트로 보고 연결을 끊음
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+
+# 메시지 하나를 보내는 데 허용하는 최대 시간(초)
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5.0"))
+
+# 바이너리(MessagePack) 클라이언트에 스냅샷 프레임(재전송 묶음 등)을 압축해서 보내는 최소 크기(바이트)
+WS_DEFLATE_MIN_SIZE = int(os.getenv("WS_DEFLATE_MIN_SIZE", "1024"))
+
+# 같은 정류장의 반복 긴급 버튼 누름을 하나의 알림으로 합치는 시간 창(초), 0이면 병합 안 함
+EMERGENCY_COALESCE_WINDOW = float(os.getenv("EMERGENCY_COALESCE_WINDOW", "10"))
+
+# 긴급 이벤트 로그를 디스크에 모아 쓰는 주기(초)와 한 번에 쓰는 최대 개수
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "0.2"))
+EVENT_FLUSH_BATCH_SIZE = int(os.getenv("EVENT_FLUSH_BATCH_SIZE", "500"))
+
+# 재접속 재전송용으로 메모리에 유지하는 최근 이벤트 수와 한 번에 재전송하는 최대 개수
+EVENT_MEMORY_SIZE = int(os.getenv("EVENT_MEMORY_SIZE", "2000"))
+EVENT_REPLAY_LIMIT = int(os.getenv("EVENT_REPLAY_LIMIT", "500"))
+
+# 워커 간 메시지 버스 - "local"(단일 프로세스) 또는 "unix"(같은 호스트의 여러 워커)
+MESSAGE_BUS = os.getenv("MESSAGE_BUS", "local")
+MESSAGE_BUS_PATH = os.getenv("MESSAGE_BUS_PATH", "/tmp/busstop-message-bus.sock")
+# 허브가 워커 하나에 보내지 못하고 쌓아 둘 수 있는 최대 바이트 수 - 초과하면 그 워커의 연결을 끊음
+MESSAGE_BUS_BUFFER_LIMIT = int(os.getenv("MESSAGE_BUS_BUFFER_LIMIT", str(8 * 1024 * 1024)))
+# 허브와 연결되지 않은 동안 보관하는 최대 발행 메시지 수 - 초과하면 오래된 것부터 버림
+MESSAGE_BUS_OUTBOX_SIZE = int(os.getenv("MESSAGE_BUS_OUTBOX_SIZE", "10000"))
+
+# 정류장·클라이언트별 요청 빈도 제한 - 초당 토큰 수(0이면 제한 없음)와 한 번에 허용하는 최대 요청 수
+EMERGENCY_RATE_LIMIT = float(os.getenv("EMERGENCY_RATE_LIMIT", "1"))
+EMERGENCY_RATE_BURST = float(os.getenv("EMERGENCY_RATE_BURST", "10"))
+MEETING_RATE_LIMIT = float(os.getenv("MEETING_RATE_LIMIT", "0.5"))
+MEETING_RATE_BURST = float(os.getenv("MEETING_RATE_BURST", "5"))
+
+# 키오스크가 미팅 상태 변경을 기다리는 롱 폴링의 최대 대기 시간(초)
+MEETING_WAIT_MAX = float(os.getenv("MEETING_WAIT_MAX", "60"))
+
+# 장치 하트비트가 이 시간(초) 동안 없으면 오프라인 처리, 만료 확인 간격(초)
+PRESENCE_TIMEOUT = float(os.getenv("PRESENCE_TIMEOUT", "90"))
+PRESENCE_TICK = float(os.getenv("PRESENCE_TICK", "1"))
+
+# 정류장 데이터 스냅샷 파일 (TAGO 동기화 결과)과 변경 여부 확인 주기(초)
+BUS_STOPS_DATA_FILE = os.getenv(
+    "BUS_STOPS_DATA_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bus_stops.json"),
+)
+# 여러 도시를 수집했을 때 도시별 분할 데이터 파일을 두는 디렉터리
+BUS_STOPS_SHARD_DIR = os.getenv(
+    "BUS_STOPS_SHARD_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "shards"),
+)
+BUS_STOPS_RELOAD_INTERVAL = float(os.getenv("BUS_STOPS_RELOAD_INTERVAL", "5"))
+
+# 로그 레벨 (기본, 모듈별 "app.pubsub=DEBUG,..."), 로거별 기록 비율 ("app.main.devices=0.01,...")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "app.main.devices=0.01")
+# 쓰기 스레드로 넘기기 전에 쌓아 두는 최대 로그 레코드 수 - 넘치면 버림
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# 게시판(공지사항) API 주소 - 비어 있으면 내장 대역(app.notices.LocalNoticeSource) 사용
+NOTICES_SOURCE_URL = os.getenv("NOTICES_SOURCE_URL", "")
+# 게시판 요청 제한 시간(초), 주기 동기화 간격(초, 0이면 요청할 때만), 보관하는 작업 기록 수
+NOTICES_FETCH_TIMEOUT = float(os.getenv("NOTICES_FETCH_TIMEOUT", "30"))
+NOTICES_SYNC_INTERVAL = float(os.getenv("NOTICES_SYNC_INTERVAL", "0"))
+NOTICES_JOB_HISTORY = int(os.getenv("NOTICES_JOB_HISTORY", "100"))
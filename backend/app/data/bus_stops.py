@@ -2,6 +2,10 @@
 고흥시 버스정류장 데이터 (TAGO API로 수집됨)
 """
 
+from app.config import BUS_STOPS_DATA_FILE, BUS_STOPS_SHARD_DIR
+from app.data.clusters import INDEXED_MIN_LEVEL, ClusterIndex, cell_size, clusters_of
+from app.data.loader import ShardedDataWatcher
+
 # 고흥시 버스정류장 데이터 - 주요 정류장만 선별
 bus_stops = [
     {"id": 1, "name": "염포종점", "lat": 34.419896, "lng": 127.491989},
@@ -60,14 +64,73 @@ bus_stops = [
 ]
 
 
+# TAGO 동기화 데이터 파일이 있으면 그것을, 없으면 위 목록을 사용 (도시별 분할 파일도 함께)
+# ID/공간 인덱스는 로드 시 한 번만 생성하고, 데이터가 바뀌면 레지스트리를 통째로 교체
+data_watcher = ShardedDataWatcher(BUS_STOPS_DATA_FILE, BUS_STOPS_SHARD_DIR)
+registry = data_watcher.load_initial(bus_stops)
+
+# 지도 확대 레벨별 클러스터 (데이터 버전이 바뀌면 다시 생성)
+cluster_index = None
+
+
+def reload_bus_stops():
+    """데이터 파일이 바뀌었으면 새 데이터로 교체하고 True를 반환합니다."""
+    global registry
+    new_registry = data_watcher.check(registry)
+    if new_registry is None:
+        return False
+    registry = new_registry
+    return True
+
+
 def get_all_bus_stops():
     """모든 버스 정류장 데이터를 반환합니다."""
-    return bus_stops
+    return registry.all()
+
+
+def get_bus_stops_version():
+    """현재 정류장 데이터의 버전을 반환합니다."""
+    return registry.version
 
 
 def get_bus_stop_by_id(stop_id):
     """ID로 버스 정류장을 찾습니다."""
-    for stop in bus_stops:
-        if stop["id"] == stop_id:
-            return stop
-    return None
+    return registry.get(stop_id)
+
+
+def get_nearest_bus_stops(lat, lng, limit=5):
+    """좌표에서 가까운 순서로 정류장과 거리(m)를 반환합니다."""
+    return registry.nearest(lat, lng, limit)
+
+
+def get_bus_stops_in_bounds(min_lat, min_lng, max_lat, max_lng):
+    """경계 상자 안에 있는 정류장을 반환합니다."""
+    return registry.within(min_lat, min_lng, max_lat, max_lng)
+
+
+def get_bus_stop_clusters(level, bounds=None):
+    """
+    확대 레벨의 정류장 클러스터를 반환합니다. bounds가 있으면 그 범위에 걸친 것만 반환합니다.
+
+    INDEXED_MIN_LEVEL 아래 레벨은 미리 만들어 두지 않으므로 bounds가 필요합니다.
+    """
+    if level >= INDEXED_MIN_LEVEL:
+        return build_bus_stop_clusters().clusters(level, bounds)
+    if bounds is None:
+        raise ValueError(f"레벨 {INDEXED_MIN_LEVEL} 미만은 경계 상자가 필요합니다.")
+    # 가장 확대한 레벨은 화면 안 정류장을 바로 묶음 (범위에 걸친 칸 전체가 포함되도록 한 칸 넓힘)
+    size = cell_size(level)
+    min_lat, min_lng, max_lat, max_lng = bounds
+    return clusters_of(
+        registry.within(min_lat - size, min_lng - size, max_lat + size, max_lng + size), level
+    )
+
+
+def build_bus_stop_clusters():
+    """현재 데이터 버전의 클러스터 색인을 반환합니다. 버전이 바뀌었으면 새로 만듭니다."""
+    global cluster_index
+    current = registry
+    index = cluster_index
+    if index is None or index.version != current.version:
+        index = cluster_index = ClusterIndex(current.all(), current.version)
+    return index
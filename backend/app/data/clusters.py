@@ -0,0 +1,146 @@
+"""
+지도 확대 레벨별 정류장 클러스터
+
+카카오맵 레벨(1: 가장 확대 ~ 14: 가장 축소)마다 격자 칸 크기를 두 배씩 키운 계층
+격자를 만들고, 칸마다 정류장 수와 좌표 합계(중심점), 범위를 모아 둡니다. 가장 촘촘한
+레벨만 정류장 좌표로 만들고, 윗 레벨은 아래 레벨 칸 4개를 합쳐 만드므로 전체 생성
+비용은 정류장 수에 비례합니다. 칸 경계가 레벨 사이에 정확히 겹치므로 한 레벨의
+클러스터는 항상 아래 레벨 클러스터들의 합입니다.
+
+색인은 데이터 버전마다 한 번 만들고, 요청은 화면 범위에 걸친 칸만 읽습니다.
+
+가장 확대한 몇 레벨은 칸 하나에 정류장이 거의 하나뿐이라 미리 만들어도 정류장 목록과
+다를 바 없으므로, INDEXED_MIN_LEVEL 아래 레벨은 화면 안 정류장을 요청 때 묶습니다
+(화면이 좁아 정류장 수가 적음).
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MIN_LEVEL = 1
+MAX_LEVEL = 14
+
+# 레벨 1의 칸 크기(도) - 레벨이 하나 오를 때마다 두 배 (레벨 8에서 약 4km)
+BASE_CELL_SIZE = 0.0003
+
+# 미리 만들어 두는 가장 낮은 레벨 (칸 크기 약 250m)
+INDEXED_MIN_LEVEL = 4
+
+Cell = Tuple[int, int]
+
+
+def cell_size(level: int) -> float:
+    return BASE_CELL_SIZE * (1 << (level - MIN_LEVEL))
+
+
+# 칸 하나의 집계값: [정류장 수, 위도 합, 경도 합, 최소 위도, 최소 경도, 최대 위도, 최대 경도,
+# 정류장이 하나뿐이면 그 정류장 (id, 이름)]
+# 칸 수가 정류장 수만큼 많을 수 있어 객체 대신 목록으로 보관
+_COUNT, _LAT_SUM, _LNG_SUM, _MIN_LAT, _MIN_LNG, _MAX_LAT, _MAX_LNG, _STOP = range(8)
+
+
+def _cluster_dict(cluster: list) -> Dict[str, Any]:
+    count = cluster[_COUNT]
+    if count == 1:
+        stop_id, name = cluster[_STOP]
+        return {
+            "count": 1,
+            "lat": cluster[_LAT_SUM],
+            "lng": cluster[_LNG_SUM],
+            "id": stop_id,
+            "name": name,
+        }
+    return {
+        "count": count,
+        "lat": round(cluster[_LAT_SUM] / count, 6),
+        "lng": round(cluster[_LNG_SUM] / count, 6),
+        "bounds": [cluster[_MIN_LAT], cluster[_MIN_LNG], cluster[_MAX_LAT], cluster[_MAX_LNG]],
+    }
+
+
+def _merge(cluster: list, other: list):
+    cluster[_COUNT] += other[_COUNT]
+    cluster[_LAT_SUM] += other[_LAT_SUM]
+    cluster[_LNG_SUM] += other[_LNG_SUM]
+    if other[_MIN_LAT] < cluster[_MIN_LAT]:
+        cluster[_MIN_LAT] = other[_MIN_LAT]
+    if other[_MIN_LNG] < cluster[_MIN_LNG]:
+        cluster[_MIN_LNG] = other[_MIN_LNG]
+    if other[_MAX_LAT] > cluster[_MAX_LAT]:
+        cluster[_MAX_LAT] = other[_MAX_LAT]
+    if other[_MAX_LNG] > cluster[_MAX_LNG]:
+        cluster[_MAX_LNG] = other[_MAX_LNG]
+    cluster[_STOP] = None
+
+
+def group_stops(stops: Iterable[Dict[str, Any]], level: int) -> Dict[Cell, list]:
+    """정류장 목록을 레벨의 격자 칸별 클러스터로 묶습니다."""
+    cells: Dict[Cell, list] = {}
+    size = cell_size(level)
+    for stop in stops:
+        lat, lng = stop["lat"], stop["lng"]
+        cell = (math.floor(lat / size), math.floor(lng / size))
+        cluster = cells.get(cell)
+        if cluster is None:
+            cells[cell] = [1, lat, lng, lat, lng, lat, lng, (stop["id"], stop["name"])]
+        else:
+            _merge(cluster, [1, lat, lng, lat, lng, lat, lng, None])
+    return cells
+
+
+class ClusterIndex:
+    """레벨별 {칸: 클러스터} 계층 격자 (INDEXED_MIN_LEVEL 이상)"""
+
+    def __init__(self, stops: Iterable[Dict[str, Any]], version: Any = None):
+        self.version = version
+        finest = group_stops(stops, INDEXED_MIN_LEVEL)
+        self._levels: Dict[int, Dict[Cell, list]] = {INDEXED_MIN_LEVEL: finest}
+        below = finest
+        for level in range(INDEXED_MIN_LEVEL + 1, MAX_LEVEL + 1):
+            cells: Dict[Cell, list] = {}
+            for (row, col), child in below.items():
+                # 칸 크기가 정확히 두 배이므로 윗 레벨 칸 번호는 2로 나눈 몫
+                parent_cell = (row >> 1, col >> 1)
+                parent = cells.get(parent_cell)
+                if parent is None:
+                    cells[parent_cell] = child.copy()
+                else:
+                    _merge(parent, child)
+            self._levels[level] = cells
+            below = cells
+
+    def clusters(
+        self,
+        level: int,
+        bounds: Optional[Tuple[float, float, float, float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        레벨의 클러스터 목록. bounds(최소 위도, 최소 경도, 최대 위도, 최대 경도)에 걸친 칸만
+        반환합니다. level은 INDEXED_MIN_LEVEL 이상이어야 합니다.
+        """
+        cells = self._levels[level]
+        if bounds is None:
+            return [_cluster_dict(cluster) for cluster in cells.values()]
+
+        size = cell_size(level)
+        min_row, min_col = math.floor(bounds[0] / size), math.floor(bounds[1] / size)
+        max_row, max_col = math.floor(bounds[2] / size), math.floor(bounds[3] / size)
+        span = (max_row - min_row + 1) * (max_col - min_col + 1)
+        if span <= len(cells):
+            # 화면이 덮는 칸 수가 적으면 칸 번호로 직접 조회
+            selected = (
+                cells.get((row, col))
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+            )
+            return [_cluster_dict(cluster) for cluster in selected if cluster is not None]
+        return [
+            _cluster_dict(cluster)
+            for (row, col), cluster in cells.items()
+            if min_row <= row <= max_row and min_col <= col <= max_col
+        ]
+
+
+def clusters_of(stops: Iterable[Dict[str, Any]], level: int) -> List[Dict[str, Any]]:
+    """색인 없이 정류장 목록을 바로 묶은 클러스터 목록 (INDEXED_MIN_LEVEL 아래 레벨용)"""
+    return [_cluster_dict(cluster) for cluster in group_stops(stops, level).values()]
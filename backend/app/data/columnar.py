@@ -0,0 +1,279 @@
+"""
+대용량(전국 단위) 정류장 데이터를 위한 열(column) 기반 저장소
+
+정류장마다 딕셔너리를 두는 대신 ID/위도/경도를 타입 배열로, 문자열(이름, 정류소 번호,
+TAGO ID)은 중복을 없앤 문자열 표(오프셋 + UTF-8 바이트)와 행별 표 번호로 저장합니다.
+파일은 mmap으로 열어 그대로 사용하므로 워커 시작이 빠르고, 같은 파일을 여는 워커들은
+운영체제 페이지 캐시를 공유합니다.
+
+파일 구조 (리틀 엔디언, 각 구역은 8바이트 정렬)
+  헤더 | ids(q) | lat(d) | lng(d) | cell_starts(q) | cell_keys(Q) | id_index(i) | 문자열 열마다 [표 크기(Q) | 행별 표 번호(I) | 표 오프셋(Q) | 표 바이트]
+
+행은 격자 칸 순서로 정렬되어 있어 한 칸의 정류장은 연속된 행 범위를 차지하고, 칸은
+정렬된 칸 키 배열에서 이진 탐색으로 찾습니다. 그래서 파일을 열 때 정류장 수나 칸 수에
+비례하는 작업이 없습니다.
+"""
+
+import math
+import mmap
+from bisect import bisect_left
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.data.registry import DEFAULT_CELL_SIZE, BusStopRegistry
+
+MAGIC = b"BSTC"
+FORMAT_VERSION = 1
+STRING_FIELDS = ("name", "address", "tago_id")
+
+# magic, 형식 버전, 데이터 버전, 다음 ID, 정류장 수, ID 색인 크기, 격자 칸 수, 칸 크기,
+# 격자 범위(최소 행, 최소 열, 최대 행, 최대 열)
+_HEADER = struct.Struct("<4sIQQQQQdiiii")
+
+_KEY_OFFSET = 1 << 31
+
+
+def _cell_key(row: int, col: int) -> int:
+    """(행, 열)을 정렬 순서가 같은 부호 없는 64비트 정수 하나로 묶음"""
+    return ((row + _KEY_OFFSET) << 32) | (col + _KEY_OFFSET)
+
+
+class _CellIndex:
+    """정렬된 칸 키 배열 위에서 dict.get처럼 동작하는 칸 -> 행 범위 색인"""
+
+    __slots__ = ("_keys", "_starts")
+
+    def __init__(self, keys: memoryview, starts: memoryview):
+        self._keys = keys
+        self._starts = starts
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self):
+        # dict처럼 칸 (행, 열)을 순서대로
+        for key in self._keys:
+            yield ((key >> 32) - _KEY_OFFSET, (key & 0xFFFFFFFF) - _KEY_OFFSET)
+
+    def get(self, cell: Tuple[int, int], default=()):
+        key = _cell_key(*cell)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return range(self._starts[i], self._starts[i + 1])
+        return default
+
+
+def _pad(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def write_columnar(
+    path: str,
+    stops: List[Dict[str, Any]],
+    version: int,
+    next_id: int,
+    cell_size: float = DEFAULT_CELL_SIZE,
+):
+    """정류장 목록을 열 기반 파일로 씁니다. 임시 파일에 쓴 뒤 원자적으로 교체합니다."""
+    if sys.byteorder != "little":
+        raise RuntimeError("열 기반 정류장 파일은 리틀 엔디언 환경에서만 지원합니다.")
+
+    def cell_of(stop):
+        return (math.floor(stop["lat"] / cell_size), math.floor(stop["lng"] / cell_size))
+
+    rows = sorted(stops, key=lambda stop: (cell_of(stop), stop["id"]))
+
+    ids = array("q", (stop["id"] for stop in rows))
+    lats = array("d", (stop["lat"] for stop in rows))
+    lngs = array("d", (stop["lng"] for stop in rows))
+
+    cell_starts = array("q")
+    cell_keys = array("Q")
+    cells = []
+    for i, stop in enumerate(rows):
+        cell = cell_of(stop)
+        if not cells or cell != cells[-1]:
+            cell_starts.append(i)
+            cell_keys.append(_cell_key(*cell))
+            cells.append(cell)
+    cell_starts.append(len(rows))
+    if cells:
+        extent = (
+            min(cell[0] for cell in cells),
+            min(cell[1] for cell in cells),
+            max(cell[0] for cell in cells),
+            max(cell[1] for cell in cells),
+        )
+    else:
+        extent = (0, 0, -1, -1)
+
+    index_size = max(ids, default=-1) + 1
+    id_index = array("i", [-1]) * index_size
+    for i, stop_id in enumerate(ids):
+        id_index[stop_id] = i
+
+    sections = [ids, lats, lngs, cell_starts, cell_keys, id_index]
+    for field in STRING_FIELDS:
+        refs, offsets, blob = _intern_column(rows, field)
+        sections.extend([array("Q", [len(offsets) - 1]), refs, offsets, blob])
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, version, next_id, len(rows), index_size,
+        len(cell_keys), cell_size, *extent,
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".bin", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for section in [header] + sections:
+                data = section.tobytes() if isinstance(section, array) else section
+                f.write(data)
+                f.write(b"\0" * (_pad(len(data)) - len(data)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _intern_column(rows, field):
+    """같은 문자열은 한 번만 저장하는 문자열 표와 행별 표 번호"""
+    table: Dict[str, int] = {}
+    refs = array("I")
+    for stop in rows:
+        value = stop.get(field) or ""
+        refs.append(table.setdefault(value, len(table)))
+
+    offsets = array("Q", [0])
+    chunks = []
+    for value in table:
+        encoded = value.encode("utf-8")
+        chunks.append(encoded)
+        offsets.append(offsets[-1] + len(encoded))
+    return refs, offsets, b"".join(chunks)
+
+
+def _read_header(path: str) -> Optional[tuple]:
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < _HEADER.size or header[:4] != MAGIC:
+        return None
+    return _HEADER.unpack(header)
+
+
+def read_columnar_version(path: str) -> Optional[int]:
+    """파일 헤더의 데이터 버전. 파일이 없으면 None"""
+    header = _read_header(path)
+    return header[2] if header else None
+
+
+def read_columnar_next_id(path: str) -> Optional[int]:
+    """파일 헤더의 다음 ID. 파일이 없으면 None"""
+    header = _read_header(path)
+    return header[3] if header else None
+
+
+class ColumnarBusStopRegistry(BusStopRegistry):
+    """
+    mmap으로 연 열 기반 파일 위의 정류장 레지스트리
+
+    격자 칸 항목은 행 번호이며, 정류장 딕셔너리는 조회할 때만 만들어집니다.
+    """
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise RuntimeError("열 기반 정류장 파일은 리틀 엔디언 환경에서만 지원합니다.")
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        (magic, format_version, version, next_id, count, index_size, cell_count,
+         cell_size, *extent) = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 정류장 데이터 파일입니다: {path}")
+
+        self.version = version
+        self.next_id = next_id
+        self.cell_size = cell_size
+        self._count = count
+        offset = _pad(_HEADER.size)
+
+        def take(fmt, length, itemsize):
+            nonlocal offset
+            section = view[offset:offset + length * itemsize].cast(fmt)
+            offset += _pad(length * itemsize)
+            return section
+
+        self._ids = take("q", count, 8)
+        self._lats = take("d", count, 8)
+        self._lngs = take("d", count, 8)
+        cell_starts = take("q", cell_count + 1, 8)
+        cell_keys = take("Q", cell_count, 8)
+        self._id_index = take("i", index_size, 4)
+
+        self._strings: Dict[str, Tuple[memoryview, memoryview, memoryview]] = {}
+        for field in STRING_FIELDS:
+            table_size = take("Q", 1, 8)[0]
+            refs = take("I", count, 4)
+            offsets = take("Q", table_size + 1, 8)
+            blob_size = offsets[table_size]
+            blob = view[offset:offset + blob_size]
+            offset += _pad(blob_size)
+            self._strings[field] = (refs, offsets, blob)
+
+        # 칸 -> 연속된 행 범위
+        self._grid = _CellIndex(cell_keys, cell_starts)
+        self._extent = tuple(extent) if cell_count else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def all(self) -> List[Dict[str, Any]]:
+        """ID 순서의 전체 정류장 목록. 매번 새로 만들므로 캐시해서 사용해야 합니다."""
+        return [self._stop(row) for row in self._id_index if row >= 0]
+
+    def get(self, stop_id: int) -> Optional[Dict[str, Any]]:
+        if 0 <= stop_id < len(self._id_index):
+            row = self._id_index[stop_id]
+            if row >= 0:
+                return self._stop(row)
+        return None
+
+    def ids(self):
+        return self._ids
+
+    def apply_changes(self, added, changed, removed, version):
+        # 파일은 읽기 전용이므로 딕셔너리 기반 레지스트리로 옮겨 변경분을 적용
+        return BusStopRegistry(self.all(), self.version, self.cell_size).apply_changes(
+            added, changed, removed, version
+        )
+
+    def _position(self, row: int) -> Tuple[float, float]:
+        return self._lats[row], self._lngs[row]
+
+    def _stop_id(self, row: int) -> int:
+        return self._ids[row]
+
+    def _string(self, field: str, row: int) -> str:
+        refs, offsets, blob = self._strings[field]
+        ref = refs[row]
+        return str(blob[offsets[ref]:offsets[ref + 1]], "utf-8")
+
+    def _stop(self, row: int) -> Dict[str, Any]:
+        return {
+            "id": self._ids[row],
+            "name": self._string("name", row),
+            "lat": self._lats[row],
+            "lng": self._lngs[row],
+            "address": self._string("address", row),
+            "tago_id": self._string("tago_id", row),
+        }
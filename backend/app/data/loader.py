@@ -0,0 +1,295 @@
+"""
+정류장 데이터 파일 읽기/쓰기와 실행 중 교체(hot-reload)
+
+TAGO 동기화는 다음 파일을 씁니다.
+- 스냅샷(bus_stops.json): 전체 정류장 목록과 데이터 버전
+- 열 기반 스냅샷(bus_stops.bin): 정류장이 많을 때만 쓰는 mmap용 파일 (columnar.py)
+- 변경분(bus_stops.changes.json): 직전 버전(base_version) 대비 추가/변경/삭제된 정류장
+
+실행 중인 API는 변경분 파일을 감시합니다. 같은 버전의 열 기반 파일이 있으면 그것을
+mmap으로 열고, 없으면 자기 버전이 base_version과 같을 때 변경분만 적용하며, 버전이
+어긋났으면 스냅샷 전체를 다시 읽습니다. 모든 파일은 임시 파일에 쓴 뒤 os.replace로
+교체하고 변경분 파일을 마지막에 쓰므로, 읽는 쪽은 항상 완성된 파일만 봅니다.
+
+여러 도시를 수집하면 도시마다 같은 형식의 분할(shard) 파일 묶음
+(shards/bus_stops.<도시 코드>.json 등)을 쓰고, API는 기본 데이터 파일과 모든 분할을
+함께 읽어 하나의 레지스트리로 조회합니다. 정류장 ID는 모든 파일에 걸쳐 겹치지 않습니다.
+"""
+
+import glob
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.data.columnar import (
+    ColumnarBusStopRegistry,
+    read_columnar_next_id,
+    read_columnar_version,
+    write_columnar,
+)
+from app.data.registry import BusStopRegistry, ShardedBusStopRegistry
+
+# 데이터 파일이 없을 때 내장 정류장 목록에 붙이는 버전
+BUILTIN_VERSION = 1
+
+# 정류장이 이 수 이상이면 열 기반 파일도 기록
+COLUMNAR_MIN_STOPS = 5000
+
+# 기본 데이터 파일을 가리키는 분할 이름
+MAIN_SHARD = ""
+
+
+def changes_path(path: str) -> str:
+    base, ext = os.path.splitext(path)
+    return f"{base}.changes{ext}"
+
+
+def columnar_path(path: str) -> str:
+    return f"{os.path.splitext(path)[0]}.bin"
+
+
+def sync_stats_path(path: str) -> str:
+    base, ext = os.path.splitext(path)
+    return f"{base}.sync{ext}"
+
+
+def shard_path(directory: str, city_code: str) -> str:
+    return os.path.join(directory, f"bus_stops.{city_code}.json")
+
+
+def find_shards(directory: str) -> Dict[str, str]:
+    """분할 디렉터리의 {도시 코드: 스냅샷 경로}"""
+    shards = {}
+    for path in glob.glob(os.path.join(glob.escape(directory), "bus_stops.*.json")):
+        name = os.path.basename(path)[len("bus_stops."):-len(".json")]
+        if name.endswith(".changes") or "." in name:
+            continue
+        shards[name] = path
+    return dict(sorted(shards.items()))
+
+
+def read_json(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_atomic(path: str, data: Dict[str, Any]):
+    """같은 디렉터리의 임시 파일에 쓴 뒤 원자적으로 교체합니다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_sync_stats(path: str, stats: Dict[str, Any]):
+    """TAGO 동기화 실행 결과(단계별 소요 시간 등)를 기록합니다. API의 /metrics에 노출됩니다."""
+    write_json_atomic(sync_stats_path(path), stats)
+
+
+def read_sync_stats(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        return read_json(sync_stats_path(path))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_dataset(
+    path: str,
+    stops: List[Dict[str, Any]],
+    version: int,
+    base_version: int,
+    next_id: int,
+    changes: Dict[str, Any],
+    columnar: Optional[bool] = None,
+):
+    """
+    스냅샷(필요하면 열 기반 파일 포함)을 먼저 쓰고 변경분 파일을 마지막에 씁니다.
+
+    columnar가 None이면 정류장 수가 COLUMNAR_MIN_STOPS 이상일 때만 열 기반 파일을 씁니다.
+    """
+    if columnar is None:
+        columnar = len(stops) >= COLUMNAR_MIN_STOPS
+    if columnar:
+        write_columnar(columnar_path(path), stops, version, next_id)
+    elif os.path.exists(columnar_path(path)):
+        # 이전 버전의 열 기반 파일이 남아 새 데이터를 가리지 않도록 삭제
+        os.unlink(columnar_path(path))
+    write_json_atomic(path, {"version": version, "next_id": next_id, "stops": stops})
+    write_json_atomic(
+        changes_path(path),
+        {"version": version, "base_version": base_version, **changes},
+    )
+
+
+def load_dataset(path: str, fallback_stops: List[Dict[str, Any]]) -> Tuple[int, int, List[Dict[str, Any]]]:
+    """(버전, 다음 ID, 정류장 목록)을 반환합니다. 스냅샷이 없으면 내장 목록을 사용합니다."""
+    if os.path.exists(path):
+        data = read_json(path)
+        return data["version"], data["next_id"], data["stops"]
+    next_id = max((stop["id"] for stop in fallback_stops), default=0) + 1
+    return BUILTIN_VERSION, next_id, list(fallback_stops)
+
+
+def dataset_next_id(path: str, fallback_stops: Iterable[Dict[str, Any]] = ()) -> int:
+    """
+    데이터 파일의 다음 ID. 열 기반 파일이 있으면 헤더만 읽습니다.
+
+    파일이 없으면 load_dataset()과 같이 내장 목록(fallback_stops) 다음 ID입니다.
+    """
+    next_id = read_columnar_next_id(columnar_path(path))
+    if next_id is not None:
+        return next_id
+    if os.path.exists(path):
+        return read_json(path)["next_id"]
+    return max((stop["id"] for stop in fallback_stops), default=0) + 1
+
+
+def shared_next_id(
+    path: str, shard_dir: str, fallback_stops: Iterable[Dict[str, Any]] = ()
+) -> int:
+    """
+    기본 데이터 파일과 모든 분할에서 아직 쓰이지 않은 가장 작은 다음 ID
+
+    기본 데이터 파일이 아직 없으면 그 자리를 대신하는 내장 목록(fallback_stops)의 ID도 피합니다.
+    """
+    next_ids = [dataset_next_id(path, fallback_stops)]
+    next_ids.extend(dataset_next_id(shard) for shard in find_shards(shard_dir).values())
+    return max(next_ids)
+
+
+class BusStopDataWatcher:
+    """변경분 파일을 확인해 새 레지스트리를 만들어 주는 감시자"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._seen: Optional[Tuple[int, int]] = None
+
+    def load_initial(self, fallback_stops: List[Dict[str, Any]]) -> BusStopRegistry:
+        # 시작 시점의 변경분은 이미 스냅샷에 반영되어 있음
+        self._seen = self._signature()
+        registry = self._open_columnar(self._changes_version())
+        if registry is not None:
+            return registry
+        version, _, stops = load_dataset(self.path, fallback_stops)
+        return BusStopRegistry(stops, version=version)
+
+    def check(self, current: BusStopRegistry) -> Optional[BusStopRegistry]:
+        """
+        데이터가 바뀌었으면 새 레지스트리를, 아니면 None을 반환합니다.
+        """
+        signature = self._signature()
+        if signature is None or signature == self._seen:
+            return None
+
+        changes = read_json(changes_path(self.path))
+        if changes["version"] <= current.version:
+            self._seen = signature
+            return None
+
+        registry = self._open_columnar(changes["version"])
+        if registry is not None:
+            self._seen = signature
+            return registry
+
+        if changes["base_version"] == current.version:
+            self._seen = signature
+            return current.apply_changes(
+                changes["added"], changes["changed"], changes["removed"], changes["version"]
+            )
+
+        # 중간 버전을 놓쳤으면 스냅샷 전체를 다시 읽음
+        snapshot = read_json(self.path)
+        if snapshot["version"] < changes["version"]:
+            # 스냅샷이 아직 기록되기 전 - 다음 확인 때 다시 시도
+            return None
+        self._seen = signature
+        return BusStopRegistry(snapshot["stops"], version=snapshot["version"])
+
+    def _open_columnar(self, version: Optional[int]) -> Optional[BusStopRegistry]:
+        """변경분과 같은 버전(변경분이 없으면 아무 버전)의 열 기반 파일이 있으면 엽니다."""
+        path = columnar_path(self.path)
+        file_version = read_columnar_version(path)
+        if file_version is None or (version is not None and file_version != version):
+            return None
+        return ColumnarBusStopRegistry(path)
+
+    def _changes_version(self) -> Optional[int]:
+        try:
+            return read_json(changes_path(self.path))["version"]
+        except FileNotFoundError:
+            return None
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(changes_path(self.path))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+class ShardedDataWatcher:
+    """
+    기본 데이터 파일과 도시별 분할 파일을 함께 감시하는 감시자
+
+    분할이 없으면 기본 데이터 파일의 레지스트리를 그대로 돌려주므로 단일 도시 배포의
+    동작은 달라지지 않습니다. 새로 생긴 분할 파일도 다음 확인 때 읽어 들입니다.
+    """
+
+    def __init__(self, path: str, shard_dir: str):
+        self.path = path
+        self.shard_dir = shard_dir
+        self._watchers: Dict[str, BusStopDataWatcher] = {}
+        self._registries: Dict[str, BusStopRegistry] = {}
+
+    def load_initial(self, fallback_stops: List[Dict[str, Any]]):
+        watcher = BusStopDataWatcher(self.path)
+        self._watchers[MAIN_SHARD] = watcher
+        self._registries[MAIN_SHARD] = watcher.load_initial(fallback_stops)
+        self._add_new_shards()
+        return self._combined()
+
+    def check(self, current=None):
+        """
+        어느 파일이든 바뀌었으면 새 레지스트리를, 아니면 None을 반환합니다.
+        """
+        registries = dict(self._registries)
+        changed = self._add_new_shards(registries)
+        for name, watcher in self._watchers.items():
+            registry = watcher.check(registries[name])
+            if registry is not None:
+                registries[name] = registry
+                changed = True
+        if not changed:
+            return None
+        # 합칠 수 없는 데이터(분할 사이의 ID 중복)면 예외가 나고 이전 데이터를 계속 사용
+        combined = self._combined(registries)
+        self._registries = registries
+        return combined
+
+    def _add_new_shards(self, registries: Optional[Dict[str, BusStopRegistry]] = None) -> bool:
+        if registries is None:
+            registries = self._registries
+        added = False
+        for name, path in find_shards(self.shard_dir).items():
+            if name in self._watchers:
+                continue
+            watcher = BusStopDataWatcher(path)
+            registries[name] = watcher.load_initial([])
+            self._watchers[name] = watcher
+            added = True
+        return added
+
+    def _combined(self, registries: Optional[Dict[str, BusStopRegistry]] = None):
+        if registries is None:
+            registries = self._registries
+        if len(registries) == 1:
+            return registries[MAIN_SHARD]
+        return ShardedBusStopRegistry(registries)
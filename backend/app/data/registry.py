@@ -0,0 +1,346 @@
+"""
+버스정류장 레지스트리 - ID 해시 인덱스와 격자(grid) 공간 인덱스
+"""
+
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 격자 한 칸의 크기(도). 0.01도는 위도 기준 약 1.1km
+DEFAULT_CELL_SIZE = 0.01
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180.0
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """두 좌표 사이의 거리(미터)"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class BusStopRegistry:
+    """
+    정류장 목록을 한 번 인덱싱해 두고 ID 조회, 최근접 N개 조회, 영역 조회를 제공합니다.
+
+    인스턴스는 읽기 전용으로 사용합니다. 데이터가 바뀌면 apply_changes()로 바뀐 부분만
+    반영한 새 레지스트리를 만들고 통째로 교체합니다.
+    """
+
+    def __init__(
+        self,
+        stops: Iterable[Dict[str, Any]],
+        version: int = 1,
+        cell_size: float = DEFAULT_CELL_SIZE,
+    ):
+        # 데이터 버전 - 응답 캐시 등 파생 데이터의 무효화 기준
+        self.version = version
+        self.cell_size = cell_size
+        self._stops: List[Dict[str, Any]] = list(stops)
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._grid: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+
+        for stop in self._stops:
+            self._by_id[stop["id"]] = stop
+            self._grid.setdefault(self._cell(stop["lat"], stop["lng"]), []).append(stop)
+        self._update_extent()
+
+    def _update_extent(self):
+        if self._grid:
+            rows = [cell[0] for cell in self._grid]
+            cols = [cell[1] for cell in self._grid]
+            self._extent = (min(rows), min(cols), max(rows), max(cols))
+        else:
+            self._extent = None
+
+    def apply_changes(
+        self,
+        added: Iterable[Dict[str, Any]],
+        changed: Iterable[Dict[str, Any]],
+        removed: Iterable[int],
+        version: int,
+    ) -> "BusStopRegistry":
+        """
+        추가/변경/삭제된 정류장만 반영한 새 레지스트리를 반환합니다. 기존 인스턴스는 그대로입니다.
+
+        바뀐 정류장이 속한 격자 칸만 복사하므로 전체를 다시 인덱싱하지 않습니다.
+        """
+        added = list(added)
+        changed = list(changed)
+        changed_ids = {stop["id"] for stop in changed}
+        removed_ids = set(removed)
+
+        new = object.__new__(BusStopRegistry)
+        new.version = version
+        new.cell_size = self.cell_size
+        new._by_id = dict(self._by_id)
+        new._grid = dict(self._grid)
+        copied = set()
+
+        def cell_stops(cell):
+            if cell not in copied:
+                new._grid[cell] = list(new._grid.get(cell, ()))
+                copied.add(cell)
+            return new._grid[cell]
+
+        for stop_id in removed_ids | changed_ids:
+            old = new._by_id.pop(stop_id, None)
+            if old is None:
+                continue
+            cell_stops(new._cell(old["lat"], old["lng"])).remove(old)
+
+        for stop in changed + added:
+            new._by_id[stop["id"]] = stop
+            cell_stops(new._cell(stop["lat"], stop["lng"])).append(stop)
+        for cell in copied:
+            if not new._grid[cell]:
+                del new._grid[cell]
+
+        # 기존 순서를 유지하고 새 정류장은 뒤에 붙임
+        by_id = new._by_id
+        new._stops = [
+            by_id[stop["id"]] for stop in self._stops if stop["id"] not in removed_ids
+        ]
+        new._stops.extend(stop for stop in changed + added if stop["id"] not in self._by_id)
+        new._update_extent()
+        return new
+
+    def __len__(self) -> int:
+        return len(self._stops)
+
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """정류장이 있는 격자 칸 전체를 덮는 (최소 위도, 최소 경도, 최대 위도, 최대 경도)"""
+        if self._extent is None:
+            return None
+        row0, col0, row1, col1 = self._extent
+        size = self.cell_size
+        return (row0 * size, col0 * size, (row1 + 1) * size, (col1 + 1) * size)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._stops
+
+    def get(self, stop_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(stop_id)
+
+    def ids(self) -> Iterable[int]:
+        return self._by_id.keys()
+
+    def within(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float
+    ) -> List[Dict[str, Any]]:
+        """경계 상자 안에 있는 정류장 목록"""
+        if self._extent is None or min_lat > max_lat or min_lng > max_lng:
+            return []
+
+        row0, col0 = self._cell(min_lat, min_lng)
+        row1, col1 = self._cell(max_lat, max_lng)
+        # 데이터가 있는 범위로 잘라 넓은 상자에서도 빈 칸을 돌지 않게 함
+        row0, col0 = max(row0, self._extent[0]), max(col0, self._extent[1])
+        row1, col1 = min(row1, self._extent[2]), min(col1, self._extent[3])
+
+        result = []
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                for entry in self._grid.get((row, col), ()):
+                    stop_lat, stop_lng = self._position(entry)
+                    if min_lat <= stop_lat <= max_lat and min_lng <= stop_lng <= max_lng:
+                        result.append(self._stop(entry))
+        return result
+
+    def nearest(self, lat: float, lng: float, limit: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        좌표에서 가까운 순서로 최대 limit개의 (거리(m), 정류장) 목록
+
+        질의 지점의 칸에서 시작해 고리 모양으로 칸을 넓혀 가며, 아직 보지 않은 칸의
+        최소 거리가 현재 limit번째 후보보다 멀어지면 탐색을 멈춥니다. 질의 지점이 데이터
+        범위 밖이거나 고리로 돌아야 할 칸이 정류장이 있는 칸 수보다 많아지면, 빈 칸을
+        돌지 않고 정류장이 있는 칸만 가까운 순서로 훑습니다.
+        """
+        if self._extent is None or limit <= 0:
+            return []
+
+        center_row, center_col = self._cell(lat, lng)
+        row0, col0, row1, col1 = self._extent
+        if not (row0 <= center_row <= row1 and col0 <= center_col <= col1):
+            return self._nearest_by_cells(lat, lng, limit)
+        # 경도 1도의 길이가 위도 1도보다 짧으므로 경도 기준으로 하한을 잡음
+        min_cell_m = self.cell_size * METERS_PER_DEGREE * max(
+            math.cos(math.radians(min(abs(lat), 89.0))), 0.01
+        )
+        max_ring = max(
+            abs(center_row - self._extent[0]),
+            abs(center_row - self._extent[2]),
+            abs(center_col - self._extent[1]),
+            abs(center_col - self._extent[3]),
+        )
+
+        # (-거리, -id, 항목) 최대 힙으로 상위 limit개 유지
+        best: List[Tuple[float, int, Any]] = []
+        visited = 0
+        for ring in range(max_ring + 1):
+            if len(best) == limit and (ring - 1) * min_cell_m > -best[0][0]:
+                break
+            visited += 8 * ring or 1
+            if visited > len(self._grid):
+                # 빈 칸이 많은 범위 - 정류장이 있는 칸만 훑는 편이 적게 듦
+                return self._nearest_by_cells(lat, lng, limit)
+            for row, col in _ring_cells(center_row, center_col, ring):
+                for entry in self._grid.get((row, col), ()):
+                    self._offer(best, limit, lat, lng, entry)
+
+        return self._sorted_best(best)
+
+    def _nearest_by_cells(self, lat: float, lng: float, limit: int):
+        # 정류장이 있는 칸을 칸까지의 최소 거리 순으로 꺼내, 그 거리가 limit번째 후보보다
+        # 멀어지면 멈춤 (칸 수에 비례)
+        size = self.cell_size
+        cells = [
+            (
+                _distance_to_bounds(lat, lng, (row * size, col * size, (row + 1) * size, (col + 1) * size)),
+                row,
+                col,
+            )
+            for row, col in self._grid
+        ]
+        heapq.heapify(cells)
+        best: List[Tuple[float, int, Any]] = []
+        while cells:
+            bound_m, row, col = heapq.heappop(cells)
+            if len(best) == limit and bound_m > -best[0][0]:
+                break
+            for entry in self._grid.get((row, col), ()):
+                self._offer(best, limit, lat, lng, entry)
+        return self._sorted_best(best)
+
+    def _offer(self, best: List[Tuple[float, int, Any]], limit: int, lat: float, lng: float, entry):
+        dist = haversine_m(lat, lng, *self._position(entry))
+        item = (-dist, -self._stop_id(entry), entry)
+        if len(best) < limit:
+            heapq.heappush(best, item)
+        elif item > best[0]:
+            heapq.heapreplace(best, item)
+
+    def _sorted_best(self, best: List[Tuple[float, int, Any]]) -> List[Tuple[float, Dict[str, Any]]]:
+        return [(-neg_dist, self._stop(entry)) for neg_dist, _, entry in sorted(best, reverse=True)]
+
+    # 격자 칸 항목 접근 - 여기서는 항목이 정류장 딕셔너리 자체
+
+    @staticmethod
+    def _position(entry) -> Tuple[float, float]:
+        return entry["lat"], entry["lng"]
+
+    @staticmethod
+    def _stop_id(entry) -> int:
+        return entry["id"]
+
+    @staticmethod
+    def _stop(entry) -> Dict[str, Any]:
+        return entry
+
+
+def _ring_cells(row: int, col: int, ring: int):
+    """(row, col)에서 체비쇼프 거리가 정확히 ring인 칸들"""
+    if ring == 0:
+        yield (row, col)
+        return
+    for c in range(col - ring, col + ring + 1):
+        yield (row - ring, c)
+        yield (row + ring, c)
+    for r in range(row - ring + 1, row + ring):
+        yield (r, col - ring)
+        yield (r, col + ring)
+
+
+class ShardedBusStopRegistry:
+    """
+    도시별로 나뉜 레지스트리 여러 개를 하나처럼 조회하는 레지스트리
+
+    정류장 ID는 모든 분할(shard)에서 겹치지 않아야 하며, 겹치면 ValueError를 발생시킵니다.
+    ID 조회는 만들 때 한 번 합친 {ID: 분할} 색인으로 하고, 영역/최근접 조회는 각 분할의
+    경계 상자로 관계없는 분할을 건너뛰므로 분할 수가 많아도 가까운 분할만 탐색합니다.
+    """
+
+    def __init__(self, shards: Dict[str, BusStopRegistry]):
+        self.shards = dict(shards)
+        self._by_id: Dict[int, BusStopRegistry] = {}
+        duplicates = set()
+        for _, registry in sorted(self.shards.items()):
+            for stop_id in registry.ids():
+                if self._by_id.setdefault(stop_id, registry) is not registry:
+                    duplicates.add(stop_id)
+        if duplicates:
+            sample = ", ".join(str(stop_id) for stop_id in sorted(duplicates)[:10])
+            raise ValueError(
+                f"여러 분할에 같은 정류장 ID가 있습니다 ({len(duplicates)}개: {sample})"
+            )
+        # 분할 중 하나라도 바뀌면 달라지는 버전
+        self.version = tuple(
+            (name, registry.version) for name, registry in sorted(self.shards.items())
+        )
+        self._bounds = [
+            (registry.bounds(), registry) for _, registry in sorted(self.shards.items())
+        ]
+
+    def __len__(self) -> int:
+        return sum(len(registry) for registry in self.shards.values())
+
+    def all(self) -> List[Dict[str, Any]]:
+        stops: List[Dict[str, Any]] = []
+        for _, registry in sorted(self.shards.items()):
+            stops.extend(registry.all())
+        return stops
+
+    def get(self, stop_id: int) -> Optional[Dict[str, Any]]:
+        registry = self._by_id.get(stop_id)
+        return registry.get(stop_id) if registry is not None else None
+
+    def ids(self) -> Iterable[int]:
+        return self._by_id.keys()
+
+    def within(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float
+    ) -> List[Dict[str, Any]]:
+        result = []
+        for bounds, registry in self._bounds:
+            if bounds is None:
+                continue
+            if bounds[0] > max_lat or bounds[2] < min_lat or bounds[1] > max_lng or bounds[3] < min_lng:
+                continue
+            result.extend(registry.within(min_lat, min_lng, max_lat, max_lng))
+        return result
+
+    def nearest(self, lat: float, lng: float, limit: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        if limit <= 0:
+            return []
+        # 경계 상자까지의 거리가 가까운 분할부터 조회하고, 그 거리가 현재 limit번째
+        # 후보보다 멀면 나머지 분할은 건너뜀
+        candidates = sorted(
+            (_distance_to_bounds(lat, lng, bounds), i, registry)
+            for i, (bounds, registry) in enumerate(self._bounds)
+            if bounds is not None
+        )
+        best: List[Tuple[float, Dict[str, Any]]] = []
+        for bound_m, _, registry in candidates:
+            if len(best) == limit and bound_m > best[-1][0]:
+                break
+            best = heapq.nsmallest(
+                limit,
+                best + registry.nearest(lat, lng, limit),
+                key=lambda item: (item[0], item[1]["id"]),
+            )
+        return best
+
+
+def _distance_to_bounds(lat: float, lng: float, bounds: Tuple[float, float, float, float]) -> float:
+    """좌표에서 경계 상자까지의 대략적인 최소 거리(m). 상자 안이면 0"""
+    nearest_lat = min(max(lat, bounds[0]), bounds[2])
+    nearest_lng = min(max(lng, bounds[1]), bounds[3])
+    # 위도선은 대원이 아니므로 1%의 여유를 두어 하한으로 사용
+    return haversine_m(lat, lng, nearest_lat, nearest_lng) * 0.99
@@ -0,0 +1,210 @@
+"""
+긴급 이벤트 영구 저장소 (SQLite, write-behind 방식)
+
+이벤트는 append() 시점에 메모리에서 단조 증가하는 순번(seq)을 받고 즉시 반환됩니다.
+디스크 기록은 백그라운드 태스크가 모아서 한 번에 처리하므로 요청 경로가 디스크를
+기다리지 않습니다. 재접속한 클라이언트는 since(seq)로 놓친 이벤트만 받아갈 수 있습니다.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    cast,
+    create_engine,
+    func,
+    insert,
+    select,
+)
+
+from app.config import (
+    DATABASE_URL,
+    EVENT_FLUSH_BATCH_SIZE,
+    EVENT_FLUSH_INTERVAL,
+    EVENT_MEMORY_SIZE,
+)
+
+log = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+emergency_events = Table(
+    "emergency_events",
+    metadata,
+    Column("seq", Integer, primary_key=True, autoincrement=False),
+    Column("type", String(32), nullable=False),
+    Column("bus_stop_id", Integer, index=True),
+    Column("created_at", Float, nullable=False, index=True),
+    Column("payload", Text, nullable=False),
+)
+
+
+class EventStore:
+    def __init__(
+        self,
+        url: str = DATABASE_URL,
+        flush_interval: float = EVENT_FLUSH_INTERVAL,
+        batch_size: int = EVENT_FLUSH_BATCH_SIZE,
+        memory_size: int = EVENT_MEMORY_SIZE,
+    ):
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        self.engine = create_engine(url, connect_args=connect_args)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.last_seq = 0
+        # 최근 이벤트 (아직 디스크에 기록되지 않은 것 포함) - 대부분의 재전송은 여기서 처리
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=memory_size)
+        self._unflushed: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        # SQLite 접근을 한 스레드로 직렬화
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-store")
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self.last_seq = await self._run(self._init_db)
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        if self._writer:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        await self.flush()
+        self._executor.shutdown(wait=True)
+
+    def append(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        이벤트에 순번을 붙여 기록 대기열에 넣고, "seq"가 추가된 payload를 반환합니다.
+        """
+        self.last_seq += 1
+        payload = {**payload, "seq": self.last_seq}
+        event = {
+            "seq": self.last_seq,
+            "type": event_type,
+            "bus_stop_id": payload.get("busStopId"),
+            "created_at": time.time(),
+            "payload": payload,
+        }
+        self._recent.append(event)
+        self._unflushed.append(event)
+        if len(self._unflushed) >= self.batch_size and self._wakeup:
+            self._wakeup.set()
+        return payload
+
+    def remember(self, payload: Dict[str, Any]):
+        """
+        다른 워커가 순번을 붙인 이벤트를 재전송용 메모리에만 기록합니다.
+
+        디스크 기록은 순번을 붙인 워커가 담당하며, 이미 알고 있는 순번이면 무시합니다.
+        """
+        seq = payload.get("seq", 0)
+        if seq <= self.last_seq:
+            return
+        self.last_seq = seq
+        self._recent.append({"seq": seq, "payload": payload})
+
+    async def since(self, seq: int, limit: int) -> List[Dict[str, Any]]:
+        """seq 이후의 이벤트 payload를 오래된 순서로 최대 limit개 반환합니다."""
+        if seq >= self.last_seq:
+            return []
+        if self._recent and self._recent[0]["seq"] <= seq + 1:
+            events = [e["payload"] for e in self._recent if e["seq"] > seq]
+            return events[:limit]
+        # 메모리 범위를 벗어나면 DB에서 조회 (이 워커에 대기 중인 기록을 먼저 반영)
+        await self.flush()
+        return await self._run(self._select_since, seq, limit)
+
+    async def counts_by_stop(
+        self, event_type: str, since: float, until: float, bucket: int
+    ) -> List[Tuple[int, float, int]]:
+        """
+        [since, until) 구간 이벤트의 (정류장 ID, 칸 시작 시각, 개수) 목록 (칸 크기 bucket초)
+
+        집계는 DB가 GROUP BY 한 번으로 처리하므로 이벤트를 하나씩 읽어 오지 않습니다.
+        """
+        await self.flush()
+        return await self._run(self._select_counts, event_type, since, until, bucket)
+
+    async def flush(self):
+        batch, self._unflushed = self._unflushed, []
+        if batch:
+            try:
+                await self._run(self._insert, batch)
+            except Exception:
+                # 실패한 묶음은 다음 기록 때 다시 시도
+                self._unflushed[:0] = batch
+                raise
+
+    async def _write_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error("이벤트 기록 중 오류 발생", extra={"error": str(e)})
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _init_db(self) -> int:
+        metadata.create_all(self.engine)
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.max(emergency_events.c.seq))).scalar() or 0
+
+    def _insert(self, batch: List[Dict[str, Any]]):
+        rows = [
+            {**event, "payload": json.dumps(event["payload"], ensure_ascii=False)}
+            for event in batch
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(insert(emergency_events), rows)
+
+    def _select_counts(
+        self, event_type: str, since: float, until: float, bucket: int
+    ) -> List[Tuple[int, float, int]]:
+        slot = cast(emergency_events.c.created_at / bucket, Integer).label("slot")
+        query = (
+            select(emergency_events.c.bus_stop_id, slot, func.count())
+            .where(
+                emergency_events.c.type == event_type,
+                emergency_events.c.created_at >= since,
+                emergency_events.c.created_at < until,
+            )
+            .group_by(emergency_events.c.bus_stop_id, slot)
+        )
+        with self.engine.connect() as conn:
+            return [
+                (bus_stop_id, slot * bucket, count)
+                for bus_stop_id, slot, count in conn.execute(query)
+                if bus_stop_id is not None
+            ]
+
+    def _select_since(self, seq: int, limit: int) -> List[Dict[str, Any]]:
+        query = (
+            select(emergency_events.c.payload)
+            .where(emergency_events.c.seq > seq)
+            .order_by(emergency_events.c.seq)
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            return [json.loads(row.payload) for row in conn.execute(query)]
@@ -0,0 +1,86 @@
+"""
+WebSocket 프레임 직렬화 (JSON 텍스트 / MessagePack 바이너리)
+
+클라이언트는 WebSocket 하위 프로토콜로 인코딩을 고릅니다.
+- busstop.v1.json: JSON 텍스트 프레임 (하위 프로토콜을 지정하지 않은 클라이언트도 이것)
+- busstop.v1.msgpack: 바이너리 프레임. 첫 바이트가 형식이고 나머지가 본문입니다.
+    0x00: MessagePack
+    0x01: zlib(deflate)로 압축한 MessagePack
+
+Frame은 보낼 내용을 한 번만 만들어 두고, 인코딩별 바이트는 처음 필요할 때 한 번
+만들어 모든 수신자가 같은 객체를 재사용합니다. 재전송 묶음처럼 큰 스냅샷 프레임은
+compress=True로 만들면 바이너리 클라이언트에 압축해서 보냅니다. 연결마다 압축하는
+WebSocket permessage-deflate와 달리 압축도 프레임당 한 번입니다. 긴급 알림 프레임은
+담긴 알림의 가장 큰 이벤트 순번(seq)을 함께 가지고 있어 재전송과 겹치는지 확인할 수 있습니다.
+
+msgpack 패키지가 없으면 바이너리 인코딩을 제공하지 않고 JSON만 사용합니다.
+"""
+
+import json
+import zlib
+from typing import Any, Iterable, Optional
+
+from app.config import WS_DEFLATE_MIN_SIZE
+
+try:
+    import msgpack
+except ImportError:  # msgpack은 선택 의존성
+    msgpack = None
+
+JSON_PROTOCOL = "busstop.v1.json"
+MSGPACK_PROTOCOL = "busstop.v1.msgpack"
+
+# 지원하는 하위 프로토콜
+SUBPROTOCOLS = (MSGPACK_PROTOCOL, JSON_PROTOCOL) if msgpack else (JSON_PROTOCOL,)
+
+# 바이너리 프레임 형식 바이트
+BINARY_PLAIN = b"\x00"
+BINARY_DEFLATE = b"\x01"
+
+
+def select_subprotocol(offered: Iterable[str]) -> Optional[str]:
+    """클라이언트가 제시한 하위 프로토콜 중 선호 순서상 처음으로 지원하는 것"""
+    for protocol in offered:
+        if protocol.strip() in SUBPROTOCOLS:
+            return protocol.strip()
+    return None
+
+
+class Frame:
+    """한 번 만든 뒤 여러 연결에 보내는 WebSocket 메시지"""
+
+    __slots__ = ("payload", "compress", "seq", "_text", "_binary")
+
+    def __init__(self, payload: Any, compress: bool = False, seq: Optional[int] = None):
+        self.payload = payload
+        self.compress = compress
+        # 담긴 이벤트 중 가장 큰 순번 (순번이 없는 프레임은 None)
+        self.seq = seq
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.payload)
+        return self._text
+
+    def binary(self) -> bytes:
+        if self._binary is None:
+            body = msgpack.packb(self.payload, use_bin_type=True)
+            if self.compress and len(body) >= WS_DEFLATE_MIN_SIZE:
+                compressed = zlib.compress(body)
+                if len(compressed) < len(body):
+                    self._binary = BINARY_DEFLATE + compressed
+                    return self._binary
+            self._binary = BINARY_PLAIN + body
+        return self._binary
+
+
+def decode_binary(data: bytes) -> Any:
+    """바이너리 프레임을 원래 내용으로 되돌립니다 (클라이언트/테스트용)."""
+    kind, body = data[:1], data[1:]
+    if kind == BINARY_DEFLATE:
+        body = zlib.decompress(body)
+    elif kind != BINARY_PLAIN:
+        raise ValueError(f"알 수 없는 프레임 형식입니다: {kind!r}")
+    return msgpack.unpackb(body, raw=False)
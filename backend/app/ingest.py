@@ -0,0 +1,123 @@
+"""
+긴급 알림 수집(ingest) 단계 - 중복 누름 병합과 같은 틱 알림 묶음 전송
+
+- 같은 정류장에서 설정된 시간 창 안에 반복된 누름은 하나의 알림으로 합치고
+  누른 횟수(pressCount)만 늘립니다. 첫 누름은 지연 없이 바로 전송되고, 창이 끝날 때
+  추가 누름이 있었으면 갱신 알림(update=True)을 한 번 보냅니다.
+- 같은 이벤트 루프 틱에 생긴 알림들은 한 프레임으로 묶어 한 번만 브로드캐스트합니다.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import EMERGENCY_COALESCE_WINDOW
+from app.frames import Frame
+
+
+class _StopWindow:
+    """정류장 하나의 병합 창 상태"""
+
+    __slots__ = ("alert", "count", "sent_count", "handle")
+
+    def __init__(self, alert: Dict[str, Any]):
+        self.alert = alert
+        self.count = 1
+        self.sent_count = 1
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class EmergencyCoalescer:
+    def __init__(
+        self,
+        publish: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        window: float = EMERGENCY_COALESCE_WINDOW,
+    ):
+        self._publish = publish
+        self.window = window
+        self._windows: Dict[int, _StopWindow] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        알림 하나를 받아 병합 여부를 결정합니다.
+
+        반환값은 정류장의 현재 알림 상태(pressCount 포함)와 병합 여부(coalesced)입니다.
+        """
+        stop_id = alert["busStopId"]
+        state = self._windows.get(stop_id)
+
+        if state is not None:
+            state.count += 1
+            state.alert = {**alert, "pressCount": state.count}
+            return {**state.alert, "coalesced": True}
+
+        alert = {**alert, "pressCount": 1}
+        state = _StopWindow(alert)
+        self._windows[stop_id] = state
+        if self.window > 0:
+            state.handle = asyncio.get_running_loop().call_later(
+                self.window, self._close_window, stop_id
+            )
+        else:
+            del self._windows[stop_id]
+        self._enqueue(alert)
+        return {**alert, "coalesced": False}
+
+    async def close(self):
+        """
+        대기 중인 타이머를 모두 취소합니다.
+
+        창이 닫히기 전이라 아직 보내지 않은 추가 누름은 갱신 알림으로 보내고, 진행 중인
+        발행이 모두 끝날 때까지 기다립니다. 그래서 버스를 닫기 전에 호출해야 합니다.
+        """
+        for state in self._windows.values():
+            if state.handle:
+                state.handle.cancel()
+            if state.count != state.sent_count:
+                state.sent_count = state.count
+                self._enqueue({**state.alert, "update": True})
+        self._windows.clear()
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _close_window(self, stop_id: int):
+        state = self._windows.get(stop_id)
+        if state is None:
+            return
+        if state.count == state.sent_count:
+            # 창 안에 추가 누름이 없었으면 창을 닫음
+            del self._windows[stop_id]
+            return
+        # 추가 누름을 갱신 알림 한 번으로 보내고, 누름이 계속될 수 있으니 창을 연장
+        state.sent_count = state.count
+        self._enqueue({**state.alert, "update": True})
+        state.handle = asyncio.get_running_loop().call_later(
+            self.window, self._close_window, stop_id
+        )
+
+    def _enqueue(self, alert: Dict[str, Any]):
+        if not self._pending:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._pending.append(alert)
+
+    def _flush(self):
+        alerts, self._pending = self._pending, []
+        if not alerts:
+            return
+        task = asyncio.create_task(self._publish(alerts))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def encode_alert_frame(alerts: List[Dict[str, Any]], snapshot: bool = False) -> Frame:
+    """
+    알림 목록을 WebSocket 프레임 하나로 만듭니다. 알림이 하나면 묶지 않습니다.
+
+    재전송 묶음처럼 큰 스냅샷이면 snapshot=True로 바이너리 클라이언트에 압축해서 보냅니다.
+    """
+    seq = max((alert["seq"] for alert in alerts if "seq" in alert), default=None)
+    if len(alerts) == 1:
+        return Frame(alerts[0], seq=seq)
+    return Frame({"type": "emergency_batch", "alerts": alerts}, compress=snapshot, seq=seq)
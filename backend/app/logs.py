@@ -0,0 +1,188 @@
+"""
+구조화된(JSON 한 줄) 비동기 로깅
+
+이벤트 루프에서 로그를 남기면 레코드를 메모리 대기열에 넣기만 하고, 실제 JSON 변환과
+표준 출력 쓰기는 별도 쓰기 스레드가 합니다. 콘솔이나 로그 파이프가 느려도 요청 처리는
+기다리지 않습니다. 대기열이 가득 차면 기다리는 대신 레코드를 버리고 개수를 셉니다.
+
+- LOG_LEVEL: 기본 로그 레벨
+- LOG_LEVELS: 모듈별 레벨, 예) "app.pubsub=DEBUG,app.broadcast=WARNING"
+- LOG_SAMPLE_RATES: 자주 호출되는 로거의 기록 비율(0~1), 예) "app.main.devices=0.01"
+  WARNING 이상은 항상 기록하고, 표본으로 남긴 레코드에는 sampleRate를 붙입니다.
+
+로거는 모듈마다 logging.getLogger(__name__)으로 만들고, 검색할 값은 메시지 문자열에
+넣는 대신 extra로 넘깁니다.
+
+    log.info("비상 알림 수신", extra={"busStopId": bus_stop_id})
+"""
+
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.config import LOG_LEVEL, LOG_LEVELS, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+
+# 서버 모듈 로거의 공통 상위 로거
+ROOT_LOGGER = "app"
+
+# 레코드 기본 속성 - 이 밖의 속성은 extra로 넘긴 필드로 보고 출력에 포함
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """"이름=값,이름=값" 형식의 설정값"""
+    mapping = {}
+    for item in value.split(","):
+        name, sep, setting = item.partition("=")
+        if sep and name.strip():
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+class JSONFormatter(logging.Formatter):
+    """레코드 하나를 JSON 한 줄로 변환 (쓰기 스레드에서 실행)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """로거 이름별 비율로 WARNING 미만 레코드를 표본 추출"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        # 로거 이름 -> 적용 비율 (상위 로거 설정 상속 결과를 캐시)
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        rate = self._resolved.get(name, False)
+        if rate is False:
+            rate = None
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sampleRate = rate
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """대기열이 가득 차면 기다리지 않고 레코드를 버리는 QueueHandler"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.setFormatter(logging.Formatter())
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 인자는 지금 문자열로 만들어 둠 (이후 바뀔 수 있는 객체를 쓰기 스레드와 공유하지 않음)
+        # 예외 추적 정보는 메시지와 섞지 않고 exc_text로 따로 전달
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # 종료 표시는 대기열이 가득 차 있어도 넣어야 하므로 자리가 날 때까지 기다림
+        self.queue.put(self._sentinel)
+
+
+_handler: Optional[_NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_running = False
+
+
+def configure_logging():
+    """서버 로거에 대기열 핸들러와 모듈별 레벨을 설정합니다. 여러 번 호출해도 한 번만 설정합니다."""
+    global _handler, _listener
+    if _handler is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler = _NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(
+        SamplingFilter(
+            {name: float(rate) for name, rate in _parse_mapping(LOG_SAMPLE_RATES).items()}
+        )
+    )
+
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(JSONFormatter())
+    _listener = _Listener(log_queue, writer)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LOG_LEVEL.upper())
+    root.addHandler(_handler)
+    root.propagate = False
+    for name, level in _parse_mapping(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+
+def start_logging():
+    """설정 후 쓰기 스레드를 시작합니다. 이미 실행 중이면 아무 일도 하지 않습니다."""
+    global _running
+    configure_logging()
+    if not _running:
+        _listener.start()
+        _running = True
+
+
+def stop_logging():
+    """대기열에 남은 레코드를 모두 쓴 뒤 쓰기 스레드를 멈춥니다."""
+    global _running
+    if _running:
+        _listener.stop()
+        _running = False
+
+
+def dropped_records() -> int:
+    """대기열이 가득 차서 버린 레코드 수"""
+    return _handler.dropped if _handler else 0
@@ -1,12 +1,63 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-import random
 import asyncio
 import json
-from typing import List, Dict, Any
-import traceback
+import logging
+import time
+from typing import Any, Dict, List, Optional
 from datetime import datetime
-from app.data.bus_stops import get_all_bus_stops, get_bus_stop_by_id
+from app.data.bus_stops import (
+    get_all_bus_stops,
+    get_bus_stops_version,
+    get_bus_stop_by_id,
+    get_nearest_bus_stops,
+    get_bus_stops_in_bounds,
+    get_bus_stop_clusters,
+    build_bus_stop_clusters,
+    reload_bus_stops,
+)
+from app.broadcast import ConnectionManager
+from app.data.clusters import INDEXED_MIN_LEVEL, MAX_LEVEL, MIN_LEVEL, cell_size
+from app.cache import PrecompressedJSONCache
+from app.ingest import EmergencyCoalescer, encode_alert_frame
+from app.event_store import EventStore
+from app.frames import Frame
+from app.logs import configure_logging, dropped_records, start_logging, stop_logging
+from app.meetings import MeetingRegistry, encode_meeting_frame
+from app.metrics import (
+    BUS_STOPS_RELOAD_DURATION,
+    CONTENT_TYPE,
+    EMERGENCY_ALERTS,
+    EMERGENCY_FANOUT_DURATION,
+    REGISTRY,
+    WS_CONNECTIONS,
+    MetricsMiddleware,
+    counter,
+    gauge,
+)
+from app.notices import HTTPNoticeSource, LocalNoticeSource, NoticeSyncScheduler
+from app.presence import PresenceTracker, encode_presence_frame
+from app.pubsub import create_bus
+from app.ratelimit import TokenBucketLimiter, retry_after_header
+from app.stats import LOAD_BUCKET, WINDOWS, EmergencyStats, heatmap_points
+from app.subscriptions import EMERGENCY, MEETING, PRESENCE, Subscription, SubscriptionIndex
+from app.config import (
+    BUS_STOPS_RELOAD_INTERVAL,
+    EMERGENCY_RATE_BURST,
+    EMERGENCY_RATE_LIMIT,
+    EVENT_REPLAY_LIMIT,
+    MEETING_RATE_BURST,
+    MEETING_RATE_LIMIT,
+    MEETING_WAIT_MAX,
+    NOTICES_SOURCE_URL,
+    PRESENCE_TIMEOUT,
+)
+
+# 구조화된 로그 (기록은 대기열에 넣기만 하고 쓰기는 별도 스레드에서)
+configure_logging()
+log = logging.getLogger(__name__)
+# 장치 하트비트/미팅 조회처럼 자주 호출되는 요청의 로그 (LOG_SAMPLE_RATES로 표본 추출)
+device_log = logging.getLogger(__name__ + ".devices")
 
 app = FastAPI(title="고흥시 버스정류장 관리 시스템 API")
 
@@ -19,28 +70,258 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 웹엑스 미팅 정보를 저장할 전역 변수
-webex_meeting_info = None
+# 라우트별 요청 처리 시간 기록
+app.add_middleware(MetricsMiddleware)
 
+# 정류장별 웹엑스 미팅 정보 (정류장을 지정하지 않은 미팅은 모든 정류장에 적용)
+meetings = MeetingRegistry()
 
-# WebSocket 연결을 관리하기 위한 클래스
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+# WebSocket 연결 관리자
+manager = ConnectionManager()
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# /ws/emergency 연결별 구독 조건 (메시지 종류, 정류장, 지역)
+subscriptions = SubscriptionIndex()
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# 긴급 이벤트 영구 저장소 (재접속한 클라이언트에 놓친 알림 재전송)
+event_store = EventStore()
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+# 정류장별 최근 1시간/1일/1주 긴급 알림 수 (지도 히트맵용)
+emergency_stats = EmergencyStats()
 
+# 지난 구간의 알림 통계 조회 결과 (구간이 끝난 뒤에는 바뀌지 않으므로 재사용)
+emergency_history_cache: Dict[Any, Any] = {}
+EMERGENCY_HISTORY_CACHE_SIZE = 64
 
-manager = ConnectionManager()
+
+# 정류장·클라이언트별 요청 빈도 제한 (고장 난 버튼이나 재시도 루프 차단)
+emergency_limiter = TokenBucketLimiter(EMERGENCY_RATE_LIMIT, EMERGENCY_RATE_BURST)
+meeting_limiter = TokenBucketLimiter(MEETING_RATE_LIMIT, MEETING_RATE_BURST)
+RATE_LIMITED = counter(
+    "busstop_rate_limited_requests_total",
+    "요청 빈도 제한으로 거절한 요청 수 (엔드포인트별)",
+    ("endpoint",),
+)
+
+
+def _check_rate_limit(
+    limiter: TokenBucketLimiter, endpoint: str, bus_stop_id: Optional[int], request: Request
+):
+    """정류장·클라이언트의 요청 빈도가 제한을 넘으면 429로 거절합니다."""
+    client = request.client.host if request.client else None
+    delay = limiter.acquire((bus_stop_id, client))
+    if delay:
+        RATE_LIMITED.inc(1, endpoint)
+        raise HTTPException(
+            status_code=429,
+            detail="요청이 너무 잦습니다. 잠시 후 다시 시도하세요.",
+            headers={"Retry-After": retry_after_header(delay)},
+        )
+
+
+# 워커 간 메시지 버스 (여러 워커로 실행해도 모든 워커의 클라이언트에 알림 전달)
+bus = create_bus()
+
+
+def sequence_message(channel: str, data: Any) -> Any:
+    """버스 허브에서 메시지를 중계하기 전에 한 번 실행 - 알림에 순번을 붙이고 로그에 기록"""
+    if channel == "emergency":
+        # 병합 창의 갱신 알림은 따로 기록해 통계에서 같은 알림을 두 번 세지 않게 함
+        return [
+            event_store.append("emergency_update" if alert.get("update") else "emergency", alert)
+            for alert in data
+        ]
+    if channel == "meeting":
+        return meetings.stamp(data)
+    return data
+
+
+def _alert_target(alert: Dict[str, Any]):
+    return (alert.get("busStopId"), alert.get("lat"), alert.get("lng"))
+
+
+def _stop_target(item: Dict[str, Any]):
+    # 장치 상태/미팅에는 좌표가 없으므로 정류장 데이터에서 찾음
+    bus_stop_id = item.get("busStopId")
+    if bus_stop_id is None:
+        return (None, None, None)
+    bus_stop = get_bus_stop_by_id(bus_stop_id)
+    if not bus_stop:
+        return (bus_stop_id, None, None)
+    return (bus_stop_id, bus_stop["lat"], bus_stop["lng"])
+
+
+async def deliver_message(channel: str, data: Any):
+    """버스에서 받은 메시지를 이 워커의 상태와 WebSocket 클라이언트에 반영"""
+    if channel == "emergency":
+        for alert in data:
+            event_store.remember(alert)
+            if not alert.get("update"):
+                emergency_stats.record(
+                    alert["busStopId"], datetime.fromisoformat(alert["timestamp"]).timestamp()
+                )
+        # 알림 시각(버튼 누름 수신 시각)부터 이 워커의 마지막 전송까지를 기록
+        # 병합 창의 갱신 알림은 창이 닫힐 때(최대 EMERGENCY_COALESCE_WINDOW 뒤) 발행되므로 제외
+        pressed = [
+            datetime.fromisoformat(alert["timestamp"]).timestamp()
+            for alert in data
+            if not alert.get("update")
+        ]
+        on_sent = None
+        if pressed:
+            started = min(pressed)
+
+            def observe_fanout():
+                EMERGENCY_FANOUT_DURATION.observe(max(0.0, time.time() - started))
+
+            on_sent = observe_fanout
+        # 구독 조건별로 받을 알림이 같은 연결끼리 묶어 묶음마다 한 번만 직렬화
+        await manager.send(
+            [
+                (encode_alert_frame(alerts), websockets)
+                for alerts, websockets in subscriptions.route(EMERGENCY, data, _alert_target)
+            ],
+            on_sent=on_sent,
+        )
+    elif channel == "meeting":
+        meetings.apply(data)
+        await manager.send(
+            (encode_meeting_frame(data), websockets)
+            for _, websockets in subscriptions.route(MEETING, [data], _stop_target)
+        )
+    elif channel == "presence":
+        if data["online"]:
+            presence.beat(data["busStopId"], data.get("info"), data["at"])
+        else:
+            presence.leave(data["busStopId"])
+    elif channel == "notices":
+        notice_sync.apply(data)
+
+
+async def publish_emergency_alerts(alerts: List[Dict[str, Any]]):
+    """알림을 버스로 발행합니다. 순번 부여와 로그 기록은 버스 허브에서 이루어집니다."""
+    await bus.publish("emergency", alerts)
+
+
+# 긴급 알림 수집 단계 (반복 누름 병합, 같은 틱 알림 묶음 전송)
+emergency_ingest = EmergencyCoalescer(publish_emergency_alerts)
+
+
+async def broadcast_presence_changes(changes: List[Dict[str, Any]]):
+    """장치 온라인/오프라인 변경분을 이 워커의 대시보드에 전송 (구독 조건에 맞는 변경분만)"""
+    await manager.send(
+        (encode_presence_frame(items), websockets)
+        for items, websockets in subscriptions.route(PRESENCE, changes, _stop_target)
+    )
+
+
+# 정류장 장치 접속 상태 (하트비트는 버스로 모든 워커에 전달되어 워커마다 같은 표를 유지)
+presence = PresenceTracker(broadcast_presence_changes)
+
+async def publish_notice_job(job: Dict[str, Any]):
+    await bus.publish("notices", job)
+
+
+# 게시판 동기화 작업 (요청은 작업만 등록하고 가져오기는 백그라운드에서)
+notice_sync = NoticeSyncScheduler(
+    HTTPNoticeSource(NOTICES_SOURCE_URL) if NOTICES_SOURCE_URL else LocalNoticeSource(),
+    publish_notice_job,
+)
+
+
+counter(
+    "busstop_ws_dropped_connections_total",
+    "송신 대기열 초과나 송신 실패로 서버가 끊은 대시보드 연결 수",
+    function=lambda: manager.dropped_connections,
+)
+
+counter(
+    "busstop_log_records_dropped_total",
+    "로그 대기열이 가득 차서 버린 로그 레코드 수",
+    function=dropped_records,
+)
+
+gauge(
+    "busstop_devices_online",
+    "온라인 상태인 정류장 장치 수",
+    function=presence.online_count,
+)
+
+
+# 정류장 데이터 파일 감시 태스크
+bus_stop_watcher: Optional[asyncio.Task] = None
+
+# 정류장 목록 응답 캐시 (데이터 버전이 바뀔 때만 다시 직렬화)
+bus_stops_cache = PrecompressedJSONCache(get_all_bus_stops, get_bus_stops_version)
+
+
+def _prepare_bus_stop_data():
+    # 데이터 버전마다 한 번 만드는 파생 데이터 (실행기 스레드에서 실행)
+    bus_stops_cache.prepare()
+    build_bus_stop_clusters()
+
+
+def _reload_bus_stop_data():
+    # 실행기 스레드에서 데이터를 교체하고, 정류장 목록 응답과 지도 클러스터도 요청 전에 미리 생성
+    # (생성이 끝날 때까지 목록 요청은 이전 응답을 받음)
+    with bus_stops_cache.preparing():
+        started = time.perf_counter()
+        reloaded = reload_bus_stops()
+        reload_seconds = time.perf_counter() - started
+        if reloaded:
+            _prepare_bus_stop_data()
+    return reloaded, reload_seconds
+
+
+async def watch_bus_stop_data():
+    """TAGO 동기화로 정류장 데이터 파일이 바뀌면 재시작 없이 교체"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(BUS_STOPS_RELOAD_INTERVAL)
+        started = time.perf_counter()
+        try:
+            reloaded, reload_seconds = await loop.run_in_executor(None, _reload_bus_stop_data)
+            BUS_STOPS_RELOAD_DURATION.observe(reload_seconds)
+            if reloaded:
+                log.info(
+                    "정류장 데이터 교체 완료",
+                    extra={
+                        "version": get_bus_stops_version(),
+                        "prepareSeconds": round(time.perf_counter() - started - reload_seconds, 3),
+                    },
+                )
+        except Exception:
+            log.exception("정류장 데이터 교체 중 오류 발생")
+
+
+@app.on_event("startup")
+async def startup():
+    global bus_stop_watcher
+    start_logging()
+    await event_store.start()
+    # 재시작해도 통계 창이 비지 않도록 저장된 이벤트로 채움
+    now = time.time()
+    emergency_stats.load(
+        await event_store.counts_by_stop("emergency", now - emergency_stats.span, now + 1, LOAD_BUCKET)
+    )
+    await bus.start(sequence_message, deliver_message)
+    presence.start()
+    notice_sync.start()
+    # 첫 요청이 이벤트 루프에서 정류장 목록 응답과 클러스터 색인을 만들지 않도록 미리 생성
+    await asyncio.get_running_loop().run_in_executor(None, _prepare_bus_stop_data)
+    bus_stop_watcher = asyncio.create_task(watch_bus_stop_data())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    bus_stop_watcher.cancel()
+    # 병합 창에 남은 추가 누름을 버스가 닫히기 전에 보냄
+    await emergency_ingest.close()
+    presence.close()
+    notice_sync.close()
+    await bus.close()
+    await manager.close()
+    await event_store.close()
+    stop_logging()
 
 
 @app.get("/")
@@ -48,9 +329,166 @@ async def root():
     return {"message": "고흥시 버스정류장 관리 시스템 API"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 수집용 지표 (워커별 값)"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/api/bus-stops")
-async def get_bus_stops():
-    return get_all_bus_stops()
+async def get_bus_stops(request: Request):
+    return bus_stops_cache.response(request)
+
+
+@app.get("/api/bus-stops/nearest")
+async def get_nearest_stops(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(5, ge=1, le=100),
+):
+    """
+    좌표에서 가장 가까운 정류장 목록을 조회하는 API 엔드포인트
+    """
+    return [
+        {**stop, "distance": round(distance, 1)}
+        for distance, stop in get_nearest_bus_stops(lat, lng, limit)
+    ]
+
+
+@app.get("/api/bus-stops/within")
+async def get_stops_within(min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+    """
+    경계 상자(남서쪽~북동쪽 좌표) 안의 정류장 목록을 조회하는 API 엔드포인트
+    """
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(
+            status_code=400, detail="경계 상자의 최소 좌표가 최대 좌표보다 큽니다."
+        )
+    return get_bus_stops_in_bounds(min_lat, min_lng, max_lat, max_lng)
+
+
+@app.get("/api/bus-stops/clusters")
+async def get_stop_clusters(
+    level: int = Query(..., ge=MIN_LEVEL, le=MAX_LEVEL),
+    min_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    max_lng: Optional[float] = None,
+):
+    """
+    지도 확대 레벨(카카오맵 레벨 1~14)의 정류장 클러스터를 조회하는 API 엔드포인트
+
+    경계 상자를 주면 화면에 걸친 클러스터만 반환합니다(가장 확대한 레벨 1~3은 필수).
+    정류장이 하나뿐인 클러스터는 정류장 ID와 이름을, 나머지는 정류장 수와 중심점,
+    범위를 담습니다.
+    """
+    bounds = _parse_bounds(min_lat, min_lng, max_lat, max_lng)
+    if bounds is None and level < INDEXED_MIN_LEVEL:
+        raise HTTPException(
+            status_code=400,
+            detail=f"레벨 {INDEXED_MIN_LEVEL} 미만은 경계 상자(min_lat, min_lng, max_lat, max_lng)가 필요합니다.",
+        )
+    return {
+        "version": get_bus_stops_version(),
+        "level": level,
+        "cellSize": cell_size(level),
+        "clusters": get_bus_stop_clusters(level, bounds),
+    }
+
+
+def _parse_bounds(min_lat, min_lng, max_lat, max_lng):
+    # 경계 상자 쿼리 값 확인 - 모두 없으면 None
+    corners = (min_lat, min_lng, max_lat, max_lng)
+    if all(value is None for value in corners):
+        return None
+    if any(value is None for value in corners):
+        raise HTTPException(
+            status_code=400, detail="경계 상자는 최소/최대 위도와 경도를 모두 지정해야 합니다."
+        )
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="경계 상자의 최소 좌표가 최대 좌표보다 큽니다.")
+    return corners
+
+
+@app.get("/api/emergency-stats")
+async def get_emergency_stats(
+    window: str = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bucket: int = Query(3600, ge=60),
+    min_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    max_lng: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    정류장별 긴급 알림 수를 조회하는 API 엔드포인트 (지도 히트맵용)
+
+    기본은 최근 창(window: hour, day, week)의 알림 수로, 메모리의 이동 창 카운터에서
+    바로 읽습니다. since(및 until)를 주면 저장된 이벤트에서 그 구간을 집계하고,
+    bucket초 단위의 전체 알림 수 추이(series)도 함께 반환합니다.
+    경계 상자를 주면 그 안의 정류장만, limit을 주면 알림이 많은 순으로 그 수만큼 반환합니다.
+    """
+    bounds = _parse_bounds(min_lat, min_lng, max_lat, max_lng)
+    now = time.time()
+
+    if since is None:
+        if until is not None:
+            raise HTTPException(status_code=400, detail="until은 since와 함께 지정해야 합니다.")
+        if window not in WINDOWS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"window는 {', '.join(WINDOWS)} 중 하나여야 합니다.",
+            )
+        emergency_stats.prune(now)
+        stops = heatmap_points(emergency_stats.counts(window, now), get_bus_stop_by_id, bounds, limit)
+        return {
+            "window": window,
+            "generatedAt": datetime.fromtimestamp(now).isoformat(),
+            "total": sum(stop["count"] for stop in stops),
+            "stops": stops,
+        }
+
+    start = since.timestamp()
+    end = until.timestamp() if until is not None else now
+    if start >= end:
+        raise HTTPException(status_code=400, detail="since는 until보다 이전이어야 합니다.")
+    counts, series = await _emergency_history(start, end, bucket, now)
+    stops = heatmap_points(counts, get_bus_stop_by_id, bounds, limit)
+    return {
+        "since": datetime.fromtimestamp(start).isoformat(),
+        "until": datetime.fromtimestamp(end).isoformat(),
+        "bucket": bucket,
+        "total": sum(stop["count"] for stop in stops),
+        "stops": stops,
+        "series": series,
+    }
+
+
+async def _emergency_history(start: float, end: float, bucket: int, now: float):
+    # 끝난 구간(기록 지연을 감안해 1분 전까지)의 결과만 재사용
+    key = (start, end, bucket)
+    cached = emergency_history_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = await event_store.counts_by_stop("emergency", start, end, bucket)
+    counts: Dict[int, int] = {}
+    totals: Dict[float, int] = {}
+    for bus_stop_id, at, count in rows:
+        counts[bus_stop_id] = counts.get(bus_stop_id, 0) + count
+        totals[at] = totals.get(at, 0) + count
+    series = [
+        {"at": datetime.fromtimestamp(at).isoformat(), "count": totals[at]} for at in sorted(totals)
+    ]
+    result = (counts, series)
+
+    if end < now - 60:
+        if len(emergency_history_cache) >= EMERGENCY_HISTORY_CACHE_SIZE:
+            emergency_history_cache.pop(next(iter(emergency_history_cache)))
+        emergency_history_cache[key] = result
+    return result
 
 
 @app.get("/api/health")
@@ -59,100 +497,259 @@ async def health_check():
     return {"status": "ok", "timestamp": datetime.now().isoformat()}
 
 
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return value.split(",") if value is not None else None
+
+
 @app.websocket("/ws/emergency")
-async def emergency_notification(websocket: WebSocket):
-    await manager.connect(websocket)
+async def emergency_notification(
+    websocket: WebSocket,
+    since: Optional[int] = None,
+    types: Optional[str] = None,
+    stops: Optional[str] = None,
+    bbox: Optional[str] = None,
+):
+    """
+    긴급 알림 WebSocket
+
+    재접속 시 마지막으로 받은 알림의 순번을 since로 넘기면 그 이후 알림을 먼저 받습니다.
+
+    구독 조건을 지정하면 해당하는 메시지만 받습니다 (지정하지 않으면 모든 정류장의
+    긴급 알림과 장치 접속 상태).
+    - types: 메시지 종류 (emergency, meeting, presence), 예) types=emergency,meeting
+    - stops: 정류장 ID 목록, 예) stops=1,2,3
+    - bbox: 지역 경계 상자 (최소 위도, 최소 경도, 최대 위도, 최대 경도)
+    연결 후에는 {"action": "subscribe", "types": [...], "stops": [...], "bbox": [...]}
+    메시지로 구독 조건을 바꿀 수 있습니다 (바이너리 클라이언트도 JSON 텍스트로 보냄).
+
+    하위 프로토콜 busstop.v1.msgpack을 제시하면 MessagePack 바이너리 프레임으로 받습니다
+    (app.frames 참고).
+    """
+    try:
+        subscription = Subscription.parse(_split(types), _split(stops), _split(bbox))
+    except ValueError as e:
+        await websocket.accept()
+        await websocket.send_json({"type": "error", "message": str(e)})
+        # 1008: Policy Violation
+        await websocket.close(code=1008)
+        return
+
+    async def replay():
+        current = subscriptions.get(websocket)
+        if EMERGENCY not in current.types:
+            return []
+        alerts = [
+            alert
+            for alert in await event_store.since(since, EVENT_REPLAY_LIMIT)
+            if current.matches(EMERGENCY, _alert_target(alert))
+        ]
+        return [encode_alert_frame(alerts, snapshot=True)] if alerts else []
+
+    # 연결 등록 전에 구독을 먼저 지정해 처음부터 조건에 맞는 메시지만 대기열에 쌓이게 함
+    subscriptions.subscribe(websocket, subscription)
+    await manager.connect(websocket, replay if since is not None else None)
+    WS_CONNECTIONS.inc(1, "emergency")
     try:
         while True:
-            data = await websocket.receive_text()
-            # 긴급 버튼 이벤트 처리
-            await manager.broadcast(data)
+            message = await websocket.receive_text()
+            await manager.send([(_handle_subscription_message(websocket, message), [websocket])])
     except WebSocketDisconnect:
+        pass
+    finally:
+        WS_CONNECTIONS.dec(1, "emergency")
         manager.disconnect(websocket)
+        subscriptions.unsubscribe(websocket)
+
+
+def _handle_subscription_message(websocket: WebSocket, message: str) -> Frame:
+    """클라이언트가 보낸 구독 변경 요청을 처리하고 응답 프레임을 반환합니다."""
+    try:
+        try:
+            request = json.loads(message)
+        except ValueError:
+            raise ValueError("요청이 JSON 형식이 아닙니다.")
+        if not isinstance(request, dict) or request.get("action") != "subscribe":
+            raise ValueError('지원하지 않는 요청입니다. {"action": "subscribe", ...}만 사용할 수 있습니다.')
+        subscription = Subscription.parse(
+            request.get("types"), request.get("stops"), request.get("bbox")
+        )
+    except ValueError as e:
+        return Frame({"type": "error", "message": str(e)})
+    subscriptions.subscribe(websocket, subscription)
+    return Frame({"type": "subscribed", "subscription": subscription.to_dict()})
+
+
+async def publish_heartbeat(bus_stop_id: int, info: Optional[Dict[str, Any]] = None):
+    await bus.publish(
+        "presence",
+        {"busStopId": bus_stop_id, "online": True, "at": time.time(), "info": info or {}},
+    )
+
+
+# 정류장 장치 하트비트 API
+@app.post("/api/devices/{bus_stop_id}/heartbeat")
+async def device_heartbeat(bus_stop_id: int, info: Optional[Dict[str, Any]] = None):
+    """
+    정류장 장치가 주기적으로 호출하는 하트비트 API 엔드포인트
+
+    PRESENCE_TIMEOUT초 안에 다음 하트비트가 없으면 오프라인으로 처리됩니다.
+    본문에는 배터리, 펌웨어 버전 같은 장치 정보를 담을 수 있습니다.
+    """
+    _find_bus_stop(bus_stop_id)
+    device_log.info("장치 하트비트", extra={"busStopId": bus_stop_id})
+    await publish_heartbeat(bus_stop_id, info)
+    return {"status": "ok", "timeout": PRESENCE_TIMEOUT}
+
+
+@app.websocket("/ws/device/{bus_stop_id}")
+async def device_channel(websocket: WebSocket, bus_stop_id: int):
+    """
+    정류장 장치용 하트비트 WebSocket
+
+    연결과 이후 받는 메시지마다 하트비트로 처리합니다. 메시지가 JSON 객체면 장치 정보로
+    저장합니다. 연결이 끊기면 만료를 기다리지 않고 바로 오프라인 처리합니다.
+    """
+    await websocket.accept()
+    if not get_bus_stop_by_id(bus_stop_id):
+        # 1008: Policy Violation
+        await websocket.close(code=1008)
+        return
+
+    await publish_heartbeat(bus_stop_id)
+    WS_CONNECTIONS.inc(1, "device")
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                info = json.loads(message)
+            except ValueError:
+                info = None
+            await publish_heartbeat(bus_stop_id, info if isinstance(info, dict) else None)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        WS_CONNECTIONS.dec(1, "device")
+        await bus.publish("presence", {"busStopId": bus_stop_id, "online": False})
+
+
+# 정류장 장치 접속 상태 조회 API
+@app.get("/api/devices")
+async def list_devices():
+    """
+    하트비트를 보낸 적이 있는 모든 장치의 접속 상태를 조회하는 API 엔드포인트
+
+    대시보드는 처음에 이 목록을 받고, 이후 변경분은 /ws/emergency로 받습니다.
+    """
+    devices = []
+    for device in presence.snapshot():
+        bus_stop = get_bus_stop_by_id(device["busStopId"])
+        devices.append({**device, "busStopName": bus_stop["name"] if bus_stop else None})
+    return devices
 
 
 # 긴급 버튼 신호 시뮬레이션용 API - 디바이스에서도 이 엔드포인트를 호출하도록 함
 @app.post("/api/simulate-emergency/{bus_stop_id}")
-async def simulate_emergency(bus_stop_id: int):
-    print(f"비상 알림 수신: 정류장 ID {bus_stop_id}")
+async def simulate_emergency(bus_stop_id: int, request: Request):
+    _check_rate_limit(emergency_limiter, "simulate_emergency", bus_stop_id, request)
     bus_stop = get_bus_stop_by_id(bus_stop_id)
     if bus_stop:
-        # WebSocket을 통해 클라이언트에 알림
-        await manager.broadcast(
-            json.dumps(
-                {
-                    "busStopId": bus_stop["id"],
-                    "busStopName": bus_stop["name"],
-                    "lat": bus_stop["lat"],
-                    "lng": bus_stop["lng"],
-                    "timestamp": datetime.now().isoformat(),  # 서버에서 시간 생성
-                }
-            )
+        # 수집 단계에서 반복 누름을 병합한 뒤 WebSocket으로 클라이언트에 알림
+        alert = emergency_ingest.submit(
+            {
+                "busStopId": bus_stop["id"],
+                "busStopName": bus_stop["name"],
+                "lat": bus_stop["lat"],
+                "lng": bus_stop["lng"],
+                "timestamp": datetime.now().isoformat(),  # 서버에서 시간 생성
+            }
+        )
+        EMERGENCY_ALERTS.inc(1, str(alert["coalesced"]).lower())
+        log.info(
+            "반복 비상 알림 병합" if alert["coalesced"] else "비상 알림 전송 완료",
+            extra={
+                "busStopId": bus_stop["id"],
+                "busStopName": bus_stop["name"],
+                "pressCount": alert["pressCount"],
+            },
         )
-        print(f"비상 알림 전송 완료: {bus_stop['name']}")
-        return {"message": f"Emergency signal sent for bus stop: {bus_stop['name']}"}
+        return {
+            "message": f"Emergency signal sent for bus stop: {bus_stop['name']}",
+            "pressCount": alert["pressCount"],
+            "coalesced": alert["coalesced"],
+            # 알림의 서버 시각 - 같은 정류장의 알림을 구분하는 값 (부하 테스트에서 수신과 짝지음)
+            "timestamp": alert["timestamp"],
+        }
 
-    print(f"버스 정류장을 찾을 수 없음: ID {bus_stop_id}")
+    log.warning("비상 알림: 버스 정류장을 찾을 수 없음", extra={"busStopId": bus_stop_id})
     return {"error": "Bus stop not found"}
 
 
-@app.post("/update-notices")
+@app.post("/update-notices", status_code=202)
 async def update_notices(request_data: Dict[str, Any]):
     """
-    게시판 데이터를 업데이트하는 API 엔드포인트
+    게시판 데이터 업데이트를 요청하는 API 엔드포인트
 
-    이 엔드포인트는 실제 구현이 완료되면 외부 시스템에서 공지사항을 가져와 업데이트합니다.
-    현재는 임시로 50% 확률로 성공 또는 실패를 반환합니다.
+    외부 게시판을 가져오는 동기화 작업을 등록하고 작업 ID를 바로 반환합니다.
+    이미 대기 중이거나 실행 중인 작업이 있으면 그 작업에 합류합니다.
+    진행 상황은 /api/notices/jobs/{job_id}, 결과는 /api/notices로 조회합니다.
     """
-    try:
-        # 요청 시간 로깅
-        print(
-            f"게시판 업데이트 요청 받음: {request_data.get('requestTime', '시간 정보 없음')}"
-        )
+    job, created = await notice_sync.submit("manual", request_data.get("requestTime"))
+    log.info(
+        "게시판 업데이트 요청 받음",
+        extra={"jobId": job["id"], "joined": not created, "requestTime": request_data.get("requestTime")},
+    )
+    return {
+        "jobId": job["id"],
+        "status": job["status"],
+        "joined": not created,
+        "statusUrl": f"/api/notices/jobs/{job['id']}",
+    }
 
-        # 임의로 성공 또는 실패 결정 (테스트용)
-        # 실제 구현에서는 이 부분을 실제 게시판 업데이트 로직으로 대체
-        if random.random() > 0.5:  # 50% 확률로 성공
-            # 성공 응답
-            return {
-                "status": "success",
-                "message": "게시판 데이터가 성공적으로 업데이트되었습니다.",
-                "updatedAt": datetime.now().isoformat(),
-                "count": random.randint(1, 10),  # 임의의 업데이트 항목 수
-            }
-        else:
-            # 에러 발생 시뮬레이션
-            raise HTTPException(
-                status_code=500,
-                detail="게시판 데이터를 가져오는 중 서버 오류가 발생했습니다.",
-            )
 
-    except Exception as e:
-        # 에러 로깅
-        print(f"게시판 업데이트 처리 중 오류 발생: {str(e)}")
-        traceback.print_exc()
+# 게시판 동기화 작업 상태 조회 API
+@app.get("/api/notices/jobs/{job_id}")
+async def get_notice_job(job_id: str):
+    job = notice_sync.job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"ID가 {job_id}인 동기화 작업을 찾을 수 없습니다.")
+    return job
 
-        # 클라이언트에 에러 응답
-        raise HTTPException(
-            status_code=500, detail=f"게시판 업데이트에 실패했습니다: {str(e)}"
-        )
+
+# 동기화된 게시판 공지 목록 조회 API
+@app.get("/api/notices")
+async def list_notices():
+    return notice_sync.notices_response()
 
 
 # 웹엑스 미팅 정보 저장 API (간소화 버전)
 @app.post("/api/webex-meeting")
-async def create_webex_meeting(meeting_info: Dict[str, Any]):
+async def create_webex_meeting(meeting_info: Dict[str, Any], request: Request):
     """
     웹엑스 미팅 정보를 저장하는 API 엔드포인트
+
+    busStopId를 지정하면 그 정류장 전용 미팅으로, 지정하지 않으면 모든 정류장에 적용되는
+    기본 미팅으로 저장합니다.
     """
-    global webex_meeting_info
+    # 빈도 제한 키가 정류장마다 하나가 되도록 정류장 ID를 먼저 정수로 확인 (기본 미팅은 None)
+    bus_stop_id = None
+    if meeting_info.get("busStopId") is not None:
+        try:
+            bus_stop_id = int(meeting_info["busStopId"])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="정류장 ID가 올바르지 않습니다.")
+    _check_rate_limit(meeting_limiter, "webex_meeting", bus_stop_id, request)
     try:
-        # 요청 내용 로깅
-        print(f"웹엑스 미팅 정보 저장 요청: {meeting_info}")
-
         # 미팅 URL 필수 확인
         if "url" not in meeting_info or not meeting_info["url"]:
             raise HTTPException(status_code=400, detail="웹엑스 미팅 URL이 필요합니다.")
 
+        # 정류장 전용 미팅이면 정류장 확인
+        if bus_stop_id is not None:
+            bus_stop = _find_bus_stop(bus_stop_id)
+            meeting_info["busStopId"] = bus_stop["id"]
+        else:
+            meeting_info.pop("busStopId", None)
+
         # 생성 시간은 서버에서 생성
         if "created" not in meeting_info:
             meeting_info["created"] = datetime.now().isoformat()
@@ -161,16 +758,19 @@ async def create_webex_meeting(meeting_info: Dict[str, Any]):
         if "active" not in meeting_info:
             meeting_info["active"] = True
 
-        # 미팅 정보 저장
-        webex_meeting_info = meeting_info
+        # 미팅 정보 저장 (버스를 통해 모든 워커에 반영)
+        await bus.publish("meeting", meeting_info)
 
-        print(f"웹엑스 미팅 정보 저장 완료: {webex_meeting_info}")
+        log.info(
+            "웹엑스 미팅 정보 저장 완료",
+            extra={"busStopId": meeting_info.get("busStopId"), "url": meeting_info["url"]},
+        )
 
         return {
             "status": "success",
             "message": "웹엑스 미팅 정보가 성공적으로 저장되었습니다.",
             "timestamp": datetime.now().isoformat(),
-            **webex_meeting_info,
+            **meeting_info,
         }
 
     except HTTPException as http_ex:
@@ -178,8 +778,7 @@ async def create_webex_meeting(meeting_info: Dict[str, Any]):
         raise http_ex
     except Exception as e:
         # 에러 로깅
-        print(f"웹엑스 미팅 정보 저장 중 오류 발생: {str(e)}")
-        traceback.print_exc()
+        log.exception("웹엑스 미팅 정보 저장 중 오류 발생")
 
         # 클라이언트에 에러 응답
         raise HTTPException(
@@ -189,24 +788,29 @@ async def create_webex_meeting(meeting_info: Dict[str, Any]):
 
 # 웹엑스 미팅 정보 조회 API
 @app.get("/api/webex-meeting")
-async def get_webex_meeting():
+async def get_webex_meeting(bus_stop_id: Optional[int] = None):
     """
     현재 활성화된 웹엑스 미팅 정보를 조회하는 API 엔드포인트
+
+    bus_stop_id를 지정하면 그 정류장 전용 미팅을, 아니면 기본 미팅을 조회합니다.
     """
-    if webex_meeting_info and webex_meeting_info.get("active", False):
-        return webex_meeting_info
+    meeting = meetings.meeting(bus_stop_id)
+    if meeting and meeting.get("active", False):
+        return meeting
     else:
         return {"active": False, "message": "활성화된 미팅이 없습니다."}
 
 
-# 디바이스에서 사용할 웹엑스 미팅 정보 조회 API (간소화 버전)
-@app.get("/api/webex-meeting/{bus_stop_id}")
-async def get_webex_meeting_for_device(bus_stop_id: int):
+# 활성화된 모든 웹엑스 미팅 조회 API
+@app.get("/api/webex-meetings")
+async def list_webex_meetings():
     """
-    특정 정류장에서 사용할 웹엑스 미팅 정보를 조회하는 API 엔드포인트
+    기본 미팅과 정류장별 미팅 중 활성화된 미팅 목록을 조회하는 API 엔드포인트
     """
-    print(f"미팅 정보 요청: 정류장 ID {bus_stop_id}")
+    return meetings.active()
+
 
+def _find_bus_stop(bus_stop_id: int):
     # 요청한 정류장이 존재하는지 확인
     bus_stop = get_bus_stop_by_id(bus_stop_id)
     if not bus_stop:
@@ -214,38 +818,111 @@ async def get_webex_meeting_for_device(bus_stop_id: int):
             status_code=404,
             detail=f"ID가 {bus_stop_id}인 버스 정류장을 찾을 수 없습니다.",
         )
+    return bus_stop
 
-    # 활성화된 미팅이 있는지 확인
-    if not webex_meeting_info or not webex_meeting_info.get("active", False):
+
+def _device_meeting_response(bus_stop: Dict[str, Any], state: Dict[str, Any]):
+    if not state["active"]:
         return {
             "active": False,
             "message": "활성화된 미팅이 없습니다.",
             "busStopName": bus_stop["name"],
+            "revision": state["revision"],
         }
 
     # 미팅 정보 반환 (URL만 반환)
     return {
         "active": True,
-        "url": webex_meeting_info.get("url", ""),
+        "url": state["url"],
         "busStopName": bus_stop["name"],
-        "busStopId": bus_stop_id,
+        "busStopId": bus_stop["id"],
+        "revision": state["revision"],
     }
 
 
+# 디바이스에서 사용할 웹엑스 미팅 정보 조회 API (간소화 버전)
+@app.get("/api/webex-meeting/{bus_stop_id}")
+async def get_webex_meeting_for_device(
+    bus_stop_id: int,
+    revision: Optional[int] = None,
+    wait: float = Query(0, ge=0, le=MEETING_WAIT_MAX),
+):
+    """
+    특정 정류장에서 사용할 웹엑스 미팅 정보를 조회하는 API 엔드포인트
+
+    롱 폴링: 마지막으로 받은 revision과 wait(초)를 넘기면 미팅이 열리거나 닫힐 때 바로,
+    아니면 wait초 뒤에 현재 상태를 응답합니다.
+    """
+    bus_stop = _find_bus_stop(bus_stop_id)
+    device_log.info("미팅 상태 조회", extra={"busStopId": bus_stop_id, "wait": wait})
+    if revision is None or not wait:
+        state = meetings.state(bus_stop_id)
+    else:
+        state = await meetings.wait(bus_stop_id, revision, timeout=wait)
+    return _device_meeting_response(bus_stop, state)
+
+
+@app.websocket("/ws/webex-meeting/{bus_stop_id}")
+async def webex_meeting_channel(websocket: WebSocket, bus_stop_id: int):
+    """
+    키오스크용 미팅 상태 WebSocket
+
+    연결 직후 현재 상태를 보내고, 이후에는 정류장의 미팅이 열리거나 닫힐 때마다 보냅니다.
+    """
+    await websocket.accept()
+    bus_stop = get_bus_stop_by_id(bus_stop_id)
+    if not bus_stop:
+        # 1008: Policy Violation
+        await websocket.close(code=1008)
+        return
+
+    async def push():
+        revision = None
+        try:
+            while True:
+                state = await meetings.wait(bus_stop_id, revision)
+                revision = state["revision"]
+                await websocket.send_json(_device_meeting_response(bus_stop, state))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(
+                "미팅 상태 전송 실패", extra={"busStopId": bus_stop_id, "error": str(e)}
+            )
+
+    sender = asyncio.create_task(push())
+    WS_CONNECTIONS.inc(1, "meeting")
+    try:
+        # 키오스크는 메시지를 보내지 않음 - 연결 종료 감지용
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        WS_CONNECTIONS.dec(1, "meeting")
+        sender.cancel()
+
+
 # 웹엑스 미팅 종료 API
 @app.delete("/api/webex-meeting")
-async def delete_webex_meeting():
+async def delete_webex_meeting(bus_stop_id: Optional[int] = None):
     """
     웹엑스 미팅을 종료하는 API 엔드포인트
-    """
-    global webex_meeting_info
 
-    if webex_meeting_info:
-        # 비활성화 처리
-        webex_meeting_info["active"] = False
-        webex_meeting_info["ended"] = datetime.now().isoformat()
+    bus_stop_id를 지정하면 그 정류장 전용 미팅을, 아니면 기본 미팅을 종료합니다.
+    """
+    meeting = meetings.meeting(bus_stop_id)
+    if meeting and meeting.get("active", False):
+        # 비활성화 처리 (버스를 통해 모든 워커에 반영)
+        ended_meeting = {
+            **meeting,
+            "active": False,
+            "ended": datetime.now().isoformat(),
+        }
+        ended_meeting.pop("revision", None)
+        await bus.publish("meeting", ended_meeting)
 
-        print(f"웹엑스 미팅 종료: {webex_meeting_info}")
+        log.info("웹엑스 미팅 종료", extra={"busStopId": ended_meeting.get("busStopId")})
 
         return {
             "status": "success",
@@ -0,0 +1,108 @@
+"""
+정류장별 웹엑스 미팅 레지스트리
+
+여러 정류장에서 동시에 긴급 상황이 생겨도 정류장마다 따로 미팅을 열 수 있도록 미팅
+정보를 정류장 ID별로 보관합니다. 정류장을 지정하지 않은 미팅은 기본 미팅으로, 자기
+미팅이 없는 모든 정류장에 적용됩니다.
+
+상태는 메시지 버스로 받은 변경만 이벤트 루프 안에서 apply()로 반영하므로 잠금 없이도
+요청 처리 중에 반쯤 바뀐 상태가 보이지 않습니다. 키오스크는 wait()로 자기 정류장의
+미팅이 열리거나 닫히는 순간까지 기다릴 수 있습니다(롱 폴링, WebSocket).
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from app.frames import Frame
+
+# 정류장을 지정하지 않은 기본 미팅의 키
+DEFAULT_MEETING = None
+
+
+class MeetingRegistry:
+    def __init__(self):
+        self._meetings: Dict[Optional[int], Dict[str, Any]] = {}
+        self._waiters: Dict[Optional[int], Set[asyncio.Future]] = {}
+        self._last_revision = 0
+
+    def stamp(self, meeting: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        변경에 단조 증가하는 revision을 붙입니다. 버스 허브에서 한 번만 호출합니다.
+
+        허브가 바뀌어도 순서가 유지되도록 마이크로초 단위 시각을 기준으로 합니다.
+        """
+        self._last_revision = max(self._last_revision + 1, time.time_ns() // 1000)
+        return {**meeting, "revision": self._last_revision}
+
+    def apply(self, meeting: Dict[str, Any]):
+        """미팅 생성/종료를 반영하고 해당 정류장(기본 미팅이면 모든 정류장)의 대기자를 깨웁니다."""
+        key = meeting.get("busStopId", DEFAULT_MEETING)
+        self._meetings[key] = meeting
+        self._last_revision = max(self._last_revision, meeting.get("revision", 0))
+
+        if key is DEFAULT_MEETING:
+            waiters = [future for futures in self._waiters.values() for future in futures]
+        else:
+            waiters = list(self._waiters.get(key, ()))
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    def meeting(self, bus_stop_id: Optional[int] = DEFAULT_MEETING) -> Optional[Dict[str, Any]]:
+        """해당 키로 저장된 미팅 정보 (종료된 미팅 포함). 기본 미팅은 적용하지 않습니다."""
+        return self._meetings.get(bus_stop_id)
+
+    def active(self) -> List[Dict[str, Any]]:
+        """현재 활성화된 모든 미팅"""
+        return [meeting for meeting in self._meetings.values() if meeting.get("active")]
+
+    def state(self, bus_stop_id: int) -> Dict[str, Any]:
+        """
+        정류장에 적용되는 미팅 상태
+
+        정류장 미팅이 활성화되어 있으면 그것을, 아니면 활성화된 기본 미팅을 반환합니다.
+        revision은 두 미팅 중 하나라도 바뀌면 달라집니다.
+        """
+        own = self._meetings.get(bus_stop_id)
+        default = self._meetings.get(DEFAULT_MEETING)
+        revision = max(
+            own.get("revision", 0) if own else 0,
+            default.get("revision", 0) if default else 0,
+        )
+        for meeting in (own, default):
+            if meeting and meeting.get("active", False):
+                return {"active": True, "url": meeting.get("url", ""), "revision": revision}
+        return {"active": False, "revision": revision}
+
+    async def wait(
+        self, bus_stop_id: int, revision: Optional[int] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        정류장의 미팅 상태를 반환합니다.
+
+        revision이 현재 상태와 같으면 상태가 바뀌거나 timeout(초)이 지날 때까지 기다립니다.
+        revision이 없거나 이미 다르면 바로 반환하므로, 마지막으로 받은 revision을 넘기면
+        요청 사이에 일어난 변경도 놓치지 않습니다.
+        """
+        current = self.state(bus_stop_id)
+        if revision is None or current["revision"] != revision:
+            return current
+
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(bus_stop_id, set())
+        waiters.add(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters.discard(future)
+            if not waiters and self._waiters.get(bus_stop_id) is waiters:
+                del self._waiters[bus_stop_id]
+        return self.state(bus_stop_id)
+
+
+def encode_meeting_frame(meeting: Dict[str, Any]) -> Frame:
+    """미팅 변경을 /ws/emergency 프레임 하나로 만듭니다 (미팅 구독자에게 전송)."""
+    return Frame({"type": "meeting", "meeting": meeting})
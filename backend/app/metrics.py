@@ -0,0 +1,334 @@
+"""
+프로세스 내 지표(metrics) 레지스트리와 Prometheus 텍스트 형식 출력
+
+별도 의존성 없이 카운터/게이지/히스토그램만 제공합니다. 값 기록은 이벤트 루프 안에서
+덧셈 몇 번으로 끝나며(히스토그램은 구간 이진 탐색 한 번), 텍스트 변환은 /metrics를
+수집할 때만 합니다. 값이 필요할 때 계산하는 게이지는 함수를 넘겨 만듭니다.
+
+여러 워커로 실행하면 지표는 워커마다 따로 집계됩니다.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from app.config import BUS_STOPS_DATA_FILE
+
+# 요청 지연 등 초 단위 지표의 기본 구간
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Starlette가 text/ 응답에 charset을 붙여 줌
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labelvalues: Sequence[str]) -> LabelValues:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블 {self.labelnames}의 값이 필요합니다.")
+        return tuple(str(value) for value in labelvalues)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+GaugeValue = Union[float, Dict[LabelValues, float]]
+
+
+class _ValueMetric(_Metric):
+    """
+    레이블 조합마다 값 하나를 갖는 지표
+
+    function을 주면 수집할 때 호출해 값을 얻습니다. 레이블이 있으면 function은
+    {레이블 값 튜플: 값} 딕셔너리를 반환해야 합니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], GaugeValue]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def inc(self, amount: float = 1, *labelvalues: str):
+        key = labelvalues if labelvalues in self._values else self._key(labelvalues)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        values = self._values
+        if self._function is not None:
+            result = self._function()
+            if result is None:
+                return
+            values = result if isinstance(result, dict) else {(): result}
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(_ValueMetric):
+    """단조 증가하는 누적 값"""
+
+    type = "counter"
+
+
+class Gauge(_ValueMetric):
+    """현재 값"""
+
+    type = "gauge"
+
+    def set(self, value: float, *labelvalues: str):
+        self._values[self._key(labelvalues)] = value
+
+    def dec(self, amount: float = 1, *labelvalues: str):
+        self.inc(-amount, *labelvalues)
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        # 구간별(누적 아님) 개수, 마지막 칸은 +Inf
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """구간별 관측 횟수와 합계"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        key = labelvalues if labelvalues in self._series else self._key(labelvalues)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def _samples(self):
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    function: Optional[Callable[[], GaugeValue]] = None,
+) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames, function))
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    function: Optional[Callable[[], GaugeValue]] = None,
+) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, function))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# 애플리케이션 공통 지표
+
+HTTP_REQUEST_DURATION = histogram(
+    "busstop_http_request_duration_seconds",
+    "HTTP 요청 처리 시간 (라우트별)",
+    ("method", "route", "status"),
+)
+
+EMERGENCY_ALERTS = counter(
+    "busstop_emergency_alerts_total",
+    "수신한 긴급 버튼 누름 수 (병합 여부별)",
+    ("coalesced",),
+)
+
+EMERGENCY_FANOUT_DURATION = histogram(
+    "busstop_emergency_fanout_seconds",
+    "긴급 알림 수신(POST)부터 마지막 WebSocket 전송 완료까지 걸린 시간 (병합 창의 갱신 알림 제외)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+WS_SEND_QUEUE_DEPTH = histogram(
+    "busstop_ws_send_queue_depth",
+    "메시지를 넣을 때 연결별 송신 대기열에 이미 쌓여 있던 메시지 수",
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+WS_CONNECTIONS = gauge(
+    "busstop_websocket_connections",
+    "열려 있는 WebSocket 연결 수 (채널별)",
+    ("channel",),
+)
+
+BUS_STOPS_RELOAD_DURATION = histogram(
+    "busstop_bus_stops_reload_seconds",
+    "정류장 데이터 파일 변경을 확인하고 레지스트리를 교체하는 데 걸린 시간",
+)
+
+
+def _sync_stats_gauge(read: Callable[[dict], Optional[GaugeValue]]):
+    """TAGO 동기화 스크립트가 남긴 결과 파일을 수집 시점에 읽는 게이지 함수"""
+
+    def function():
+        # 순환 import를 피하려고 여기서 가져옴
+        from app.data.loader import read_sync_stats
+
+        stats = read_sync_stats(BUS_STOPS_DATA_FILE)
+        return read(stats) if stats else None
+
+    return function
+
+
+gauge(
+    "busstop_tago_sync_duration_seconds",
+    "마지막 TAGO 동기화 단계별 소요 시간",
+    ("phase",),
+    function=_sync_stats_gauge(
+        lambda stats: {(phase,): seconds for phase, seconds in stats["durations"].items()}
+    ),
+)
+
+gauge(
+    "busstop_tago_sync_last_run_timestamp_seconds",
+    "마지막 TAGO 동기화가 끝난 시각 (유닉스 시간)",
+    function=_sync_stats_gauge(lambda stats: stats["finished_at"]),
+)
+
+gauge(
+    "busstop_tago_sync_success",
+    "마지막 TAGO 동기화 성공 여부 (1: 성공, 0: 실패)",
+    function=_sync_stats_gauge(lambda stats: 1 if stats["status"] == "success" else 0),
+)
+
+class MetricsMiddleware:
+    """
+    HTTP 요청 처리 시간을 라우트 경로 템플릿별로 기록하는 ASGI 미들웨어
+
+    레이블에 실제 경로 대신 라우트 템플릿(/api/webex-meeting/{bus_stop_id})을 써서
+    시계열 수가 정류장 수에 따라 늘어나지 않게 합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
+
+
+PROCESS_START_TIME = time.time()
+
+gauge(
+    "process_start_time_seconds",
+    "프로세스 시작 시각 (유닉스 시간)",
+    function=lambda: PROCESS_START_TIME,
+)
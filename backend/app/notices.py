@@ -0,0 +1,305 @@
+"""
+게시판(공지사항) 동기화 작업 스케줄러
+
+/update-notices는 외부 게시판을 직접 가져오지 않고 동기화 작업을 등록한 뒤 작업 ID를
+바로 반환합니다. 작업은 백그라운드에서 한 번에 하나씩 실행되며, 대기 중이거나 실행
+중인 작업이 있으면 새 요청은 그 작업에 합류합니다(single-flight). 여러 번 눌러도
+외부 게시판은 한 번만 가져옵니다.
+
+가져오기는 조건부 요청(ETag/Last-Modified)으로 하고, 내용이 바뀌지 않은 게시판은
+캐시를 그대로 둡니다.
+
+작업 상태와 가져온 공지 목록은 메시지 버스로 모든 워커에 전달되므로, 여러 워커로
+실행해도 어느 워커에서든 작업 상태와 공지 목록을 조회할 수 있습니다.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.config import NOTICES_FETCH_TIMEOUT, NOTICES_JOB_HISTORY, NOTICES_SYNC_INTERVAL
+
+log = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCESS = "success"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# 성공한 작업 메시지에 실려 오는 캐시 내용 - 작업 상태 조회에는 포함하지 않음
+_CACHE_FIELDS = ("notices", "etag", "lastModified", "contentHash")
+
+
+class NoticeFetchError(Exception):
+    """게시판을 가져오지 못함"""
+
+
+class FetchResult:
+    """게시판 조회 결과. 바뀌지 않았으면(304) notices는 None"""
+
+    __slots__ = ("notices", "etag", "last_modified")
+
+    def __init__(
+        self,
+        notices: Optional[List[Dict[str, Any]]],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        self.notices = notices
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def modified(self) -> bool:
+        return self.notices is not None
+
+
+def _notices_from(body: Any) -> List[Dict[str, Any]]:
+    # 게시판 응답 구조: {"data": [...]}, {"titles": [...]} 또는 목록 그대로
+    if isinstance(body, dict):
+        for key in ("data", "titles"):
+            if isinstance(body.get(key), list):
+                return body[key]
+    if isinstance(body, list):
+        return body
+    raise NoticeFetchError("게시판 응답에 공지 목록이 없습니다.")
+
+
+def content_hash(notices: List[Dict[str, Any]]) -> str:
+    encoded = json.dumps(notices, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class HTTPNoticeSource:
+    """외부 게시판 HTTP API (조건부 GET)"""
+
+    def __init__(self, url: str, timeout: float = NOTICES_FETCH_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self, etag: Optional[str], last_modified: Optional[str]) -> FetchResult:
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(self.url, headers=headers)
+        except httpx.HTTPError as e:
+            raise NoticeFetchError(f"게시판 요청 실패: {e}")
+
+        if response.status_code == 304:
+            return FetchResult(None, etag, last_modified)
+        if response.status_code != 200:
+            raise NoticeFetchError(f"게시판 응답 오류: HTTP {response.status_code}")
+        try:
+            body = response.json()
+        except ValueError:
+            raise NoticeFetchError("게시판 응답이 JSON 형식이 아닙니다.")
+        return FetchResult(
+            _notices_from(body),
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+        )
+
+
+class LocalNoticeSource:
+    """
+    외부 게시판 대역 (NOTICES_SOURCE_URL이 없을 때 사용)
+
+    실제 게시판처럼 응답이 느리고 가끔 실패하며, 가끔 새 공지가 올라옵니다.
+    ETag를 지원하므로 조건부 요청과 캐시 동작을 그대로 확인할 수 있습니다.
+    """
+
+    def __init__(self, delay: float = 2.0, failure_rate: float = 0.1, change_rate: float = 0.3):
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.change_rate = change_rate
+        self._notices: List[Dict[str, Any]] = [
+            {"title": f"공지사항 {i}", "url": f"https://example.com/notices/{i}"}
+            for i in range(1, 4)
+        ]
+
+    async def fetch(self, etag: Optional[str], last_modified: Optional[str]) -> FetchResult:
+        await asyncio.sleep(self.delay)
+        if random.random() < self.failure_rate:
+            raise NoticeFetchError("게시판 데이터를 가져오는 중 서버 오류가 발생했습니다.")
+        if random.random() < self.change_rate:
+            number = len(self._notices) + 1
+            self._notices.insert(
+                0, {"title": f"공지사항 {number}", "url": f"https://example.com/notices/{number}"}
+            )
+        current = f'"{content_hash(self._notices)}"'
+        if etag == current:
+            return FetchResult(None, etag)
+        return FetchResult(list(self._notices), current)
+
+
+class NoticeSyncScheduler:
+    """
+    게시판 동기화 작업 관리
+
+    작업 상태가 바뀔 때마다 publish(작업)를 호출하고, 메시지 버스로 받은 작업 상태는
+    apply()로 반영합니다. 작업은 submit()을 받은 워커에서 실행됩니다.
+    """
+
+    def __init__(
+        self,
+        source,
+        publish: Callable[[Dict[str, Any]], Awaitable[Any]],
+        interval: float = NOTICES_SYNC_INTERVAL,
+        history: int = NOTICES_JOB_HISTORY,
+        timeout: float = NOTICES_FETCH_TIMEOUT,
+    ):
+        self.source = source
+        self._publish = publish
+        self.interval = interval
+        self.history = history
+        self.timeout = timeout
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 공지 캐시 (마지막으로 가져온 목록과 조건부 요청 정보)
+        self.notices: List[Dict[str, Any]] = []
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.updated_at: Optional[str] = None
+        self.checked_at: Optional[str] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    def close(self):
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def active_job(self) -> Optional[Dict[str, Any]]:
+        """대기 중이거나 실행 중인 작업 (어느 워커의 작업이든)"""
+        now = time.time()
+        for job in reversed(self._jobs.values()):
+            if job["status"] in ACTIVE_STATUSES:
+                # 실행하던 워커가 죽어 끝나지 않은 작업은 무시
+                if now - job["createdAt"] < self.timeout * 2:
+                    return job
+        return None
+
+    async def submit(self, trigger: str = "manual", requested_at: Optional[str] = None):
+        """
+        동기화 작업을 등록합니다.
+
+        이미 대기 중이거나 실행 중인 작업이 있으면 새로 만들지 않고 그 작업을 반환합니다.
+        반환값은 (작업, 새로 만들었는지 여부)입니다.
+        """
+        active = self.active_job()
+        if active is not None:
+            return active, False
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "trigger": trigger,
+            "requestedAt": requested_at,
+            "createdAt": time.time(),
+            "startedAt": None,
+            "finishedAt": None,
+            "changed": None,
+            "count": None,
+            "error": None,
+        }
+        # 발행 전에 먼저 기록해 같은 틱의 다음 요청도 이 작업에 합류하게 함
+        self.apply(job)
+        await self._publish(job)
+        await self._queue.put(job)
+        return job, True
+
+    def apply(self, job: Dict[str, Any]):
+        """작업 상태 변경을 반영합니다. 성공한 작업에 공지 목록이 있으면 캐시를 교체합니다."""
+        previous = self._jobs.get(job["id"])
+        if previous and previous["status"] not in ACTIVE_STATUSES and job["status"] in ACTIVE_STATUSES:
+            # 끝난 작업의 늦게 도착한 이전 상태는 무시
+            return
+        stored = {key: value for key, value in job.items() if key not in _CACHE_FIELDS}
+        self._jobs[job["id"]] = stored
+        self._jobs.move_to_end(job["id"])
+        while len(self._jobs) > self.history:
+            self._jobs.popitem(last=False)
+
+        if job["status"] == SUCCESS:
+            self.checked_at = datetime.fromtimestamp(job["finishedAt"]).isoformat()
+            if job.get("notices") is not None:
+                self.notices = job["notices"]
+                self.etag = job.get("etag")
+                self.last_modified = job.get("lastModified")
+                self.content_hash = job.get("contentHash")
+                self.updated_at = self.checked_at
+
+    async def _run(self):
+        while True:
+            try:
+                job = await asyncio.wait_for(self._queue.get(), timeout=self.interval or None)
+            except asyncio.TimeoutError:
+                # 주기 동기화 (다른 워커가 실행 중이면 건너뜀)
+                job, created = await self.submit("scheduled")
+                if not created:
+                    continue
+                job = await self._queue.get()
+            await self._execute(job)
+
+    async def _execute(self, job: Dict[str, Any]):
+        job = {**job, "status": RUNNING, "startedAt": time.time()}
+        await self._publish(job)
+        try:
+            result = await asyncio.wait_for(
+                self.source.fetch(self.etag, self.last_modified), timeout=self.timeout
+            )
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = NoticeFetchError("게시판 응답 시간이 초과되었습니다.")
+            log.warning("게시판 동기화 실패", extra={"jobId": job["id"], "error": str(e)})
+            await self._publish({**job, "status": FAILED, "finishedAt": time.time(), "error": str(e)})
+            return
+
+        finished = {**job, "status": SUCCESS, "finishedAt": time.time()}
+        digest = content_hash(result.notices) if result.modified else None
+        if not result.modified or digest == self.content_hash:
+            # 바뀌지 않은 게시판은 캐시를 그대로 둠
+            finished.update(changed=False, count=len(self.notices))
+        else:
+            finished.update(
+                changed=True,
+                count=len(result.notices),
+                notices=result.notices,
+                etag=result.etag,
+                lastModified=result.last_modified,
+                contentHash=digest,
+            )
+        log.info(
+            "게시판 동기화 완료",
+            extra={"jobId": job["id"], "changed": finished["changed"], "count": finished["count"]},
+        )
+        await self._publish(finished)
+
+    def notices_response(self) -> Dict[str, Any]:
+        return {
+            "notices": self.notices,
+            "count": len(self.notices),
+            "updatedAt": self.updated_at,
+            "checkedAt": self.checked_at,
+        }
@@ -0,0 +1,136 @@
+"""
+정류장 장치(긴급 버튼/키오스크) 접속 상태 추적
+
+장치는 주기적으로 하트비트를 보내고, 일정 시간(timeout) 동안 하트비트가 없으면
+오프라인으로 처리합니다. 만료 확인은 타이머 휠로 합니다. 시간 창을 tick 단위 칸으로
+나눈 원형 배열에 장치를 만료 예정 칸에 넣어 두고, tick마다 칸 하나만 비우므로
+하트비트 한 번과 만료 처리 모두 장치 수와 관계없이 O(1)입니다.
+
+상태가 바뀐 장치(온라인/오프라인)만 같은 틱에 모아 변경분으로 알립니다.
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import PRESENCE_TICK, PRESENCE_TIMEOUT
+from app.frames import Frame
+
+
+class _Device:
+    """장치 하나의 접속 상태"""
+
+    __slots__ = ("device_id", "online", "last_seen", "slot", "info")
+
+    def __init__(self, device_id: int):
+        self.device_id = device_id
+        self.online = False
+        self.last_seen: Optional[float] = None
+        # 만료 예정인 타이머 휠 칸 (오프라인이면 None)
+        self.slot: Optional[int] = None
+        self.info: Dict[str, Any] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "busStopId": self.device_id,
+            "online": self.online,
+            "lastSeen": self.last_seen,
+            "info": self.info,
+        }
+
+
+class PresenceTracker:
+    def __init__(
+        self,
+        publish: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        timeout: float = PRESENCE_TIMEOUT,
+        tick: float = PRESENCE_TICK,
+    ):
+        self._publish = publish
+        self.tick = tick
+        # 하트비트 후 만료까지의 칸 수 - 현재 칸이 이미 일부 지났으므로 한 칸을 더해
+        # 실제 만료가 timeout ~ timeout + tick초 사이가 되게 함
+        self._ticks = math.ceil(timeout / tick) + 1
+        self._wheel: List[Set[int]] = [set() for _ in range(self._ticks + 1)]
+        self._cursor = 0
+        self._devices: Dict[int, _Device] = {}
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._ticker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._ticker = asyncio.create_task(self._run())
+
+    def close(self):
+        if self._ticker:
+            self._ticker.cancel()
+            self._ticker = None
+
+    def beat(self, device_id: int, info: Optional[Dict[str, Any]] = None, at: Optional[float] = None):
+        """하트비트를 기록하고 만료 시점을 뒤로 미룹니다."""
+        device = self._devices.get(device_id)
+        if device is None:
+            device = self._devices[device_id] = _Device(device_id)
+        elif device.slot is not None:
+            self._wheel[device.slot].discard(device_id)
+
+        device.slot = (self._cursor + self._ticks) % len(self._wheel)
+        self._wheel[device.slot].add(device_id)
+        device.last_seen = at if at is not None else time.time()
+        if info:
+            device.info = info
+        if not device.online:
+            device.online = True
+            self._changed(device)
+
+    def leave(self, device_id: int):
+        """장치가 연결을 정상적으로 끊었을 때 만료를 기다리지 않고 오프라인 처리합니다."""
+        device = self._devices.get(device_id)
+        if device is None or not device.online:
+            return
+        self._wheel[device.slot].discard(device_id)
+        self._expire(device)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """한 번이라도 하트비트를 보낸 모든 장치의 상태"""
+        return [device.to_dict() for device in self._devices.values()]
+
+    def online_count(self) -> int:
+        return sum(1 for device in self._devices.values() if device.online)
+
+    def advance(self):
+        """타이머 휠을 한 칸 돌리고 그 칸에서 만료된 장치를 오프라인 처리합니다."""
+        self._cursor = (self._cursor + 1) % len(self._wheel)
+        expired, self._wheel[self._cursor] = self._wheel[self._cursor], set()
+        for device_id in expired:
+            self._expire(self._devices[device_id])
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.advance()
+
+    def _expire(self, device: _Device):
+        device.online = False
+        device.slot = None
+        self._changed(device)
+
+    def _changed(self, device: _Device):
+        if not self._pending:
+            asyncio.get_running_loop().call_soon(self._flush)
+        # 같은 틱에 여러 번 바뀌면 마지막 상태만 알림
+        self._pending[device.device_id] = device.to_dict()
+
+    def _flush(self):
+        changes, self._pending = list(self._pending.values()), {}
+        if not changes:
+            return
+        task = asyncio.create_task(self._publish(changes))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def encode_presence_frame(changes: List[Dict[str, Any]]) -> Frame:
+    """접속 상태 변경분을 WebSocket 프레임 하나로 만듭니다 (긴급 알림과 같은 연결로 전송)."""
+    return Frame({"type": "presence", "changes": changes})
@@ -0,0 +1,280 @@
+"""
+워커 간 메시지 버스 (긴급 알림, 웹엑스 미팅 상태 공유)
+
+gunicorn 등으로 워커를 여러 개 띄우면 전역 변수와 WebSocket 연결이 워커마다 따로
+존재합니다. 이 버스는 한 워커에서 발행한 메시지를 모든 워커에 전달합니다.
+
+- LocalBus: 단일 프로세스용. 발행 즉시 같은 프로세스에 전달합니다.
+- UnixSocketBus: 같은 호스트의 워커끼리 Unix 소켓으로 연결합니다. 잠금 파일을 먼저
+  잡은 워커가 허브가 되어 메시지에 순번을 매기고(sequence) 모든 워커에 중계합니다.
+  허브 워커가 죽으면 잠금이 풀리고 다른 워커가 허브 역할을 이어받습니다.
+
+메시지는 모두 허브 한 곳을 거치므로 모든 워커가 같은 순서로 메시지를 받습니다.
+
+허브는 워커마다 보내지 못한 바이트를 MESSAGE_BUS_BUFFER_LIMIT까지만 쌓고, 넘으면 그
+워커의 연결을 끊습니다(느린 WebSocket 클라이언트를 1013으로 끊는 것과 같음). 끊긴 워커는
+다시 연결하며, 그 사이 메시지는 대시보드가 재접속할 때 재전송으로 받습니다. 허브와
+연결되지 않은 동안 발행한 메시지도 MESSAGE_BUS_OUTBOX_SIZE개까지만 보관합니다.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from app.config import (
+    MESSAGE_BUS,
+    MESSAGE_BUS_BUFFER_LIMIT,
+    MESSAGE_BUS_OUTBOX_SIZE,
+    MESSAGE_BUS_PATH,
+)
+
+log = logging.getLogger(__name__)
+
+# 허브에서 메시지를 중계하기 전에 한 번 호출 (예: 이벤트 순번 부여), 바뀐 데이터를 반환
+SequenceHandler = Callable[[str, Any], Any]
+# 각 워커에서 메시지를 받을 때 호출
+DeliverHandler = Callable[[str, Any], Awaitable[None]]
+
+# 한 줄(메시지 하나)의 최대 크기
+_LINE_LIMIT = 16 * 1024 * 1024
+# 허브 연결이 끊겼을 때 재시도 간격(초)
+_RETRY_DELAY = 0.2
+
+
+class MessageBus:
+    def __init__(self):
+        self._sequence: Optional[SequenceHandler] = None
+        self._deliver: Optional[DeliverHandler] = None
+
+    async def start(self, sequence: SequenceHandler, deliver: DeliverHandler):
+        self._sequence = sequence
+        self._deliver = deliver
+
+    async def publish(self, channel: str, data: Any):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def _deliver_safely(self, channel: str, data: Any):
+        try:
+            await self._deliver(channel, data)
+        except Exception:
+            log.exception("메시지 버스 전달 처리 중 오류 발생", extra={"channel": channel})
+
+
+class LocalBus(MessageBus):
+    """단일 프로세스용 버스"""
+
+    async def publish(self, channel: str, data: Any):
+        await self._deliver_safely(channel, self._sequence(channel, data))
+
+
+class UnixSocketBus(MessageBus):
+    """같은 호스트의 워커들을 Unix 소켓 허브로 연결하는 버스"""
+
+    def __init__(
+        self,
+        path: str = MESSAGE_BUS_PATH,
+        buffer_limit: int = MESSAGE_BUS_BUFFER_LIMIT,
+        outbox_size: int = MESSAGE_BUS_OUTBOX_SIZE,
+    ):
+        super().__init__()
+        self.path = path
+        self.buffer_limit = buffer_limit
+        self.outbox_size = outbox_size
+        # 버퍼 초과로 끊은 워커 연결 수와 보관 한도 초과로 버린 메시지 수
+        self.dropped_clients = 0
+        self.dropped_messages = 0
+        self.is_hub = False
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self._hub_writer: Optional[asyncio.StreamWriter] = None
+        # 허브와 연결되지 않은 동안 발행된 메시지 - 재연결 후 전송
+        self._outbox: Deque[bytes] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._connected: Optional[asyncio.Event] = None
+
+    async def start(self, sequence: SequenceHandler, deliver: DeliverHandler):
+        await super().start(sequence, deliver)
+        self._connected = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        # 첫 연결(또는 허브 시작)까지 잠시 기다려 시작 직후 발행이 지연되지 않게 함
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=2.0)
+        except asyncio.TimeoutError:
+            log.warning("메시지 버스 허브에 연결하지 못했습니다. 백그라운드에서 재시도합니다.")
+
+    async def publish(self, channel: str, data: Any):
+        if self.is_hub:
+            await self._hub_dispatch(channel, data)
+            return
+        line = _encode({"channel": channel, "data": data})
+        if self._hub_writer is None:
+            self._hold(line)
+            return
+        try:
+            self._hub_writer.write(line)
+            await self._hub_writer.drain()
+        except (ConnectionError, RuntimeError):
+            self._hold(line)
+
+    def _hold(self, line: bytes):
+        if len(self._outbox) >= self.outbox_size:
+            self._outbox.popleft()
+            self.dropped_messages += 1
+            # 허브가 오래 없으면 메시지마다 로그가 쌓이므로 1000개마다 한 번만 기록
+            if self.dropped_messages % 1000 == 1:
+                log.warning(
+                    "허브에 연결되지 않아 보관 중인 메시지가 너무 많아 오래된 메시지를 버림",
+                    extra={"outbox": len(self._outbox), "dropped": self.dropped_messages},
+                )
+        self._outbox.append(line)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for writer in list(self._clients):
+            writer.close()
+        if self._handlers:
+            # 소켓을 닫았으므로 워커 연결 처리 태스크는 EOF를 받고 끝남
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server:
+            self._server.close()
+        if self._hub_writer:
+            self._hub_writer.close()
+        if self.is_hub:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _run(self):
+        while True:
+            try:
+                if self._try_lock():
+                    await self._serve()
+                    return
+                await self._follow()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("메시지 버스 연결 오류", extra={"error": str(e)})
+            await asyncio.sleep(_RETRY_DELAY)
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    # 허브 역할
+
+    async def _serve(self):
+        # 잠금을 가졌으므로 남아 있는 소켓 파일은 죽은 허브의 것
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=self.path, limit=_LINE_LIMIT
+        )
+        self.is_hub = True
+        log.info("메시지 버스 허브 시작", extra={"path": self.path})
+        # 팔로워였을 때 보내지 못한 메시지를 직접 처리
+        outbox, self._outbox = self._outbox, deque()
+        for line in outbox:
+            frame = json.loads(line)
+            await self._hub_dispatch(frame["channel"], frame["data"])
+        self._connected.set()
+        await self._server.serve_forever()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line)
+                await self._hub_dispatch(frame["channel"], frame["data"])
+        except (ConnectionError, ValueError) as e:
+            log.info("메시지 버스 워커 연결 종료", extra={"error": str(e)})
+        finally:
+            self._clients.discard(writer)
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _hub_dispatch(self, channel: str, data: Any):
+        data = self._sequence(channel, data)
+        line = _encode({"channel": channel, "data": data})
+        for writer in list(self._clients):
+            try:
+                writer.write(line)
+            except (ConnectionError, RuntimeError):
+                self._clients.discard(writer)
+                continue
+            buffered = writer.transport.get_write_buffer_size()
+            if buffered > self.buffer_limit:
+                log.warning(
+                    "송신 버퍼 초과로 느린 워커 연결 종료",
+                    extra={"buffered": buffered, "limit": self.buffer_limit},
+                )
+                self.dropped_clients += 1
+                self._clients.discard(writer)
+                # 쌓인 데이터를 보내려고 기다리지 않고 바로 끊음 - 워커는 다시 연결함
+                writer.transport.abort()
+        await self._deliver_safely(channel, data)
+
+    # 팔로워 역할
+
+    async def _follow(self):
+        reader, writer = await asyncio.open_unix_connection(self.path, limit=_LINE_LIMIT)
+        self._hub_writer = writer
+        try:
+            outbox, self._outbox = self._outbox, deque()
+            for line in outbox:
+                writer.write(line)
+            await writer.drain()
+            self._connected.set()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line)
+                await self._deliver_safely(frame["channel"], frame["data"])
+        finally:
+            self._hub_writer = None
+            writer.close()
+
+
+def _encode(frame: Dict[str, Any]) -> bytes:
+    return json.dumps(frame).encode("utf-8") + b"\n"
+
+
+def create_bus(kind: str = MESSAGE_BUS) -> MessageBus:
+    """설정값(MESSAGE_BUS)에 맞는 메시지 버스를 생성합니다."""
+    if kind == "local":
+        return LocalBus()
+    if kind == "unix":
+        return UnixSocketBus()
+    raise ValueError(f"알 수 없는 메시지 버스 종류: {kind}")
@@ -0,0 +1,87 @@
+"""
+요청 빈도 제한 (토큰 버킷)
+
+고장 난 버튼이나 재시도 루프가 긴급 알림/미팅 API를 끝없이 호출해도 이벤트 루프와
+대시보드가 버티도록, (정류장, 클라이언트) 키마다 토큰 버킷을 둡니다. 버킷은 초당
+rate개씩 최대 burst개까지 차고, 요청마다 하나를 씁니다. 토큰이 없으면 다음 토큰이
+찰 때까지의 시간을 돌려주고 요청은 거절됩니다(429, Retry-After).
+
+키마다 정류장이 따로이므로 한 정류장이 폭주해도 다른 정류장의 알림은 제한받지
+않습니다.
+
+버킷은 마지막 사용 순서로 보관합니다. 가득 찰 만큼 오래 쓰이지 않은 버킷은 새로 만든
+버킷과 같으므로, 요청을 처리할 때 가장 오래된 버킷 몇 개를 확인해 지웁니다(별도
+정리 타이머 없음). 그래서 요청 하나의 비용은 버킷 수와 관계없이 일정합니다.
+
+상태는 워커 메모리에만 있으므로 여러 워커로 실행하면 제한도 워커별로 적용됩니다.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable, List
+
+# 요청 하나를 처리할 때 확인하는 만료 후보 버킷 수
+_EXPIRE_PER_CALL = 2
+
+
+class TokenBucketLimiter:
+    """키별 토큰 버킷. rate가 0 이하이면 제한하지 않습니다."""
+
+    def __init__(self, rate: float, burst: float, max_buckets: int = 100000):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_buckets = max_buckets
+        # 키 -> [남은 토큰, 마지막 갱신 시각] (오래된 것부터)
+        self._buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        키의 토큰 하나를 씁니다.
+
+        허용하면 0을, 거절하면 다음 토큰이 찰 때까지 기다려야 하는 시간(초)을 반환합니다.
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        self._expire(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                # 키가 너무 많으면 가장 오래 쓰이지 않은 버킷을 버림
+                self._buckets.popitem(last=False)
+            self._buckets[key] = [self.burst - 1, now]
+            return 0.0
+
+        self._buckets.move_to_end(key)
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / self.rate
+
+    def _expire(self, now: float):
+        # 빈 버킷이 가득 차는 시간이 지나도록 쓰이지 않은 버킷은 지워도 결과가 같음
+        idle = self.burst / self.rate
+        for _ in range(_EXPIRE_PER_CALL):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < idle:
+                return
+            del self._buckets[key]
+
+
+def retry_after_header(delay: float) -> str:
+    """Retry-After 헤더 값 (정수 초, 올림)"""
+    return str(max(1, math.ceil(delay)))
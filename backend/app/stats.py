@@ -0,0 +1,151 @@
+"""
+정류장별 긴급 알림 통계 (최근 1시간/1일/1주 이동 창)
+
+정류장마다 창별로 고정 길이 링 버퍼를 두고, 알림이 올 때 현재 시간 칸의 값만
+늘립니다. 칸을 넘어갈 때는 지나간 칸만 비우므로 갱신은 알림당 O(1)(상각)이고,
+창 합계도 따로 유지해 조회할 때 원본 이벤트를 훑지 않습니다.
+
+- hour: 1분 칸 60개
+- day: 1시간 칸 24개
+- week: 1시간 칸 168개
+
+합계는 칸 단위로 움직이므로 창의 시작 경계는 칸 크기만큼 오차가 있습니다.
+집계 대상은 병합된 알림(갱신 알림 제외)이며, 모든 워커가 버스로 같은 알림을 받아
+같은 값을 유지합니다. 시작할 때 저장된 이벤트로 창을 채웁니다.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 창 이름 -> (칸 크기(초), 칸 수)
+WINDOWS: Dict[str, Tuple[int, int]] = {
+    "hour": (60, 60),
+    "day": (3600, 24),
+    "week": (3600, 168),
+}
+
+# 시작할 때 저장된 이벤트로 창을 채우는 집계 칸 크기(초) - 모든 창의 칸 크기의 약수
+LOAD_BUCKET = 60
+
+
+class RollingCounter:
+    """칸 크기 width초, 칸 n개짜리 이동 창 카운터"""
+
+    __slots__ = ("width", "counts", "total", "head")
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.counts = [0] * size
+        self.total = 0
+        # 마지막으로 갱신한 칸 번호 (시각 // width)
+        self.head = 0
+
+    def add(self, at: float, amount: int = 1):
+        slot = int(at // self.width)
+        self._advance(slot)
+        if slot <= self.head - len(self.counts):
+            # 창보다 오래된 값
+            return
+        self.counts[slot % len(self.counts)] += amount
+        self.total += amount
+
+    def value(self, now: float) -> int:
+        self._advance(int(now // self.width))
+        return self.total
+
+    def _advance(self, slot: int):
+        if slot <= self.head:
+            return
+        size = len(self.counts)
+        if slot - self.head >= size:
+            self.counts = [0] * size
+            self.total = 0
+        else:
+            # 지나간 칸만 비움
+            for expired in range(self.head + 1, slot + 1):
+                index = expired % size
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+        self.head = slot
+
+
+class EmergencyStats:
+    """정류장 ID -> 창별 RollingCounter"""
+
+    def __init__(self, windows: Dict[str, Tuple[int, int]] = WINDOWS):
+        self.windows = windows
+        self._longest = max(windows, key=lambda name: windows[name][0] * windows[name][1])
+        self._stops: Dict[int, Dict[str, RollingCounter]] = {}
+
+    def record(self, bus_stop_id: int, at: float, amount: int = 1):
+        counters = self._stops.get(bus_stop_id)
+        if counters is None:
+            counters = self._stops[bus_stop_id] = {
+                name: RollingCounter(width, size) for name, (width, size) in self.windows.items()
+            }
+        for counter in counters.values():
+            counter.add(at, amount)
+
+    @property
+    def span(self) -> int:
+        """가장 긴 창의 길이(초)"""
+        width, size = self.windows[self._longest]
+        return width * size
+
+    def load(self, rows: Iterable[Tuple[int, float, int]]):
+        """저장된 (정류장 ID, 시각, 개수) 집계로 창을 채웁니다."""
+        for bus_stop_id, at, count in rows:
+            self.record(bus_stop_id, at, count)
+
+    def counts(self, window: str, now: float) -> Dict[int, int]:
+        """창 안에 알림이 있었던 정류장별 알림 수"""
+        result = {}
+        for bus_stop_id, counters in self._stops.items():
+            value = counters[window].value(now)
+            if value:
+                result[bus_stop_id] = value
+        return result
+
+    def prune(self, now: float):
+        """가장 긴 창에도 알림이 남지 않은 정류장을 지웁니다."""
+        idle = [
+            bus_stop_id
+            for bus_stop_id, counters in self._stops.items()
+            if not counters[self._longest].value(now)
+        ]
+        for bus_stop_id in idle:
+            del self._stops[bus_stop_id]
+
+
+def heatmap_points(
+    counts: Dict[int, int],
+    lookup,
+    bounds: Optional[Tuple[float, float, float, float]] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    정류장별 알림 수를 지도에 겹쳐 그릴 점 목록(많은 순)으로 만듭니다.
+
+    lookup(정류장 ID)은 정류장 정보를 반환하며, 없어진 정류장은 건너뜁니다.
+    """
+    points = []
+    for bus_stop_id, count in sorted(counts.items(), key=lambda item: -item[1]):
+        bus_stop = lookup(bus_stop_id)
+        if not bus_stop:
+            continue
+        lat, lng = bus_stop["lat"], bus_stop["lng"]
+        if bounds is not None and not (
+            bounds[0] <= lat <= bounds[2] and bounds[1] <= lng <= bounds[3]
+        ):
+            continue
+        points.append(
+            {
+                "busStopId": bus_stop_id,
+                "busStopName": bus_stop["name"],
+                "lat": lat,
+                "lng": lng,
+                "count": count,
+            }
+        )
+        if limit is not None and len(points) >= limit:
+            break
+    return points
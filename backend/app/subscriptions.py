@@ -0,0 +1,271 @@
+"""
+/ws/emergency 구독 조건과 구독 색인
+
+클라이언트는 받을 메시지 종류(긴급 알림, 미팅, 장치 접속 상태)와 정류장 ID 목록,
+경계 상자(지역)를 지정할 수 있습니다. 정류장 ID와 경계 상자를 함께 주면 둘 중 하나에
+해당하는 정류장의 메시지를 받고, 둘 다 없으면 모든 정류장의 메시지를 받습니다.
+
+메시지마다 모든 구독을 검사하지 않도록 구독을 바뀔 때 미리 색인해 둡니다.
+- 모든 정류장 구독: 종류별 집합
+- 정류장 ID 구독: 종류별 {정류장 ID: 구독자}
+- 경계 상자 구독: 종류별 격자 칸 {칸: 구독자}, 칸을 너무 많이 덮는 상자는 따로 모아 직접 검사
+그래서 메시지 하나를 보낼 대상을 찾는 비용은 구독자 수가 아니라 실제로 받는 구독자
+수에 비례합니다.
+"""
+
+import math
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+EMERGENCY = "emergency"
+MEETING = "meeting"
+PRESENCE = "presence"
+MESSAGE_TYPES = frozenset((EMERGENCY, MEETING, PRESENCE))
+
+# 구독 조건을 지정하지 않은 클라이언트가 받는 메시지 (기존 대시보드와 같은 동작)
+DEFAULT_TYPES = frozenset((EMERGENCY, PRESENCE))
+
+# 경계 상자 색인의 격자 칸 크기(도)와, 이보다 많은 칸을 덮는 상자는 칸에 넣지 않고 직접 검사
+BBOX_CELL_SIZE = 0.1
+BBOX_MAX_CELLS = 64
+
+# (최소 위도, 최소 경도, 최대 위도, 최대 경도)
+BBox = Tuple[float, float, float, float]
+# 라우팅할 메시지 항목의 (정류장 ID, 위도, 경도) - 정류장과 관계없는 항목이면 정류장 ID가 None
+Target = Tuple[Optional[int], Optional[float], Optional[float]]
+
+
+class Subscription:
+    """연결 하나의 구독 조건"""
+
+    __slots__ = ("types", "stop_ids", "bbox")
+
+    def __init__(
+        self,
+        types: FrozenSet[str] = DEFAULT_TYPES,
+        stop_ids: Optional[FrozenSet[int]] = None,
+        bbox: Optional[BBox] = None,
+    ):
+        self.types = types
+        self.stop_ids = stop_ids
+        self.bbox = bbox
+
+    @classmethod
+    def parse(
+        cls,
+        types: Optional[Iterable[Any]] = None,
+        stops: Optional[Iterable[Any]] = None,
+        bbox: Optional[Iterable[Any]] = None,
+    ) -> "Subscription":
+        """요청 값으로 구독 조건을 만듭니다. 값이 올바르지 않으면 ValueError를 발생시킵니다."""
+        if types is None:
+            parsed_types = DEFAULT_TYPES
+        else:
+            parsed_types = frozenset(str(t).strip() for t in types if str(t).strip())
+            unknown = parsed_types - MESSAGE_TYPES
+            if unknown:
+                raise ValueError(f"알 수 없는 메시지 종류입니다: {', '.join(sorted(unknown))}")
+
+        stop_ids = None
+        if stops is not None:
+            try:
+                stop_ids = frozenset(int(stop) for stop in stops)
+            except (TypeError, ValueError):
+                raise ValueError("정류장 ID가 올바르지 않습니다.")
+
+        parsed_bbox = None
+        if bbox is not None:
+            try:
+                parsed_bbox = tuple(float(v) for v in bbox)
+            except (TypeError, ValueError):
+                raise ValueError("경계 상자 좌표가 올바르지 않습니다.")
+            if len(parsed_bbox) != 4:
+                raise ValueError("경계 상자는 최소 위도, 최소 경도, 최대 위도, 최대 경도 4개 값입니다.")
+            if parsed_bbox[0] > parsed_bbox[2] or parsed_bbox[1] > parsed_bbox[3]:
+                raise ValueError("경계 상자의 최소 좌표가 최대 좌표보다 큽니다.")
+
+        return cls(parsed_types, stop_ids, parsed_bbox)
+
+    @property
+    def all_stops(self) -> bool:
+        return self.stop_ids is None and self.bbox is None
+
+    def matches(self, message_type: str, target: Target) -> bool:
+        if message_type not in self.types:
+            return False
+        stop_id, lat, lng = target
+        if stop_id is None or self.all_stops:
+            return True
+        if self.stop_ids is not None and stop_id in self.stop_ids:
+            return True
+        return self._in_bbox(lat, lng)
+
+    def _in_bbox(self, lat: Optional[float], lng: Optional[float]) -> bool:
+        if self.bbox is None or lat is None or lng is None:
+            return False
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "types": sorted(self.types),
+            "stops": sorted(self.stop_ids) if self.stop_ids is not None else None,
+            "bbox": list(self.bbox) if self.bbox is not None else None,
+        }
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return (math.floor(lat / BBOX_CELL_SIZE), math.floor(lng / BBOX_CELL_SIZE))
+
+
+def _bbox_cells(bbox: BBox) -> Optional[List[Tuple[int, int]]]:
+    """경계 상자가 덮는 격자 칸 목록. 칸이 너무 많으면 None"""
+    min_row, min_col = _cell(bbox[0], bbox[1])
+    max_row, max_col = _cell(bbox[2], bbox[3])
+    if (max_row - min_row + 1) * (max_col - min_col + 1) > BBOX_MAX_CELLS:
+        return None
+    return [
+        (row, col)
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
+
+
+class _TypeIndex:
+    """메시지 종류 하나에 대한 구독 색인"""
+
+    __slots__ = ("subscribers", "all_stops", "by_stop", "by_cell", "wide")
+
+    def __init__(self):
+        self.subscribers: Set[Hashable] = set()
+        self.all_stops: Set[Hashable] = set()
+        self.by_stop: Dict[int, Set[Hashable]] = {}
+        self.by_cell: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self.wide: Set[Hashable] = set()
+
+
+def _add(index: Dict, key, value):
+    index.setdefault(key, set()).add(value)
+
+
+def _discard(index: Dict, key, value):
+    values = index.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del index[key]
+
+
+class SubscriptionIndex:
+    """
+    연결(키)별 구독 조건과 메시지 종류별 색인
+
+    키는 해시 가능한 아무 값(WebSocket 객체 등)이면 됩니다.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[Hashable, Subscription] = {}
+        self._types: Dict[str, _TypeIndex] = {t: _TypeIndex() for t in MESSAGE_TYPES}
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def get(self, key: Hashable) -> Optional[Subscription]:
+        return self._subscriptions.get(key)
+
+    def subscribe(self, key: Hashable, subscription: Subscription):
+        """키의 구독 조건을 새로 지정합니다 (기존 조건은 대체)."""
+        self.unsubscribe(key)
+        self._subscriptions[key] = subscription
+        cells = _bbox_cells(subscription.bbox) if subscription.bbox is not None else None
+        for message_type in subscription.types:
+            index = self._types[message_type]
+            index.subscribers.add(key)
+            if subscription.all_stops:
+                index.all_stops.add(key)
+                continue
+            for stop_id in subscription.stop_ids or ():
+                _add(index.by_stop, stop_id, key)
+            if subscription.bbox is not None:
+                if cells is None:
+                    index.wide.add(key)
+                else:
+                    for cell in cells:
+                        _add(index.by_cell, cell, key)
+
+    def unsubscribe(self, key: Hashable):
+        subscription = self._subscriptions.pop(key, None)
+        if subscription is None:
+            return
+        cells = _bbox_cells(subscription.bbox) if subscription.bbox is not None else None
+        for message_type in subscription.types:
+            index = self._types[message_type]
+            index.subscribers.discard(key)
+            index.all_stops.discard(key)
+            index.wide.discard(key)
+            for stop_id in subscription.stop_ids or ():
+                _discard(index.by_stop, stop_id, key)
+            for cell in cells or ():
+                _discard(index.by_cell, cell, key)
+
+    def match(self, message_type: str, target: Target) -> Set[Hashable]:
+        """메시지 항목 하나를 받아야 하는 모든 키"""
+        index = self._types[message_type]
+        stop_id, lat, lng = target
+        if stop_id is None:
+            return set(index.subscribers)
+        return index.all_stops | self._filtered(index, target)
+
+    def route(
+        self,
+        message_type: str,
+        items: List[Any],
+        target: Callable[[Any], Target],
+    ) -> List[Tuple[List[Any], Set[Hashable]]]:
+        """
+        항목 목록을 받는 키별로 나눕니다.
+
+        같은 항목 조합을 받는 키끼리 묶어 (항목 목록, 키 집합) 목록으로 반환하므로,
+        호출하는 쪽은 묶음마다 프레임을 한 번만 직렬화하면 됩니다. 모든 정류장 구독자는
+        항상 전체 목록을 받으므로 검사하지 않습니다.
+        """
+        index = self._types[message_type]
+        everyone: Set[Hashable] = set(index.all_stops)
+        # 키 -> 받는 항목 번호 목록 (필터가 있는 구독자만)
+        selected: Dict[Hashable, List[int]] = {}
+        for i, item in enumerate(items):
+            item_target = target(item)
+            keys = index.subscribers if item_target[0] is None else self._filtered(index, item_target)
+            for key in keys:
+                if key not in everyone:
+                    selected.setdefault(key, []).append(i)
+
+        groups: Dict[Tuple[int, ...], Set[Hashable]] = {}
+        if everyone:
+            groups[tuple(range(len(items)))] = everyone
+        for key, positions in selected.items():
+            groups.setdefault(tuple(positions), set()).add(key)
+        return [([items[i] for i in positions], keys) for positions, keys in groups.items()]
+
+    def _filtered(self, index: _TypeIndex, target: Target) -> Set[Hashable]:
+        stop_id, lat, lng = target
+        keys = set(index.by_stop.get(stop_id, ()))
+        if lat is None or lng is None:
+            return keys
+        for key in index.by_cell.get(_cell(lat, lng), ()):
+            if key not in keys and self._subscriptions[key]._in_bbox(lat, lng):
+                keys.add(key)
+        for key in index.wide:
+            if key not in keys and self._subscriptions[key]._in_bbox(lat, lng):
+                keys.add(key)
+        return keys
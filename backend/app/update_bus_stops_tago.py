@@ -1,235 +1,782 @@
 #!/usr/bin/env python3
 """
 TAGO(국가대중교통정보센터) API를 사용하여 고흥시 버스정류장 위치 정보를 수집하는 스크립트
+
+httpx 비동기 클라이언트 하나로 연결을 재사용하며, 모든 페이지를 동시 요청 수 제한 안에서
+가져옵니다. 일시적인 오류는 지수 백오프로 재시도합니다.
+
+--cities로 여러 도시(도시 코드 목록 또는 all)를 한 번에 수집할 수 있습니다. 모든 도시의
+페이지를 함께 내려받고, 응답 파싱과 정리는 프로세스 풀에 나눠 맡겨 CPU 코어 수만큼 병렬로
+처리합니다. 결과는 도시마다 분할 데이터 파일(shards/bus_stops.<도시 코드>.json)로
+기록되며 고흥군은 기본 데이터 파일에 기록됩니다.
+
+이때 페이지 응답은 다른 프로세스로 넘겨야 하므로 내려받는 동안 조각 단위로 파싱하지 않고
+페이지 하나를 바이트로 모아 둡니다. 동시에 모아 두는 페이지는 동시 요청 수만큼이고
+페이지 크기(PAGE_SIZE행)도 정해져 있어 메모리 사용량은 여전히 전체 건수와 관계없습니다.
+풀의 워커는 같은 XMLItemParser로 바이트를 조각 단위로 파싱하며 항목을 바로 정리하므로
+응답 트리나 항목 목록을 따로 만들지 않습니다.
+
+로컬 모의 서버로 테스트할 때는 --base-url(또는 TAGO_BASE_URL 환경 변수)을 지정합니다.
+
+실행: backend 디렉터리에서 python -m app.update_bus_stops_tago [--cities 12,13 | --cities all]
 """
 
-import requests
+import argparse
+import asyncio
+import io
 import json
-import time
+import math
 import os
+import random
+import time
 import xml.etree.ElementTree as ET
-from urllib.parse import urlencode, quote_plus
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import httpx
+
+from app.config import BUS_STOPS_DATA_FILE, BUS_STOPS_SHARD_DIR
+from app.data.loader import (
+    load_dataset,
+    shard_path,
+    shared_next_id,
+    write_dataset,
+    write_sync_stats,
+)
+from app.data.registry import haversine_m
 
 # TAGO API 설정
-API_KEY = "PWg7zQCmIEIfoTpRBOEXcvjKtxWDrMphHqsO8WbjVgTobNBfhklQyrUz7KXCkECz8hCNHgcpVT2lJKfpZp+RTw=="
-BASE_URL = "http://apis.data.go.kr/1613000/BusSttnInfoInqireService"
+API_KEY = os.getenv(
+    "TAGO_API_KEY",
+    "PWg7zQCmIEIfoTpRBOEXcvjKtxWDrMphHqsO8WbjVgTobNBfhklQyrUz7KXCkECz8hCNHgcpVT2lJKfpZp+RTw==",
+)
+BASE_URL = os.getenv("TAGO_BASE_URL", "http://apis.data.go.kr/1613000/BusSttnInfoInqireService")
+
+# 페이지당 행 수, 동시 요청 수, 재시도 횟수, 요청 제한 시간(초)
+PAGE_SIZE = 1000
+MAX_CONCURRENCY = 4
+MAX_RETRIES = 4
+REQUEST_TIMEOUT = 10.0
+
+# 기본 데이터 파일에 기록하는 도시 (이름에 포함된 문자열)
+HOME_CITY_NAME = "고흥"
+
+# tago_id가 없는 기존 정류장을 이름이 같은 TAGO 정류장과 같은 곳으로 보는 최대 거리(m)
+LEGACY_MATCH_DISTANCE_M = 50.0
+
+# 동기화 때 비교하는 정류장 필드
+SYNC_FIELDS = ("name", "lat", "lng", "address", "tago_id")
+
+# 재시도할 HTTP 상태 코드
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TagoAPIError(Exception):
+    """재시도해도 해결되지 않는 TAGO API 오류 (인증 실패, 요청 제한 초과 등)"""
+
+
+class XMLItemParser:
+    """
+    TAGO XML 응답을 점진적으로 파싱하여 <item> 항목을 하나씩 돌려주는 파서
+
+    ElementTree의 pull 파서(iterparse의 비동기 버전)를 사용하며, 처리한 요소는 바로
+    트리에서 떼어내므로 응답 전체 트리가 메모리에 만들어지지 않습니다.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack = []
+        self.header = None
+        self.total_count = None
+
+    def feed(self, data):
+        """바이트 조각을 넣고, 완성된 항목 딕셔너리를 순서대로 돌려줍니다."""
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self):
+        """입력을 끝내고 남은 항목을 돌려줍니다."""
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self):
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._stack.append(elem)
+                continue
+
+            self._stack.pop()
+            tag = elem.tag
+            if tag == "item":
+                yield {child.tag: child.text for child in elem}
+            elif tag == "totalCount":
+                self.total_count = int(elem.text or 0)
+            elif tag == "cmmMsgHeader":
+                # 응답 헤더 처리 (게이트웨이 오류 응답)
+                self.header = {
+                    "returnCode": elem.findtext("returnCode", ""),
+                    "returnMessage": elem.findtext("returnMsg", ""),
+                    "errMsg": elem.findtext("errMsg", ""),
+                    "returnAuthMsg": elem.findtext("returnAuthMsg", ""),
+                }
+            else:
+                continue
+            # 처리한 요소는 부모에서 떼어내 메모리를 돌려줌
+            elem.clear()
+            if self._stack:
+                self._stack[-1].remove(elem)
+
+
+def iterparse_items(source, chunk_size=64 * 1024, parser=None):
+    """
+    파일 객체나 바이트열에서 <item> 항목을 하나씩 꺼냅니다. 저장된 응답 파일 처리용입니다.
+
+    parser를 넘기면 다 읽은 뒤 그 파서에서 응답 헤더와 전체 건수를 확인할 수 있습니다.
+    """
+    if parser is None:
+        parser = XMLItemParser()
+    if isinstance(source, (bytes, str)):
+        yield from parser.feed(source)
+    else:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield from parser.feed(chunk)
+    yield from parser.close()
 
 
 def parse_xml_response(xml_str):
     """
     XML 응답을 파싱하여 Python 딕셔너리로 변환
     """
-    root = ET.fromstring(xml_str)
-    result = {}
+    parser = XMLItemParser()
+    items = list(parser.feed(xml_str))
+    items.extend(parser.close())
 
-    # 응답 헤더 처리
-    header = root.find(".//cmmMsgHeader")
-    if header is not None:
-        result["header"] = {
-            "returnCode": header.findtext("returnCode", ""),
-            "returnMessage": header.findtext("returnMsg", ""),
-            "errMsg": header.findtext("errMsg", ""),
-            "returnAuthMsg": header.findtext("returnAuthMsg", ""),
-        }
-
-    # 응답 바디 처리
-    items = root.findall(".//item")
+    result = {}
+    if parser.header is not None:
+        result["header"] = parser.header
+    # 전체 건수 (페이지 수 계산용)
+    if parser.total_count is not None:
+        result["totalCount"] = parser.total_count
     if items:
-        result["items"] = []
-        for item in items:
-            item_dict = {}
-            for child in item:
-                item_dict[child.tag] = child.text
-            result["items"].append(item_dict)
+        result["items"] = items
+    return result
+
 
+def parse_json_response(data):
+    """
+    JSON 응답(response.body.items.item)을 XML 파싱 결과와 같은 형태로 변환
+    """
+    body = data.get("response", {}).get("body", {})
+    result = {}
+    if "totalCount" in body:
+        result["totalCount"] = int(body["totalCount"])
+
+    items = body.get("items") or {}
+    item = items.get("item", []) if isinstance(items, dict) else []
+    # 결과가 한 건이면 리스트가 아닌 객체로 옴
+    if isinstance(item, dict):
+        item = [item]
+    if item:
+        result["items"] = [
+            {key: None if value is None else str(value) for key, value in entry.items()}
+            for entry in item
+        ]
     return result
 
 
-def call_api(endpoint, params):
+def _retry_delay(attempt):
+    # 지수 백오프 + 지터
+    return 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+
+
+async def _request(client, endpoint, params, read):
+    """
+    TAGO API를 호출하고 성공 응답을 read(response)로 읽은 결과를 반환합니다.
+
+    일시적인 네트워크 오류와 5xx/429 응답은 MAX_RETRIES회까지 재시도합니다.
+    """
+    params = {"serviceKey": API_KEY, **params}
+    url = f"{BASE_URL}/{endpoint}"
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with client.stream("GET", url, params=params) as response:
+                if response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                    print(
+                        f"API 오류 {response.status_code}, 재시도합니다 "
+                        f"({endpoint}, {attempt + 1}회)"
+                    )
+                    await asyncio.sleep(_retry_delay(attempt))
+                    continue
+                if response.status_code != 200:
+                    await response.aread()
+                    raise TagoAPIError(
+                        f"API 오류 {response.status_code}: {response.text[:200]}"
+                    )
+                return await read(response)
+        except httpx.TransportError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            print(f"API 요청 실패, 재시도합니다 ({endpoint}, {attempt + 1}회): {e}")
+            await asyncio.sleep(_retry_delay(attempt))
+
+
+async def call_api(client, endpoint, params):
     """
     TAGO API 호출 및 응답 처리
+
+    XML 응답은 내려받는 동안 조각 단위로 파싱합니다.
     """
-    try:
-        # 파라미터에서 serviceKey만 별도로 처리
-        service_key = params.pop("serviceKey", API_KEY)
+    result = await _request(client, endpoint, params, _read_response)
+    _raise_for_header(result)
+    return result
 
-        # URL에 직접 serviceKey 추가
-        url = f"{endpoint}?serviceKey={quote_plus(service_key)}"
 
-        # 나머지 파라미터는 requests가 처리하도록 함
-        if params:
-            response = requests.get(url, params=params)
-        else:
-            response = requests.get(url)
+async def _read_response(response):
+    content_type = response.headers.get("Content-Type", "")
+    if "xml" in content_type.lower():
+        return await _read_xml_stream(response)
+    await response.aread()
+    return parse_json_response(response.json())
 
-        print(f"\nAPI 요청:")
-        print(f"URL: {response.url}")
-        print(f"응답 상태 코드: {response.status_code}")
 
-        if response.status_code == 200:
-            content_type = response.headers.get("Content-Type", "")
-            if "xml" in content_type.lower():
-                result = parse_xml_response(response.text)
-            else:
-                result = response.json()
+async def _read_raw(response):
+    return response.headers.get("Content-Type", ""), await response.aread()
 
-            print(f"응답 내용: {json.dumps(result, ensure_ascii=False, indent=2)}")
-            return result
-        else:
-            print(f"API 오류: {response.status_code}")
-            print(f"응답 내용: {response.text}")
-            return None
 
-    except Exception as e:
-        print(f"API 호출 중 오류 발생: {e}")
-        print(f"요청 URL: {url}")
-        return None
+def _raise_for_header(result):
+    if "header" in result:
+        header = result["header"]
+        raise TagoAPIError(
+            f"API 오류 {header['returnCode']}: "
+            f"{header['returnAuthMsg'] or header['errMsg']}"
+        )
+
+
+async def _read_xml_stream(response):
+    parser = XMLItemParser()
+    items = []
+    async for chunk in response.aiter_bytes():
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+
+    result = {"items": items}
+    if parser.header is not None:
+        result["header"] = parser.header
+    if parser.total_count is not None:
+        result["totalCount"] = parser.total_count
+    return result
 
 
-def get_city_code():
+async def iter_items(client, endpoint, params, page_size=PAGE_SIZE, concurrency=MAX_CONCURRENCY):
     """
-    도시 코드 목록을 조회하여 고흥군의 코드를 찾습니다.
+    모든 페이지의 항목을 페이지 순서대로 하나씩 돌려주는 비동기 제너레이터
+
+    첫 페이지의 totalCount로 전체 페이지 수를 계산하고, 다음 페이지들은 최대
+    concurrency개까지 미리 요청해 둡니다. 메모리에는 진행 중인 페이지만 남으므로
+    전체 건수와 관계없이 사용량이 일정합니다.
     """
-    endpoint = f"{BASE_URL}/getCtyCodeList"
-    params = {"serviceKey": API_KEY}
+    first = await call_api(client, endpoint, {**params, "numOfRows": page_size, "pageNo": 1})
+    first_items = first.get("items", [])
+    total = first.get("totalCount", len(first_items))
+    pages = max(1, math.ceil(total / page_size))
+
+    async def fetch_page(page_no):
+        result = await call_api(
+            client, endpoint, {**params, "numOfRows": page_size, "pageNo": page_no}
+        )
+        return result.get("items", [])
+
+    next_page = 2
+    in_flight = deque()
+
+    def schedule():
+        nonlocal next_page
+        while next_page <= pages and len(in_flight) < concurrency:
+            in_flight.append(asyncio.ensure_future(fetch_page(next_page)))
+            next_page += 1
+
+    received = 0
+    try:
+        schedule()
+        for item in first_items:
+            received += 1
+            yield item
+        del first_items
+
+        while in_flight:
+            page_items = await in_flight.popleft()
+            schedule()
+            for item in page_items:
+                received += 1
+                yield item
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    if received != total:
+        print(f"경고: 전체 {total}건 중 {received}건을 받았습니다.")
+
+
+def create_client(concurrency=MAX_CONCURRENCY):
+    """연결을 재사용(keep-alive)하는 TAGO API용 비동기 클라이언트"""
+    return httpx.AsyncClient(
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        ),
+    )
+
+
+async def get_cities(client):
+    """
+    도시 코드 목록을 조회합니다. [{"citycode": ..., "cityname": ...}, ...]
+    """
+    result = await call_api(client, "getCtyCodeList", {})
+    return [city for city in result.get("items", []) if city.get("citycode")]
 
-    result = call_api(endpoint, params)
 
-    if result and "items" in result:
-        for city in result["items"]:
-            if "고흥" in city.get("cityname", ""):
-                return city.get("citycode")
+async def get_city_code(client):
+    """
+    도시 코드 목록을 조회하여 고흥군의 코드를 찾습니다.
+    """
+    for city in await get_cities(client):
+        if HOME_CITY_NAME in (city.get("cityname") or ""):
+            return city.get("citycode")
 
     print("고흥군의 도시 코드를 찾을 수 없습니다.")
     return None
 
 
-def get_bus_stations(city_code):
+def get_bus_stations(client, city_code, concurrency=MAX_CONCURRENCY):
     """
-    TAGO API를 사용하여 특정 도시의 버스정류소 목록을 조회합니다.
+    TAGO API를 사용하여 특정 도시의 버스정류소 목록을 모든 페이지에 걸쳐 조회합니다.
+    항목을 하나씩 돌려주는 비동기 제너레이터를 반환합니다.
     """
-    endpoint = f"{BASE_URL}/getSttnNoList"
-    params = {
-        "serviceKey": API_KEY,
-        "cityCode": city_code,
-        "numOfRows": "1000",
-        "pageNo": "1",
-    }
+    return iter_items(client, "getSttnNoList", {"cityCode": city_code}, concurrency=concurrency)
 
-    result = call_api(endpoint, params)
 
-    if result and "items" in result:
-        return result["items"]
-    return []
+def normalize_station(station, stop_id):
+    """
+    TAGO 정류소 항목 하나를 내부 정류장 형식으로 변환합니다.
+    위치 정보가 없거나 잘못된 항목이면 None을 반환합니다.
+    """
+    try:
+        stop_info = {
+            "id": stop_id,
+            "name": station.get("nodenm") or "",  # 정류소 명칭
+            "lat": float(station.get("gpslati") or 0),  # 위도
+            "lng": float(station.get("gpslong") or 0),  # 경도
+            "address": station.get("nodeno") or "",  # 정류소 번호
+            "tago_id": station.get("nodeid") or "",  # TAGO 정류소 ID
+        }
+    except (TypeError, ValueError) as e:
+        print(f"정류장 정보 처리 중 오류: {e}")
+        return None
 
+    if stop_info["lat"] == 0 or stop_info["lng"] == 0:
+        return None
+    return stop_info
 
-def collect_bus_stops():
+
+async def collect_bus_stops(concurrency=MAX_CONCURRENCY):
     """
     고흥군의 모든 버스정류장 정보를 수집합니다.
+
+    정류소 항목은 파싱되는 대로 하나씩 정리되므로 응답 전체를 모아 두지 않습니다.
     """
     print("고흥군 버스정류장 데이터 수집 시작...\n")
 
-    # 도시 코드 조회
-    city_code = get_city_code()
-    if not city_code:
+    bus_stops = []
+    count = 0
+    skipped = 0
+    async with create_client(concurrency) as client:
+        # 도시 코드 조회
+        city_code = await get_city_code(client)
+        if not city_code:
+            return []
+
+        print(f"고흥군 도시 코드: {city_code}\n")
+
+        # 버스정류장 목록 조회 및 정리
+        async for station in get_bus_stations(client, city_code, concurrency):
+            count += 1
+            stop_info = normalize_station(station, count)
+            if stop_info:
+                bus_stops.append(stop_info)
+            else:
+                skipped += 1
+
+    if not count:
+        print("버스정류장 정보를 가져올 수 없습니다.")
         return []
 
-    print(f"고흥군 도시 코드: {city_code}\n")
+    print(f"총 {count}개의 버스정류장을 찾았습니다.\n")
+    if skipped:
+        print(f"위치 정보가 없거나 잘못된 정류장 {skipped}개를 제외했습니다.")
+    return bus_stops
 
-    # 버스정류장 목록 조회
-    stations = get_bus_stations(city_code)
 
-    if not stations:
-        print("버스정류장 정보를 가져올 수 없습니다.")
-        return []
+def select_cities(cities, requested):
+    """
+    도시 목록에서 요청한 도시를 고릅니다. requested는 "all" 또는 도시 코드 목록입니다.
+    """
+    if requested == "all":
+        return cities
+    by_code = {city["citycode"]: city for city in cities}
+    unknown = [code for code in requested if code not in by_code]
+    if unknown:
+        print(f"도시 코드 목록에 없는 코드는 건너뜁니다: {', '.join(unknown)}")
+    return [by_code[code] for code in dict.fromkeys(requested) if code in by_code]
 
-    print(f"총 {len(stations)}개의 버스정류장을 찾았습니다.\n")
 
-    # 정류장 정보 정리
-    bus_stops = []
-    for i, station in enumerate(stations, 1):
-        try:
-            stop_info = {
-                "id": i,
-                "name": station.get("nodenm", ""),  # 정류소 명칭
-                "lat": float(station.get("gpslati", 0)),  # 위도
-                "lng": float(station.get("gpslong", 0)),  # 경도
-                "address": station.get("nodeno", ""),  # 정류소 번호
-                "tago_id": station.get("nodeid", ""),  # TAGO 정류소 ID
-            }
-
-            if stop_info["lat"] != 0 and stop_info["lng"] != 0:
-                bus_stops.append(stop_info)
-                print(f"[{i}] {stop_info['name']} (ID: {stop_info['tago_id']})")
-                print(f"    위치: ({stop_info['lat']}, {stop_info['lng']})")
-                print(f"    정류장 번호: {stop_info['address']}")
-            else:
-                print(f"[{i}] {stop_info['name']} - 위치 정보 없음, 제외됨")
+def parse_station_page(content_type, body):
+    """
+    정류소 목록 응답 한 페이지를 파싱하고 정리합니다. 프로세스 풀의 워커에서 실행됩니다.
 
-        except Exception as e:
-            print(f"정류장 정보 처리 중 오류: {e}")
+    반환값: (항목을 뺀 응답 결과, 정리된 정류장 목록, 제외한 항목 수)
+    """
+    if "xml" in content_type.lower():
+        parser = XMLItemParser()
+        items = iterparse_items(io.BytesIO(body), parser=parser)
+        result = {}
+    else:
+        parser = None
+        result = parse_json_response(json.loads(body))
+        items = result.pop("items", [])
+    records = []
+    count = 0
+    for station in items:
+        count += 1
+        stop_info = normalize_station(station, None)
+        if stop_info:
+            records.append(stop_info)
+    if parser is not None:
+        if parser.header is not None:
+            result["header"] = parser.header
+        if parser.total_count is not None:
+            result["totalCount"] = parser.total_count
+    return result, records, count - len(records)
+
+
+async def collect_city(client, pool, limiter, city_code, page_size=PAGE_SIZE):
+    """
+    도시 하나의 모든 페이지를 받아 프로세스 풀에서 파싱합니다.
 
-    return bus_stops
+    동시 요청 수는 모든 도시가 함께 쓰는 limiter로 제한하고, 파싱은 응답을 받는 대로
+    풀에 넘기므로 다른 요청을 기다리게 하지 않습니다.
+    반환값: (정류장 목록, 제외한 항목 수, 전체 건수)
+    """
+    loop = asyncio.get_running_loop()
+    params = {"cityCode": city_code, "numOfRows": page_size}
+
+    async def fetch_page(page_no):
+        async with limiter:
+            content_type, body = await _request(
+                client, "getSttnNoList", {**params, "pageNo": page_no}, _read_raw
+            )
+        result, records, skipped = await loop.run_in_executor(
+            pool, parse_station_page, content_type, body
+        )
+        _raise_for_header(result)
+        return result, records, skipped
+
+    first, records, skipped = await fetch_page(1)
+    total = first.get("totalCount", len(records) + skipped)
+    pages = max(1, math.ceil(total / page_size))
+
+    for _, page_records, page_skipped in await asyncio.gather(
+        *(fetch_page(page_no) for page_no in range(2, pages + 1))
+    ):
+        records.extend(page_records)
+        skipped += page_skipped
+    return records, skipped, total
 
 
-def generate_bus_stops_file(bus_stops):
+async def collect_cities(requested, concurrency=MAX_CONCURRENCY, processes=None):
     """
-    버스정류장 정보로 Python 파일 생성
+    여러 도시의 버스정류장 정보를 병렬로 수집합니다.
+
+    한 도시의 실패는 다른 도시의 수집을 막지 않으며, 실패한 도시는 결과에서 빠집니다.
+    반환값: {도시 코드: (도시 정보, 정류장 목록)}
     """
-    output_path = "app/data/updated_bus_stops.py"
+    async with create_client(concurrency) as client:
+        cities = select_cities(await get_cities(client), requested)
+        if not cities:
+            return {}
+        print(f"{len(cities)}개 도시의 버스정류장 데이터 수집 시작...\n")
+
+        limiter = asyncio.Semaphore(concurrency)
+        with ProcessPoolExecutor(processes) as pool:
+            results = await asyncio.gather(
+                *(collect_city(client, pool, limiter, city["citycode"]) for city in cities),
+                return_exceptions=True,
+            )
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write('"""\n고흥시 버스정류장 데이터 (TAGO API로 수집됨)\n"""\n\n')
-        f.write("# 고흥시 버스정류장 데이터\n")
-        f.write("bus_stops = [\n")
+    collected = {}
+    for city, result in zip(cities, results):
+        label = f"{city.get('cityname') or ''}({city['citycode']})"
+        if isinstance(result, BaseException):
+            if not isinstance(result, (TagoAPIError, httpx.HTTPError)):
+                raise result
+            print(f"{label} 수집 실패: {result}")
+            continue
+        records, skipped, total = result
+        print(f"{label}: 전체 {total}건 중 {len(records)}개 수집, {skipped}개 제외")
+        collected[city["citycode"]] = (city, records)
+    return collected
+
+
+def sync_cities(collected, path=BUS_STOPS_DATA_FILE, shard_dir=BUS_STOPS_SHARD_DIR, columnar=None):
+    """
+    도시마다 수집한 정류장을 분할 데이터 파일에 동기화합니다 (고흥군은 기본 데이터 파일).
 
-        for stop in bus_stops:
-            # 기본 필드만 포함
-            f.write(
-                f"    {{\"id\": {stop['id']}, \"name\": \"{stop['name']}\", "
-                f"\"lat\": {stop['lat']}, \"lng\": {stop['lng']}}},\n"
+    새 정류장 ID는 모든 데이터 파일이 함께 쓰는 다음 ID부터 차례로 받으므로 파일이
+    달라도 ID가 겹치지 않습니다.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    next_id = shared_next_id(path, shard_dir, _builtin_stops())
+    for city_code, (city, records) in collected.items():
+        name = city.get("cityname") or ""
+        print(f"\n[{name}({city_code})]")
+        if HOME_CITY_NAME in name:
+            next_id = sync_bus_stops(records, path, columnar, next_id=next_id)
+        else:
+            next_id = sync_bus_stops(
+                records, shard_path(shard_dir, city_code), columnar,
+                next_id=next_id, fallback_stops=[],
             )
 
-        f.write("]\n\n")
-        f.write("def get_all_bus_stops():\n")
-        f.write('    """모든 버스 정류장 데이터를 반환합니다."""\n')
-        f.write("    return bus_stops\n\n")
-        f.write("def get_bus_stop_by_id(stop_id):\n")
-        f.write('    """ID로 버스 정류장을 찾습니다."""\n')
-        f.write("    for stop in bus_stops:\n")
-        f.write('        if stop["id"] == stop_id:\n')
-        f.write("            return stop\n")
-        f.write("    return None\n")
 
-    # 상세 정보가 포함된 JSON 파일도 생성
-    json_path = "app/data/bus_stops_detailed.json"
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(bus_stops, f, ensure_ascii=False, indent=2)
+def diff_stops(current_stops, records, next_id):
+    """
+    현재 정류장 목록과 새로 수집한 TAGO 정류장을 tago_id 기준으로 비교합니다.
+
+    기존 정류장은 ID를 그대로 유지하고, 새 정류장만 next_id부터 새 ID를 받습니다.
+    tago_id가 없는 기존 정류장(수작업으로 고른 정류장)은 이름이 같고 가까운 TAGO 정류장과
+    연결하며, 연결되지 않으면 삭제하지 않고 그대로 둡니다.
+
+    반환값: (새 정류장 목록, {"added", "changed", "removed"}, 다음 ID)
+    """
+    by_tago_id = {stop["tago_id"]: stop for stop in current_stops if stop.get("tago_id")}
+    legacy_by_name = {}
+    for stop in current_stops:
+        if not stop.get("tago_id"):
+            legacy_by_name.setdefault(stop["name"], []).append(stop)
+
+    updated = {}
+    added = []
+    changed = []
+    seen = set()
+    for record in records:
+        tago_id = record["tago_id"]
+        if not tago_id or tago_id in seen:
+            continue
+        seen.add(tago_id)
+
+        current = by_tago_id.get(tago_id) or _match_legacy(legacy_by_name, record)
+        if current is None:
+            stop = {"id": next_id, **{field: record[field] for field in SYNC_FIELDS}}
+            next_id += 1
+            added.append(stop)
+            continue
+
+        stop = {**current, **{field: record[field] for field in SYNC_FIELDS}}
+        if any(current.get(field) != stop[field] for field in SYNC_FIELDS):
+            changed.append(stop)
+            updated[stop["id"]] = stop
+
+    removed = [
+        stop["id"]
+        for stop in current_stops
+        if stop.get("tago_id") and stop["tago_id"] not in seen
+    ]
+    removed_ids = set(removed)
+    stops = [
+        updated.get(stop["id"], stop) for stop in current_stops if stop["id"] not in removed_ids
+    ]
+    stops.extend(added)
+
+    unmatched = sum(len(candidates) for candidates in legacy_by_name.values())
+    if unmatched:
+        print(f"TAGO 정류장과 연결되지 않은 기존 정류장 {unmatched}개는 그대로 유지합니다.")
+    return stops, {"added": added, "changed": changed, "removed": removed}, next_id
+
+
+def _match_legacy(legacy_by_name, record):
+    candidates = legacy_by_name.get(record["name"])
+    if not candidates:
+        return None
+    best = min(
+        candidates,
+        key=lambda stop: haversine_m(stop["lat"], stop["lng"], record["lat"], record["lng"]),
+    )
+    if haversine_m(best["lat"], best["lng"], record["lat"], record["lng"]) > LEGACY_MATCH_DISTANCE_M:
+        return None
+    # 한 정류장은 한 번만 연결
+    candidates.remove(best)
+    return best
 
-    print(f"\n버스정류장 정보 파일이 생성되었습니다:")
-    print(f"1. 기본 Python 파일: {output_path}")
-    print(f"2. 상세 JSON 파일: {json_path}")
-    print("\n업데이트를 적용하려면 다음 명령을 실행하세요:")
-    print("cp app/data/updated_bus_stops.py app/data/bus_stops.py")
 
+def _builtin_stops():
+    # 기본 데이터 파일이 없을 때 그 자리를 대신하는 내장 목록
+    # (app.data.bus_stops는 import 시 데이터 파일을 읽으므로 필요할 때 가져옴)
+    from app.data.bus_stops import bus_stops
 
-def main():
+    return bus_stops
+
+
+def sync_bus_stops(
+    records,
+    path=BUS_STOPS_DATA_FILE,
+    columnar=None,
+    next_id=None,
+    fallback_stops=None,
+    shard_dir=BUS_STOPS_SHARD_DIR,
+):
+    """
+    수집한 정류장을 현재 데이터와 비교해 바뀐 경우에만 새 버전 데이터 파일을 씁니다.
+    실행 중인 API는 이 파일을 감지해 재시작 없이 변경분을 적용합니다.
+
+    next_id를 주지 않으면 기본 데이터 파일과 모든 분할 파일에서 다음 ID를 정합니다.
+    다음에 쓸 ID를 반환합니다.
+    """
+    if fallback_stops is None:
+        fallback_stops = _builtin_stops()
+
+    version, file_next_id, current_stops = load_dataset(path, fallback_stops)
+    if next_id is None:
+        next_id = shared_next_id(path, shard_dir, _builtin_stops())
+    next_id = max(next_id, file_next_id)
+    stops, changes, next_id = diff_stops(current_stops, records, next_id)
+
+    print(
+        f"\n변경 내역: 추가 {len(changes['added'])}개, 변경 {len(changes['changed'])}개, "
+        f"삭제 {len(changes['removed'])}개"
+    )
+    if not any(changes.values()):
+        print("바뀐 정류장이 없어 데이터 파일을 그대로 둡니다.")
+        return next_id
+
+    write_dataset(path, stops, version + 1, version, next_id, changes, columnar)
+    print(f"정류장 데이터 버전 {version + 1}을 기록했습니다: {path}")
+    print("실행 중인 API 서버에 자동으로 반영됩니다.")
+    return next_id
+
+
+def record_sync_run(path, status, durations, **details):
+    """
+    동기화 실행 결과(단계별 소요 시간)를 데이터 파일 옆에 남깁니다. API의 /metrics가 읽습니다.
+    """
+    try:
+        write_sync_stats(
+            path,
+            {
+                "status": status,
+                "finished_at": time.time(),
+                "durations": {phase: round(seconds, 3) for phase, seconds in durations.items()},
+                **details,
+            },
+        )
+    except OSError as e:
+        print(f"동기화 결과 기록 실패: {e}")
+
+
+def main(argv: Optional[List[str]] = None):
     """
     메인 실행 함수
     """
+    global BASE_URL
+
+    parser = argparse.ArgumentParser(description="TAGO API 버스정류장 데이터 수집")
+    parser.add_argument("--base-url", default=BASE_URL, help="TAGO API 기본 URL (모의 서버 테스트용)")
+    parser.add_argument(
+        "--concurrency", type=int, default=MAX_CONCURRENCY, help="동시 요청 수"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="(기본 동작, 이전 명령과의 호환용) 현재 데이터와 비교해 바뀐 정류장만 반영한 데이터 파일을 기록",
+    )
+    parser.add_argument("--data-file", default=BUS_STOPS_DATA_FILE, help="동기화 데이터 파일 경로")
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        default=None,
+        help="정류장 수와 관계없이 열 기반(mmap) 데이터 파일도 기록",
+    )
+    parser.add_argument(
+        "--cities",
+        help="여러 도시를 수집해 도시별 분할 데이터 파일로 동기화 (쉼표로 구분한 도시 코드 또는 all)",
+    )
+    parser.add_argument(
+        "--processes", type=int, default=None, help="응답 파싱에 쓰는 프로세스 수 (기본: CPU 코어 수)"
+    )
+    parser.add_argument("--shard-dir", default=BUS_STOPS_SHARD_DIR, help="도시별 분할 데이터 파일 디렉터리")
+    args = parser.parse_args(argv)
+    BASE_URL = args.base_url.rstrip("/")
+
+    # 단계별 소요 시간 (결과 파일로 남김)
+    durations = {}
+    started = time.perf_counter()
+
+    if args.cities:
+        requested = (
+            "all" if args.cities.strip() == "all"
+            else [code.strip() for code in args.cities.split(",") if code.strip()]
+        )
+        try:
+            collected = asyncio.run(collect_cities(requested, args.concurrency, args.processes))
+        except (TagoAPIError, httpx.HTTPError) as e:
+            print(f"\nAPI 호출 중 오류 발생: {e}")
+            durations["fetch"] = time.perf_counter() - started
+            record_sync_run(args.data_file, "failed", durations, error=str(e))
+            return
+        durations["fetch"] = time.perf_counter() - started
+        if not collected:
+            print("\n수집한 도시가 없습니다.")
+            record_sync_run(args.data_file, "failed", durations, error="no cities collected")
+            return
+        sync_started = time.perf_counter()
+        sync_cities(collected, args.data_file, args.shard_dir, args.columnar)
+        durations["sync"] = time.perf_counter() - sync_started
+        durations["total"] = time.perf_counter() - started
+        record_sync_run(
+            args.data_file, "success", durations,
+            cities=len(collected),
+            stops=sum(len(records) for _, records in collected.values()),
+        )
+        return
+
     print("TAGO API를 사용하여 고흥군 버스정류장 데이터 수집을 시작합니다...\n")
 
     # 버스정류장 수집
-    bus_stops = collect_bus_stops()
+    try:
+        bus_stops = asyncio.run(collect_bus_stops(args.concurrency))
+    except (TagoAPIError, httpx.HTTPError) as e:
+        print(f"\nAPI 호출 중 오류 발생: {e}")
+        durations["fetch"] = time.perf_counter() - started
+        record_sync_run(args.data_file, "failed", durations, error=str(e))
+        return
+    durations["fetch"] = time.perf_counter() - started
 
     if not bus_stops:
         print("\n고흥군 버스정류장 데이터를 찾을 수 없습니다.")
+        record_sync_run(args.data_file, "failed", durations, error="no bus stops collected")
         return
 
     print(f"\n총 {len(bus_stops)}개의 유효한 버스정류장 정보를 수집했습니다.")
 
-    # 데이터 파일 생성
-    generate_bus_stops_file(bus_stops)
+    # 바뀐 정류장만 반영한 데이터 파일 기록 (실행 중인 API가 감지해 반영)
+    sync_started = time.perf_counter()
+    sync_bus_stops(bus_stops, args.data_file, args.columnar, shard_dir=args.shard_dir)
+    durations["sync"] = time.perf_counter() - sync_started
+    durations["total"] = time.perf_counter() - started
+    record_sync_run(args.data_file, "success", durations, cities=1, stops=len(bus_stops))
 
 
 if __name__ == "__main__":
@@ -10,6 +10,10 @@ import API_CONFIG from './config'; // 설정 파일 추가
 import axios from 'axios';
 import './App.css';
 
+// 알림 ID - 재전송 묶음처럼 같은 밀리초에 여러 알림이 생겨도 겹치지 않도록 단조 증가하는 번호 사용
+let notificationSeq = 0;
+const nextNotificationId = () => ++notificationSeq;
+
 function App() {
     // 상태 관리
     const [busStops, setBusStops] = useState([]);
@@ -31,6 +35,8 @@ function App() {
     const [emergencyActive, setEmergencyActive] = useState(false);
     // 카메라 연결 상태 추가
     const [activeCameraStop, setActiveCameraStop] = useState(null);
+    // 정류장 장치 접속 상태 (정류장 ID -> { online, lastSeen, info })
+    const [deviceStatus, setDeviceStatus] = useState({});
 
     // 설정 상태 추가
     const [settings, setSettings] = useState({
@@ -94,19 +100,52 @@ function App() {
     useEffect(() => {
         let socket = null;
         let reconnectTimer = null;
+        // 마지막으로 받은 알림 순번 - 재접속 시 놓친 알림만 다시 받기 위해 사용
+        let lastSeq = null;
 
         const connectWebSocket = () => {
             try {
-                socket = new WebSocket('ws://localhost:8001/ws/emergency');
+                const query = lastSeq !== null ? `?since=${lastSeq}` : '';
+                socket = new WebSocket(`ws://localhost:8001/ws/emergency${query}`);
 
                 socket.onopen = () => {
                     console.log('웹소켓 연결 성공');
+                    // 장치 접속 상태는 처음에 전체 목록을 받고 이후에는 변경분만 받음
+                    axios.get('http://localhost:8001/api/devices')
+                        .then((response) => {
+                            const status = {};
+                            response.data.forEach((device) => {
+                                status[device.busStopId] = device;
+                            });
+                            setDeviceStatus(status);
+                        })
+                        .catch((error) => console.error('장치 접속 상태 로드 실패:', error));
                 };
 
                 socket.onmessage = (event) => {
                     try {
                         const data = JSON.parse(event.data);
-                        handleEmergencyMessage(data);
+                        // 장치 온라인/오프라인 변경분
+                        if (data.type === 'presence') {
+                            handlePresenceChanges(data.changes);
+                            return;
+                        }
+                        // 구독 응답/미팅 등 알림이 아닌 프레임 (대시보드는 구독 조건을 지정하지 않음)
+                        if (data.type && data.type !== 'emergency_batch') {
+                            return;
+                        }
+                        // 같은 시점에 발생한 알림은 묶음 프레임으로 전달됨
+                        const alerts = data.type === 'emergency_batch' ? data.alerts : [data];
+                        alerts.forEach((alert) => {
+                            if (typeof alert.seq === 'number') {
+                                // 재전송과 실시간 전달이 겹쳐 이미 받은 알림이 다시 오면 무시
+                                if (lastSeq !== null && alert.seq <= lastSeq) {
+                                    return;
+                                }
+                                lastSeq = alert.seq;
+                            }
+                            handleEmergencyMessage(alert);
+                        });
                     } catch (error) {
                         console.error('웹소켓 메시지 처리 오류:', error);
                     }
@@ -142,6 +181,20 @@ function App() {
         };
     }, []);
 
+    // 장치 접속 상태 변경분 반영
+    const handlePresenceChanges = (changes) => {
+        setDeviceStatus(prev => {
+            const next = { ...prev };
+            changes.forEach((device) => {
+                next[device.busStopId] = device;
+                if (!device.online) {
+                    console.warn(`정류장 ${device.busStopId} 장치 연결 끊김`);
+                }
+            });
+            return next;
+        });
+    };
+
     // 버스 정류장 데이터가 로드되면 window.busStopsForEmergency에 저장 (F2 긴급 테스트용)
     useEffect(() => {
         window.busStopsForEmergency = busStops;
@@ -171,7 +224,7 @@ function App() {
         const busStop = busStops.find(stop => stop.id === busStopId);
         if (busStop) {
             const newNotification = {
-                id: Date.now(),
+                id: nextNotificationId(),
                 busStopId: busStop.id,
                 busStopName: busStop.name,
                 message: `${busStop.name}에서 긴급 버튼이 눌렸습니다!`,
@@ -223,7 +276,7 @@ function App() {
     // 디버그 알림 추가 함수
     const addDebugNotification = () => {
         const debugNotification = {
-            id: Date.now(),
+            id: nextNotificationId(),
             busStopId: 999,
             busStopName: 'DEBUG',
             message: '디버그 알림 - F2키로 추가된 알림',
@@ -243,10 +296,12 @@ function App() {
     const handleEmergencyMessage = (data) => {
         try {
             const newNotification = {
-                id: Date.now(),
+                id: nextNotificationId(),
                 busStopId: data.busStopId,
                 busStopName: data.busStopName,
-                message: `${data.busStopName}에서 긴급 버튼이 눌렸습니다!`,
+                message: data.pressCount > 1
+                    ? `${data.busStopName}에서 긴급 버튼이 ${data.pressCount}회 눌렸습니다!`
+                    : `${data.busStopName}에서 긴급 버튼이 눌렸습니다!`,
                 timestamp: new Date().toLocaleTimeString(),
                 lat: data.lat,
                 lng: data.lng
@@ -728,6 +783,7 @@ function App() {
                     searchedStop={searchedStop}
                     activeEmergencies={notifications}
                     isSidebarOpen={sidebarOpen}
+                    deviceStatus={deviceStatus}
                 />
             )}
 
@@ -1,6 +1,6 @@
 import React, { useEffect, useState, useRef } from 'react';
 
-const BusStopMap = ({ busStops, searchedStop, activeEmergencies, isSidebarOpen }) => {
+const BusStopMap = ({ busStops, searchedStop, activeEmergencies, isSidebarOpen, deviceStatus }) => {
     const mapRef = useRef(null);
     const [map, setMap] = useState(null);
     const markersRef = useRef({});
@@ -200,6 +200,15 @@ const BusStopMap = ({ busStops, searchedStop, activeEmergencies, isSidebarOpen }
         }
     };
 
+    // 장치 연결이 끊긴 정류장 마커는 흐리게 표시
+    useEffect(() => {
+        Object.entries(markersRef.current).forEach(([stopId, markerInfo]) => {
+            if (!markerInfo || !markerInfo.marker) return;
+            const device = deviceStatus && deviceStatus[stopId];
+            markerInfo.marker.setOpacity(device && !device.online ? 0.4 : 1);
+        });
+    }, [map, busStops, deviceStatus]);
+
     // 새로운 부드러운 이동 효과 함수 - 점진적인 좌표 변경 방식으로 구현
     const smoothMoveToLocation = (targetPosition, targetLevel, currentLevel) => {
         // 이미 애니메이션이 진행 중이면 모든 타이머 취소